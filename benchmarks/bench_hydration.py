@@ -0,0 +1,62 @@
+"""Compare ways of hydrating stored prompt records into Prompt objects.
+
+Usage: python -m benchmarks.bench_hydration [--prompts 100000] [--sqlite]
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+from promptlib.models.prompt import Prompt
+from promptlib.models.variable import VariableDefinition
+from promptlib.storage.sqlite import SQLiteRepository
+
+def _sample(i: int) -> Prompt:
+    return Prompt(
+        name=f"bench-{i}",
+        description="Benchmark prompt",
+        content="Summarize {{text}} for {{audience}}. " * 10,
+        variables=["text", "audience"],
+        variable_definitions=[VariableDefinition(name="text"), VariableDefinition(name="audience", required=False)],
+        tags=["bench", "summary"],
+        category="bench",
+        metadata={"source": "bench"}
+    )
+
+def _timed(label: str, fn) -> float:
+    # Keep cyclic GC passes over the growing result list out of the measurement
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    print(f"{label:<32} {elapsed:>8.3f}s")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=100000)
+    parser.add_argument("--sqlite", action="store_true", help="Also time SQLiteRepository.list_all over the same prompts")
+    args = parser.parse_args()
+
+    prompts = [_sample(i) for i in range(args.prompts)]
+    # What the storage backends read back
+    documents = [p.model_dump_json() for p in prompts]
+    records = [json.loads(doc) for doc in documents]
+
+    _timed("Prompt(**json.loads(doc))", lambda: [Prompt(**json.loads(doc)) for doc in documents])
+    _timed("Prompt.model_construct(**data)", lambda: [Prompt.model_construct(**d) for d in records])
+    _timed("Prompt(**data)", lambda: [Prompt(**d) for d in records])
+    _timed("Prompt.model_validate_json(doc)", lambda: [Prompt.model_validate_json(doc) for doc in documents])
+
+    if args.sqlite:
+        path = os.path.join(tempfile.mkdtemp(prefix="promptlib-bench-"), "bench.db")
+        repo = SQLiteRepository(f"sqlite:///{path}")
+        repo.save_bulk(prompts, [])
+        _timed("SQLiteRepository.list_all()", repo.list_all)
+        _timed("SQLiteRepository.iter_summaries()", lambda: list(repo.iter_summaries()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare SQLiteRepository read/write throughput with and without the performance profile.
+
+Usage: python -m benchmarks.bench_sqlite [--prompts 2000] [--reads 5000] [--readers 4]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from promptlib.config.settings import Settings
+from promptlib.models.prompt import Prompt
+from promptlib.storage.sqlite import SQLiteRepository
+
+def _qps(count: int, seconds: float) -> float:
+    return count / seconds if seconds else float("inf")
+
+def run_profile(name: str, pragmas, pool_size, prompts: int, reads: int, readers: int):
+    path = os.path.join(tempfile.mkdtemp(prefix="promptlib-bench-"), "bench.db")
+    repo = SQLiteRepository(f"sqlite:///{path}", pragmas=pragmas, pool_size=pool_size)
+
+    items = [Prompt(name=f"bench-{i}", content=f"You are assistant number {i}. Answer {{{{question}}}}.") for i in range(prompts)]
+    start = time.perf_counter()
+    for p in items:
+        repo.save(p)
+    write_qps = _qps(prompts, time.perf_counter() - start)
+
+    ids = [p.id for p in items]
+    start = time.perf_counter()
+    for _ in range(reads):
+        repo.get_by_id(random.choice(ids))
+    read_qps = _qps(reads, time.perf_counter() - start)
+
+    # Readers running while a writer keeps committing usage updates
+    stop = threading.Event()
+    counts = [0] * readers
+
+    def reader(slot: int):
+        while not stop.is_set():
+            repo.get_by_id(random.choice(ids))
+            counts[slot] += 1
+
+    def writer():
+        while not stop.is_set():
+            repo.update_usage(random.choice(ids))
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)] + [threading.Thread(target=writer)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(2.0)
+    stop.set()
+    for t in threads:
+        t.join()
+    mixed_qps = _qps(sum(counts), time.perf_counter() - start)
+
+    print(f"{name:<12} writes/s {write_qps:>10.0f}   reads/s {read_qps:>10.0f}   reads/s under write load {mixed_qps:>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    throughput = Settings(sqlite_profile="throughput")
+    run_profile("default", None, None, args.prompts, args.reads, args.readers)
+    run_profile("throughput", throughput.sqlite_pragmas(), throughput.sqlite_pool_size, args.prompts, args.reads, args.readers)
+
+if __name__ == "__main__":
+    main()
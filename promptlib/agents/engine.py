@@ -17,18 +17,27 @@ class ExecutorAgent(BaseAgent):
         self.prompt_service = prompt_service
 
     def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Render `prompt_id`, or every prompt assigned to the agent when none is given."""
         prompt_id = input_data.get("prompt_id")
         variables = input_data.get("variables", {})
-        if not prompt_id:
-            raise PromptLibError("ExecutorAgent requires prompt_id")
+        prompt_ids = [prompt_id] if prompt_id else self.model.assigned_prompts
+        if not prompt_ids:
+            raise PromptLibError("ExecutorAgent requires prompt_id or assigned prompts")
 
-        result = self.prompt_service.render_prompt(UUID(str(prompt_id)), variables)
-        self.model.execution_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "prompt_id": str(prompt_id),
-            "status": "success"
-        })
-        return {"output": result}
+        prompt_ids = [UUID(str(pid)) for pid in prompt_ids]
+        outputs = {}
+        # One batched lookup for every prompt the run renders
+        with self.prompt_service.prefetch(prompt_ids):
+            for pid in prompt_ids:
+                outputs[str(pid)] = self.prompt_service.render_prompt(pid, variables)
+                self.model.execution_history.append({
+                    "timestamp": datetime.now().isoformat(),
+                    "prompt_id": str(pid),
+                    "status": "success"
+                })
+        if prompt_id:
+            return {"output": outputs[str(prompt_ids[0])]}
+        return {"outputs": outputs}
 
 class OptimizerAgent(BaseAgent):
     def __init__(self, model: Agent, optimization_service: Any):
@@ -55,6 +64,10 @@ class AgentOrchestrator:
     def register_agent(self, agent_id: UUID, agent: BaseAgent):
         self.agents[agent_id] = agent
 
+    def assigned_prompts(self, agent_ids: List[UUID]) -> List[UUID]:
+        """Prompts assigned to the given registered agents, for batch prefetching."""
+        return [pid for aid in agent_ids if aid in self.agents for pid in self.agents[aid].model.assigned_prompts]
+
     def run_agent(self, agent_id: UUID, input_data: Dict[str, Any]) -> Dict[str, Any]:
         if agent_id not in self.agents:
             raise PromptLibError(f"Agent {agent_id} not found")
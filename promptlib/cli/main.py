@@ -1,32 +1,113 @@
+import time
+_started = time.perf_counter()
+
 import typer
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
 from uuid import UUID
 import json
-from promptlib.storage.sqlite import SQLiteRepository
-from promptlib.storage.json_backend import JSONRepository
-from promptlib.storage.yaml_backend import YAMLRepository
+import os
 from promptlib.config.settings import settings
-from promptlib.services.prompt_service import PromptService
-from promptlib.services.rendering import RenderingService
-from promptlib.embeddings.engine import EmbeddingEngine
-from promptlib.vector_index.faiss_index import VectorIndex
-from promptlib.services.workflow_service import UltimateWorkflowService
-from promptlib.agents.engine import AgentOrchestrator, ExecutorAgent, OptimizerAgent
-from promptlib.models.workflow import Workflow
-from promptlib.models.agent import Agent
-from promptlib.core.exceptions import PromptNotFoundError
+from promptlib.core.exceptions import PromptLibError
+
+# Backends, the embedding model (torch) and FAISS are imported on first use,
+# so commands that never touch them do not pay for loading them.
 
 app = typer.Typer(help="PromptLib - Advanced Local Prompt Management")
+snapshot_app = typer.Typer(help="Read-only library snapshots for serving nodes")
+app.add_typer(snapshot_app, name="snapshot")
+
+_timings: List[Tuple[str, float]] = [("import cli", time.perf_counter() - _started)]
+
+@contextmanager
+def _timed(label: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings.append((label, time.perf_counter() - start))
+
+def _report_timings():
+    for label, elapsed in _timings:
+        typer.echo(f"{label:<32} {elapsed * 1000:>9.1f} ms", err=True)
+    typer.echo(f"{'total':<32} {(time.perf_counter() - _started) * 1000:>9.1f} ms", err=True)
+
+@app.callback()
+def main(ctx: typer.Context,
+         timing: bool = typer.Option(False, "--timing", help="Print an import and initialization time breakdown to stderr"),
+         no_daemon: bool = typer.Option(False, "--no-daemon", help="Run in this process even if a `serve` daemon is running")):
+    global _daemon_routing
+    if timing:
+        ctx.call_on_close(_report_timings)
+    if no_daemon:
+        _daemon_routing = False
+
+# A running `promptlib serve` answers render, search, list and workflow-run
+# for the same library, so those commands skip the cold start entirely.
+_daemon_routing = settings.daemon_routing
+_daemon_client = None
+_LOCAL = object()
+
+def daemon_available() -> bool:
+    """Whether commands should be sent to a running daemon for this library."""
+    global _daemon_client, _daemon_routing
+    if _daemon_routing and _daemon_client is None:
+        from promptlib.services.daemon import find_daemon, library_key
+        with _timed("find daemon"):
+            _daemon_client = find_daemon(settings.daemon_state_path, library_key(settings), settings.daemon_timeout)
+        _daemon_routing = _daemon_client is not None
+    return _daemon_routing
+
+def call_daemon(op: str, **params):
+    """Result of `op` from a running daemon, or _LOCAL if there is none to ask."""
+    global _daemon_routing
+    if not daemon_available():
+        return _LOCAL
+    try:
+        with _timed(f"daemon {op}"):
+            return _daemon_client.call(op, **params)
+    except ConnectionRefusedError:
+        # Refused before anything was sent: the daemon is gone (stale state file), so run here
+        _daemon_routing = False
+        return _LOCAL
+    except OSError as e:
+        # Lost after sending; the daemon may already have run it, so never retry locally
+        raise PromptLibError(f"Daemon {op} request failed after it was sent ({e}); it may have completed. "
+                             f"Check before rerunning, or use --no-daemon.") from e
 
 def get_repository():
-    if settings.storage_backend == "sqlite":
-        return SQLiteRepository(settings.sqlite_url)
-    elif settings.storage_backend == "json":
-        return JSONRepository(settings.json_dir)
-    elif settings.storage_backend == "yaml":
-        return YAMLRepository(settings.yaml_dir)
-    else:
-        raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+    with _timed(f"open {settings.storage_backend} repository"):
+        if settings.storage_backend == "sqlite":
+            from promptlib.storage.sqlite import SQLiteRepository
+            return SQLiteRepository(settings.sqlite_url, pragmas=settings.sqlite_pragmas(), pool_size=settings.sqlite_pool_size)
+        elif settings.storage_backend == "json":
+            from promptlib.storage.json_backend import JSONRepository
+            return JSONRepository(settings.json_dir, load_workers=settings.file_load_workers, load_mode=settings.file_load_mode)
+        elif settings.storage_backend == "yaml":
+            from promptlib.storage.yaml_backend import YAMLRepository
+            return YAMLRepository(settings.yaml_dir, load_workers=settings.file_load_workers, load_mode=settings.file_load_mode)
+        elif settings.storage_backend == "log":
+            from promptlib.storage.log_backend import LogRepository
+            return LogRepository(settings.log_storage_dir, fsync=settings.log_storage_fsync,
+                                 compact_interval=settings.log_compact_interval, compact_ratio=settings.log_compact_ratio)
+        elif settings.storage_backend == "snapshot":
+            from promptlib.storage.snapshot import SnapshotRepository
+            return SnapshotRepository(settings.snapshot_path)
+        else:
+            raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+def get_usage_buffer(repo):
+    if settings.usage_write_mode == "sync":
+        return None
+    from promptlib.services.usage_buffer import UsageBuffer
+    return UsageBuffer(
+        repo,
+        flush_interval=settings.usage_flush_interval,
+        flush_threshold=settings.usage_flush_threshold,
+        mode=settings.usage_write_mode,
+        journal_path=settings.usage_journal_path,
+        fsync=settings.usage_journal_fsync
+    )
 
 # Global services (Lazy initialized in commands that need them)
 _repo = None
@@ -36,18 +117,51 @@ _svc = None
 _orchestrator = None
 _wf_svc = None
 
-def get_svc():
-    global _repo, _embedding_engine, _vector_index, _svc
+def get_svc(semantic: bool = False):
+    """Shared PromptService; the embedding model and vector index are only loaded when `semantic` is set."""
+    global _repo, _svc
     if _svc is None:
+        with _timed("import services"):
+            from promptlib.services.prompt_service import PromptService
+            from promptlib.services.rendering import RenderingService
         _repo = get_repository()
-        _embedding_engine = EmbeddingEngine()
-        _vector_index = VectorIndex(dimension=_embedding_engine.get_dimension(), index_path="promptlib.index")
-        _svc = PromptService(_repo, RenderingService(), embedding_engine=_embedding_engine, vector_index=_vector_index)
+        with _timed("build service"):
+            _svc = PromptService(_repo, RenderingService(settings.template_cache_size), usage_buffer=get_usage_buffer(_repo),
+                                 duplicate_index=_load_duplicate_index,
+                                 embedding_dtype=settings.embedding_dtype)
+    if semantic and _svc.embedding_engine is None:
+        _load_semantic(_svc)
     return _svc
 
+def _load_duplicate_index():
+    from promptlib.utils.dedupe import NearDuplicateIndex
+    with _timed("load duplicate index"):
+        return NearDuplicateIndex(settings.dedupe_index_path)
+
+def _load_semantic(svc):
+    global _embedding_engine, _vector_index
+    with _timed("import embedding libraries"):
+        from promptlib.embeddings.engine import EmbeddingEngine
+        from promptlib.vector_index.faiss_index import VectorIndex
+    with _timed("load embedding model"):
+        _embedding_engine = EmbeddingEngine(model_name=settings.embedding_model, cache_dir=settings.embedding_cache_dir,
+                                            cache_max_bytes=settings.embedding_cache_max_bytes,
+                                            cache_memory_items=settings.embedding_cache_memory_items,
+                                            batch_size=settings.embedding_batch_size, workers=settings.embedding_workers,
+                                            backend=settings.embedding_backend, dimension=settings.embedding_dimension)
+    # Each backend keeps its own index, so switching backends does not discard the other's vectors
+    backend = settings.embedding_backend
+    index_path = "promptlib.index" if backend == "sentence-transformers" else f"promptlib.{backend}.index"
+    with _timed("load vector index"):
+        _vector_index = VectorIndex(dimension=_embedding_engine.get_dimension(), index_path=index_path, backend=backend)
+    svc.embedding_engine = _embedding_engine
+    svc.vector_index = _vector_index
+
 def get_orchestrator():
     global _orchestrator
     if _orchestrator is None:
+        from promptlib.agents.engine import AgentOrchestrator, ExecutorAgent
+        from promptlib.models.agent import Agent
         _orchestrator = AgentOrchestrator()
         svc = get_svc()
         # Auto-register agents if they exist in repo
@@ -59,6 +173,7 @@ def get_orchestrator():
 def get_wf_svc():
     global _wf_svc
     if _wf_svc is None:
+        from promptlib.services.workflow_service import UltimateWorkflowService
         _wf_svc = UltimateWorkflowService(get_svc(), get_orchestrator())
     return _wf_svc
 
@@ -66,16 +181,57 @@ def get_wf_svc():
 def create(name: str, content: str, description: Optional[str] = None, category: Optional[str] = None, tags: Optional[str] = None):
     """Create a new prompt."""
     tag_list = tags.split(",") if tags else []
-    prompt = get_svc().create_prompt(name=name, content=content, description=description, category=category, tags=tag_list)
+    prompt = get_svc(semantic=True).create_prompt(name=name, content=content, description=description, category=category, tags=tag_list)
     typer.echo(f"Created prompt '{prompt.name}' (ID: {prompt.id})")
 
+def _read_jsonl(path: str):
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+@app.command("import")
+def import_prompts(path: str, chunk_size: int = typer.Option(500, help="Prompts per embedding batch and transaction")):
+    """Bulk import prompts from a JSONL file (one prompt object per line)."""
+    svc = get_svc(semantic=True)
+    created = svc.create_prompts_bulk(_read_jsonl(path), chunk_size=chunk_size)
+    if _vector_index:
+        _vector_index.save()
+    typer.echo(f"Imported {created} prompts.")
+
 @app.command()
-def list(category: Optional[str] = None, tags: Optional[str] = None):
+def list(category: Optional[str] = None, tags: Optional[str] = None,
+         match: str = typer.Option("all", help="Require 'all' of the given tags or 'any' of them"),
+         limit: Optional[int] = typer.Option(None, help="Maximum number of prompts to show"),
+         offset: int = typer.Option(0, help="Number of prompts to skip"),
+         after: Optional[str] = typer.Option(None, help="Continue after this prompt ID (from a previous page)"),
+         order_by: str = typer.Option("name", help="name, created_at, updated_at or usage_count; prefix '-' for descending"),
+         format: str = typer.Option("text", help="Output format: text or jsonl")):
     """List all prompts."""
     tag_list = tags.split(",") if tags else None
-    prompts = get_svc().list_prompts(category=category, tags=tag_list)
-    for p in prompts:
-        typer.echo(f"{p.id} | {p.name} | v{p.version} | {p.category or 'No category'}")
+    summaries = call_daemon("list", category=category, tags=tag_list, tag_mode=match, order_by=order_by,
+                            after_id=after, limit=limit, offset=offset)
+    if summaries is _LOCAL:
+        summaries = get_svc().iter_summaries(category=category, tags=tag_list, tag_mode=match, order_by=order_by,
+                                             after_id=UUID(after) if after else None, limit=limit, offset=offset)
+    else:
+        from promptlib.models.prompt import PromptSummary
+        summaries = [PromptSummary.model_validate(s) for s in summaries]
+    for p in summaries:
+        if format == "jsonl":
+            typer.echo(p.model_dump_json())
+        else:
+            typer.echo(f"{p.id} | {p.name} | v{p.version} | {p.category or 'No category'}")
+
+@app.command("tags")
+def tag_counts(category: Optional[str] = None, tags: Optional[str] = None,
+               match: str = typer.Option("all", help="Require 'all' of the given tags or 'any' of them")):
+    """Show how many prompts carry each tag."""
+    tag_list = tags.split(",") if tags else None
+    counts = get_svc().tag_counts(category=category, tags=tag_list, tag_mode=match)
+    for tag, count in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+        typer.echo(f"{tag}: {count}")
 
 @app.command()
 def delete(prompt_id: str):
@@ -90,32 +246,113 @@ def edit(prompt_id: str, content: Optional[str] = None, description: Optional[st
     if description is not None: kwargs["description"] = description
     if category is not None: kwargs["category"] = category
 
-    prompt = get_svc().update_prompt(UUID(prompt_id), content=content, **kwargs)
+    # Only a content change needs a new embedding
+    prompt = get_svc(semantic=content is not None).update_prompt(UUID(prompt_id), content=content, **kwargs)
     typer.echo(f"Updated prompt '{prompt.name}' to version {prompt.version}")
 
 @app.command()
 def search(query: str, semantic: bool = False, k: int = 5):
     """Search for prompts (keyword or semantic)."""
-    results = get_svc().search_prompts(query, semantic=semantic, k=k)
+    results = call_daemon("search", query=query, semantic=semantic, k=k)
+    if results is _LOCAL:
+        results = get_svc(semantic=semantic).search_prompts_scored(query, semantic=semantic, k=k)
+    else:
+        from promptlib.models.prompt import Prompt
+        results = [(Prompt.model_validate(r["prompt"]), r["score"]) for r in results]
     if not results:
         typer.echo("No results found.")
-    for p in results:
-        typer.echo(f"{p.id} | {p.name} | {p.content[:50]}...")
+    for p, score in results:
+        typer.echo(f"{p.id} | {p.name} | {score:.4f} | {p.content[:50]}...")
 
 @app.command()
-def reindex():
-    """Rebuild the vector index."""
-    svc = get_svc()
-    svc.reindex()
+def reindex(full: bool = typer.Option(False, help="Discard the index and re-embed everything"),
+            batch_size: int = typer.Option(256, help="Prompts per embedding batch")):
+    """Incrementally update the vector index (resumes after interruption)."""
+    svc = get_svc(semantic=True)
+    stats = svc.reindex(full=full, batch_size=batch_size)
     _vector_index.save()
-    typer.echo("Vector index rebuilt and saved.")
+    typer.echo(f"Vector index updated: {stats['embedded']} embedded, {stats['reused']} reused, "
+               f"{stats['kept']} unchanged, {stats['removed']} removed.")
 
 @app.command()
-def render(prompt_id: str, variables: str = typer.Option("{}", help="JSON string of variables")):
-    """Render a prompt with variables (JSON string)."""
+def maintain(rebuild: bool = typer.Option(False, help="Regenerate the full-text index from the prompts table"),
+             vacuum: bool = typer.Option(False, help="Reclaim free pages (rebuilds the full-text index afterwards)")):
+    """Optimize the SQLite full-text search index, or compact the log backend."""
+    from promptlib.storage.sqlite import SQLiteRepository
+    from promptlib.storage.log_backend import LogRepository
+    repo = get_repository()
+    if isinstance(repo, LogRepository):
+        typer.echo(f"Log compacted, {repo.compact()} bytes reclaimed.")
+        return
+    if not isinstance(repo, SQLiteRepository):
+        typer.echo("Maintenance only applies to the sqlite and log backends.")
+        raise typer.Exit(code=1)
+    if vacuum:
+        repo.vacuum()
+    elif rebuild:
+        repo.rebuild_search_index()
+    repo.optimize_search_index()
+    typer.echo("Search index optimized.")
+
+@snapshot_app.command("build")
+def snapshot_build(output: Optional[str] = typer.Argument(None, help="Snapshot file to write (defaults to the snapshot_path setting)"),
+                   model: Optional[str] = typer.Option(None, help="Embedding model whose stored vectors are included (defaults to the configured embedder)")):
+    """Compile the current repository into one immutable, mmap-able file."""
+    from promptlib.storage.snapshot import build_snapshot
+    from promptlib.embeddings.embedders import HashingEmbedder
+    if model is None:
+        model = HashingEmbedder(settings.embedding_dimension).name if settings.embedding_backend == "hashing" else settings.embedding_model
+    path = output or settings.snapshot_path
+    stats = build_snapshot(get_repository(), path, model=model)
+    typer.echo(f"Wrote {path}: {stats['prompts']} prompts, {stats['embeddings']} embeddings ({stats['bytes']} bytes).")
+
+@app.command()
+def serve(host: str = typer.Option(settings.daemon_host, help="Interface to listen on"),
+          port: int = typer.Option(settings.daemon_port, help="Port to listen on (0 picks a free one)"),
+          preload: bool = typer.Option(True, "--preload/--lazy", help="Load the embedding model and vector index now, or on the first semantic search")):
+    """Run a local daemon that keeps the library, templates, model and index warm for other CLI calls."""
+    import signal
+    import threading
+    from promptlib.services.daemon import PromptDaemon, SERVE_BACKENDS, library_key
+    if settings.storage_backend not in SERVE_BACKENDS:
+        typer.echo(f"serve needs a backend other processes can write alongside ({', '.join(SERVE_BACKENDS)}), "
+                   f"not {settings.storage_backend}.", err=True)
+        raise typer.Exit(code=1)
+    svc = get_svc(semantic=preload)
+    get_wf_svc()
+    daemon = PromptDaemon(svc, host=host, port=port, state_path=settings.daemon_state_path, library=library_key(settings),
+                          load_semantic=lambda: get_svc(semantic=True), workflow_service=get_wf_svc)
+    # shutdown() waits for serve_forever to return, so it cannot run on the serving thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=daemon.shutdown).start())
+    typer.echo(f"Serving the {settings.storage_backend} library on {daemon.url} (Ctrl+C to stop)")
     try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+@app.command()
+def render(prompt_id: str,
+           variables: str = typer.Option("{}", help="JSON string of variables"),
+           batch: Optional[str] = typer.Option(None, help="JSONL file with one variable set per line")):
+    """Render a prompt with variables (JSON string), or against a JSONL batch."""
+    try:
+        if batch:
+            # One JSON-encoded output per line so multi-line renders stay parseable. Only the
+            # daemon needs the rows in memory (they travel in one request); locally they stream.
+            rows = _read_jsonl(batch)
+            outputs = _LOCAL
+            if daemon_available():
+                rows = [*rows]
+                outputs = call_daemon("render_many", prompt_id=prompt_id, variable_sets=rows)
+            if outputs is _LOCAL:
+                outputs = get_svc().render_many(UUID(prompt_id), rows)
+            for rendered in outputs:
+                typer.echo(json.dumps(rendered))
+            return
         vars_dict = json.loads(variables)
-        rendered = get_svc().render_prompt(UUID(prompt_id), vars_dict)
+        rendered = call_daemon("render", prompt_id=prompt_id, variables=vars_dict)
+        if rendered is _LOCAL:
+            rendered = get_svc().render_prompt(UUID(prompt_id), vars_dict)
         typer.echo(rendered)
     except Exception as e:
         typer.echo(f"Error: {e}")
@@ -129,7 +366,7 @@ def version(prompt_id: str, history: bool = False, rollback: Optional[str] = Non
         for v in versions:
             typer.echo(f"{v.version} | {v.created_at} | {v.change_log}")
     elif rollback:
-        prompt = svc.rollback(UUID(prompt_id), rollback)
+        prompt = get_svc(semantic=True).rollback(UUID(prompt_id), rollback)
         typer.echo(f"Rolled back to version {rollback}. New version is {prompt.version}")
     elif diff:
         # Expecting diff format "v1:v2"
@@ -152,6 +389,17 @@ def lint(prompt_id: str):
     for res in results:
         typer.echo(str(res))
 
+@app.command()
+def dedupe(threshold: float = typer.Option(settings.dedupe_threshold, help="Minimum estimated similarity (0-1)")):
+    """Report clusters of near-duplicate prompts across the library."""
+    clusters = get_svc().find_duplicates(threshold)
+    if not clusters:
+        typer.echo("No near-duplicates found.")
+    for i, cluster in enumerate(clusters, start=1):
+        typer.echo(f"Cluster {i} ({len(cluster)} prompts):")
+        for p in cluster:
+            typer.echo(f"  {p.id} | {p.name}")
+
 @app.command()
 def optimize(prompt_id: str):
     """Automatically optimize a prompt."""
@@ -164,8 +412,8 @@ def optimize(prompt_id: str):
     typer.echo(f"Efficiency Score: {result.efficiency_score:.2f}")
 
 @app.command()
-def agent_run(agent_id: str, prompt_id: str, variables: str = "{}"):
-    """Run an agent with a specific prompt."""
+def agent_run(agent_id: str, prompt_id: Optional[str] = typer.Argument(None), variables: str = "{}"):
+    """Run an agent with a specific prompt, or with all of its assigned prompts."""
     try:
         vars_dict = json.loads(variables)
         res = get_orchestrator().run_agent(UUID(agent_id), {"prompt_id": prompt_id, "variables": vars_dict})
@@ -182,13 +430,27 @@ def stats():
     typer.echo("Categories:")
     for cat, count in s['categories'].items():
         typer.echo(f"  - {cat}: {count}")
+    if s['tags']:
+        typer.echo("Tags:")
+        for tag, count in sorted(s['tags'].items(), key=lambda item: item[1], reverse=True):
+            typer.echo(f"  - {tag}: {count}")
+    percentiles = ", ".join(f"{k}={v}" for k, v in s['usage_percentiles'].items())
+    typer.echo(f"Usage percentiles: {percentiles}")
+    if s['recently_used']:
+        typer.echo("Recently used:")
+        for r in s['recently_used']:
+            typer.echo(f"  - {r['name']} ({r['last_used']})")
 
 @app.command()
 def workflow_run(workflow_id: str, context: str = "{}"):
     """Execute a workflow."""
     try:
         ctx_dict = json.loads(context)
-        final_ctx = get_wf_svc().run_workflow(workflow_id, ctx_dict)
+        # The daemon may run from another directory, so send workflow files by absolute path
+        remote_id = os.path.abspath(workflow_id) if os.path.exists(workflow_id) else workflow_id
+        final_ctx = call_daemon("workflow_run", workflow_id=remote_id, context=ctx_dict)
+        if final_ctx is _LOCAL:
+            final_ctx = get_wf_svc().run_workflow(workflow_id, ctx_dict)
         typer.echo(json.dumps(final_ctx, indent=2))
     except Exception as e:
         typer.echo(f"Error: {e}")
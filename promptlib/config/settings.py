@@ -1,14 +1,64 @@
 import os
+from typing import Any, Dict
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
-    storage_backend: str = "sqlite" # sqlite, json, yaml
+    storage_backend: str = "sqlite" # sqlite, json, yaml, log, snapshot (read-only)
     sqlite_url: str = "sqlite:///promptlib.db"
+    sqlite_profile: str = "throughput" # default, throughput
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 268435456 # bytes
+    sqlite_cache_size: int = -65536 # negative values are KiB
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout: int = 5000 # ms
+    sqlite_pool_size: int = 8
     json_dir: str = "prompts_json"
     yaml_dir: str = "prompts_yaml"
+    file_load_workers: int = 8 # 1 reads json/yaml files sequentially
+    file_load_mode: str = "thread" # thread, process (process pools only parse YAML)
+    log_storage_dir: str = "prompts_log"
+    log_storage_fsync: bool = False
+    log_compact_interval: float = 60.0 # seconds, 0 disables background compaction
+    log_compact_ratio: float = 0.5 # dead bytes / log size that triggers compaction
+    snapshot_path: str = "promptlib.snapshot"
     log_level: str = "INFO"
+    template_cache_size: int = 512
+    usage_write_mode: str = "buffered" # sync, buffered, journal
+    usage_flush_interval: float = 5.0
+    usage_flush_threshold: int = 1000
+    usage_journal_path: str = "promptlib.usage.journal"
+    usage_journal_fsync: bool = False
+    dedupe_index_path: str = "promptlib.dedupe.npz"
+    dedupe_threshold: float = 0.8
+    embedding_dtype: str = "float32" # float32, float16
+    embedding_cache_dir: str = ".cache/embeddings"
+    embedding_cache_max_bytes: int = 536870912 # bytes of packed vectors kept on disk
+    embedding_cache_memory_items: int = 4096
+    embedding_backend: str = "sentence-transformers" # sentence-transformers, hashing (no torch, deterministic)
+    embedding_model: str = "all-MiniLM-L6-v2" # sentence-transformers only
+    embedding_dimension: int = 384 # hashing only; sentence-transformers models fix their own
+    embedding_batch_size: int = 64
+    embedding_workers: int = 0 # > 1 encodes large batches on that many CPU processes
+    daemon_host: str = "127.0.0.1"
+    daemon_port: int = 0 # 0 picks a free port; clients find it through daemon_state_path
+    daemon_state_path: str = "promptlib.daemon.json" # where a running `serve` advertises its address
+    daemon_routing: bool = True # CLI commands use a running daemon over the same library
+    daemon_timeout: float = 60.0 # seconds
 
     class Config:
         env_prefix = "PROMPTLIB_"
 
+    def sqlite_pragmas(self) -> Dict[str, Any]:
+        if self.sqlite_profile != "throughput":
+            return {}
+        return {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "mmap_size": self.sqlite_mmap_size,
+            "cache_size": self.sqlite_cache_size,
+            "temp_store": self.sqlite_temp_store,
+            "busy_timeout": self.sqlite_busy_timeout
+        }
+
 settings = Settings()
@@ -1,29 +1,54 @@
-import json
-import os
-import hashlib
+import threading
+from collections import OrderedDict
 from typing import Any, Optional, Dict
 
-class DiskCache:
-    def __init__(self, cache_dir: str = ".cache"):
-        self.cache_dir = cache_dir
-        os.makedirs(cache_dir, exist_ok=True)
+class LRUCache:
+    """Thread-safe, size-bounded in-memory LRU with hit/miss counters."""
 
-    def _get_path(self, key: str) -> str:
-        key_hash = hashlib.sha256(key.encode()).hexdigest()
-        return os.path.join(self.cache_dir, f"{key_hash}.json")
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-    def get(self, key: str) -> Optional[Any]:
-        path = self._get_path(key)
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                return json.load(f)
-        return None
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
 
-    def set(self, key: str, value: Any):
-        path = self._get_path(key)
-        with open(path, "w") as f:
-            json.dump(value, f)
+    def set(self, key: Any, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
     def clear(self):
-        for f in os.listdir(self.cache_dir):
-            os.remove(os.path.join(self.cache_dir, f))
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize
+        }
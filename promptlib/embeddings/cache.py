@@ -0,0 +1,176 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from promptlib.core.caching import LRUCache
+from promptlib.storage.embeddings import Vector, pack_vector, unpack_vector
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    key BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (model, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_embedding_cache_last_access ON embedding_cache (last_access);
+"""
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode()).digest()
+
+class EmbeddingCache:
+    """Size-capped cache of text embeddings, keyed by (model, sha256 of the text).
+
+    Vectors are packed float32 BLOBs in a single SQLite file, fronted by an
+    in-memory LRU of decoded arrays. Once the stored vectors exceed max_bytes
+    the least recently read ones are evicted down to 90% of the budget. Reads
+    only note their access time in memory; the times are written in the same
+    transaction as the next store, so lookups never write to the database.
+    The budget is checked against the file's own total inside that
+    transaction, so several processes sharing the file respect it together.
+    """
+
+    # Pending access times are written out early once this many keys are waiting
+    MAX_PENDING_ACCESS = 4096
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, memory_items: int = 4096):
+        self.path = path
+        self.max_bytes = max_bytes
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._memory = LRUCache(memory_items)
+        self._accessed: Dict[Tuple[str, bytes], float] = {} # (model, key) -> last read, not yet written
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors for `texts` in order, None where there is none. Arrays are read-only."""
+        keys = [text_key(t) for t in texts]
+        found: List[Optional[np.ndarray]] = [self._memory.get((model, k)) for k in keys]
+        pending: Dict[bytes, List[int]] = {}
+        for i, vector in enumerate(found):
+            if vector is None:
+                pending.setdefault(keys[i], []).append(i)
+        with self._lock:
+            self.memory_hits += len(keys) - sum(len(v) for v in pending.values())
+            if pending:
+                rows = []
+                lookup = list(pending)
+                for start in range(0, len(lookup), 500):
+                    chunk = lookup[start:start + 500]
+                    rows += self._conn.execute(
+                        f"SELECT key, vector FROM embedding_cache WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                        [model, *chunk]).fetchall()
+                for key, blob in rows:
+                    vector = unpack_vector(blob)
+                    self._memory.set((model, key), vector)
+                    for i in pending.pop(key):
+                        found[i] = vector
+                        self.disk_hits += 1
+                self.misses += sum(len(v) for v in pending.values())
+            now = time.time()
+            for key, vector in zip(keys, found):
+                if vector is not None:
+                    self._accessed[(model, key)] = now
+            if len(self._accessed) > self.MAX_PENDING_ACCESS:
+                with self._conn:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    self._write_access_times()
+        return found
+
+    def set(self, model: str, text: str, vector: Vector):
+        self.set_many(model, {text: vector})
+
+    def set_many(self, model: str, vectors: Dict[str, Vector]):
+        """Store vectors for several texts in one transaction, then enforce the byte budget."""
+        now = time.time()
+        rows = []
+        for text, vector in vectors.items():
+            key = text_key(text)
+            blob = pack_vector(vector)
+            self._memory.set((model, key), unpack_vector(blob))
+            rows.append((model, key, blob, len(blob), now))
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                # IMMEDIATE takes the write lock up front, so the total read below
+                # includes every other process's stores and evictions
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._write_access_times()
+                self._conn.executemany("INSERT OR REPLACE INTO embedding_cache (model, key, vector, size, last_access) VALUES (?, ?, ?, ?, ?)", rows)
+                total = self._total_bytes()
+                if total > self.max_bytes:
+                    self._evict(total, int(self.max_bytes * 0.9))
+
+    def _write_access_times(self):
+        # Called with self._lock held, inside a write transaction
+        if self._accessed:
+            self._conn.executemany("UPDATE embedding_cache SET last_access = MAX(last_access, ?) WHERE model = ? AND key = ?",
+                                   [(t, m, k) for (m, k), t in self._accessed.items()])
+            self._accessed.clear()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+
+    def _evict(self, total: int, target: int):
+        # Called with self._lock held, inside a write transaction
+        while total > target:
+            victims = self._conn.execute(
+                "SELECT model, key, size FROM embedding_cache ORDER BY last_access LIMIT 256").fetchall()
+            if not victims:
+                break
+            chosen = []
+            for m, k, size in victims:
+                chosen.append((m, k))
+                self._memory.pop((m, k))
+                total -= size
+                if total <= target:
+                    break
+            self._conn.executemany("DELETE FROM embedding_cache WHERE model = ? AND key = ?", chosen)
+            self.evictions += len(chosen)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            entries = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes
+            }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._memory.clear()
+            self._accessed.clear()
+            self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._write_access_times()
+            self._conn.close()
@@ -0,0 +1,162 @@
+import atexit
+import hashlib
+import inspect
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from typing import Any, List
+import numpy as np
+from promptlib.core.exceptions import ValidationError
+
+class Embedder(ABC):
+    """Turns texts into fixed-size vectors.
+
+    `name` identifies the backend and its configuration. It keys the embedding
+    cache, the vectors stored in the repository and the vector index metadata,
+    so two embedders must only share a name if they produce the same vectors.
+    """
+
+    backend: str = ""
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        pass
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """A (len(texts), dimension) float32 array, rows in input order."""
+        pass
+
+    def close(self):
+        pass
+
+class SentenceTransformerEmbedder(Embedder):
+    """A sentence-transformers model. torch is imported when this is constructed.
+
+    workers > 1 encodes batches of at least pool_min_texts on a pool of CPU
+    processes, started on first use.
+    """
+
+    backend = "sentence-transformers"
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", workers: int = 0, pool_min_texts: int = 256):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.workers = workers
+        self.pool_min_texts = pool_min_texts
+        self._pool = None
+
+    @property
+    def name(self) -> str:
+        # Bare model names keep vectors stored before embedders were pluggable valid
+        return self.model_name
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        if self.workers > 1 and len(texts) >= self.pool_min_texts:
+            pool = self._start_pool()
+            chunk_size = max(batch_size, -(-len(texts) // self.workers))
+            if "pool" in inspect.signature(self.model.encode).parameters:
+                return self.model.encode(texts, batch_size=batch_size, pool=pool, chunk_size=chunk_size)
+            # sentence-transformers < 5 only encodes on a pool through encode_multi_process
+            return self.model.encode_multi_process(texts, pool, batch_size=batch_size, chunk_size=chunk_size)
+        return self.model.encode(texts, batch_size=batch_size)
+
+    def _start_pool(self):
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.workers)
+            atexit.register(self.close)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+            atexit.unregister(self.close)
+
+_TOKEN = re.compile(r"\w+")
+
+@lru_cache(maxsize=65536)
+def _bucket(feature: str, dimension: int) -> int:
+    # Signed bucket: Python's hash() is salted per process, so use a stable digest
+    h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+    index = (h >> 1) % dimension
+    return -index - 1 if h & 1 else index + 1
+
+class HashingEmbedder(Embedder):
+    """Feature-hashing embedder: no model, no torch, identical output on every machine.
+
+    Word n-grams and character n-grams of each word are hashed into `dimension`
+    signed buckets, weighted by 1 + log(count) and L2-normalised. Similarity
+    is lexical (shared words, stems and typos score close), not semantic in the
+    transformer sense, which suits edge nodes and offline tests.
+    """
+
+    backend = "hashing"
+
+    def __init__(self, dimension: int = 384, word_ngrams: int = 2, char_ngrams: int = 3):
+        if dimension < 1 or word_ngrams < 1 or char_ngrams < 0:
+            raise ValidationError("Hashing embedder needs dimension >= 1, word_ngrams >= 1 and char_ngrams >= 0")
+        self._dimension = dimension
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = char_ngrams
+
+    @property
+    def name(self) -> str:
+        return f"hashing-d{self._dimension}-w{self.word_ngrams}-c{self.char_ngrams}"
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _features(self, text: str) -> Counter:
+        words = _TOKEN.findall(text.lower())
+        features = Counter()
+        for n in range(1, self.word_ngrams + 1):
+            features.update(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        if self.char_ngrams:
+            n = self.char_ngrams
+            for word in words:
+                padded = f"<{word}>"
+                features.update("#" + padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        # Sum every (row, bucket, weight) of the batch with one bincount
+        rows, buckets, counts = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                rows.append(row)
+                buckets.append(_bucket(feature, self._dimension))
+                counts.append(count)
+        buckets = np.asarray(buckets, dtype=np.int64)
+        weights = 1.0 + np.log(np.asarray(counts, dtype="float64"))
+        flat = np.asarray(rows, dtype=np.int64) * self._dimension + np.abs(buckets) - 1
+        size = len(texts) * self._dimension
+        out = np.bincount(flat, weights=np.where(buckets > 0, weights, -weights), minlength=size)
+        out = out.astype("float32").reshape(len(texts), self._dimension)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+EMBEDDING_BACKENDS = ("sentence-transformers", "hashing")
+
+def create_embedder(backend: str = "sentence-transformers", model_name: str = "all-MiniLM-L6-v2",
+                    dimension: int = 384, **options: Any) -> Embedder:
+    """Build the embedder for a backend name from Settings.embedding_backend."""
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbedder(model_name, **options)
+    if backend == "hashing":
+        return HashingEmbedder(dimension)
+    raise ValidationError(f"Unknown embedding backend: {backend}. Choose from {', '.join(EMBEDDING_BACKENDS)}")
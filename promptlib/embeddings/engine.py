@@ -1,32 +1,69 @@
 from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
 import numpy as np
-import hashlib
-from promptlib.core.caching import DiskCache
+import os
+from promptlib.embeddings.cache import EmbeddingCache
+from promptlib.embeddings.embedders import Embedder, create_embedder
 
 class EmbeddingEngine:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", cache_dir: str = ".cache/embeddings"):
-        self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
-        self.cache = DiskCache(cache_dir)
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", cache_dir: str = ".cache/embeddings",
+                 cache_max_bytes: int = 512 * 1024 * 1024, cache_memory_items: int = 4096,
+                 batch_size: int = 64, workers: int = 0, pool_min_texts: int = 256,
+                 backend: str = "sentence-transformers", dimension: int = 384, embedder: Optional[Embedder] = None):
+        # model_name and workers only apply to sentence-transformers, dimension only to hashing
+        if embedder is None:
+            options = {"workers": workers, "pool_min_texts": pool_min_texts} if backend == "sentence-transformers" else {}
+            embedder = create_embedder(backend, model_name, dimension, **options)
+        self.embedder = embedder
+        self.model_name = embedder.name
+        self.cache = EmbeddingCache(os.path.join(cache_dir, "embeddings.sqlite3"), max_bytes=cache_max_bytes,
+                                    memory_items=cache_memory_items)
+        self.batch_size = batch_size
 
-    def generate(self, text: str) -> List[float]:
-        # Simple content-based caching
-        cached = self.cache.get(text)
-        if cached:
-            return cached
+    @property
+    def backend(self) -> str:
+        return self.embedder.backend
+
+    @property
+    def model(self):
+        """The underlying model object, if the embedder has one."""
+        return getattr(self.embedder, "model", None)
 
-        embedding = self.model.encode(text)
-        embedding_list = embedding.tolist()
-        self.cache.set(text, embedding_list)
-        return embedding_list
+    def generate(self, text: str) -> List[float]:
+        return self.generate_batch([text])[0]
 
     def generate_batch(self, texts: List[str]) -> List[List[float]]:
-        embeddings = self.model.encode(texts)
-        return embeddings.tolist()
+        """Embed `texts` in order, encoding only what the cache does not already hold.
+
+        Keys include the model, so switching models never serves another model's vector.
+        """
+        unique = list(dict.fromkeys(texts))
+        vectors: Dict[str, np.ndarray] = {}
+        misses = []
+        for text, cached in zip(unique, self.cache.get_many(self.model_name, unique)):
+            if cached is None:
+                misses.append(text)
+            else:
+                vectors[text] = cached
+
+        if misses:
+            # Similar lengths end up in the same batch, so less padding is encoded
+            misses.sort(key=len, reverse=True)
+            encoded = dict(zip(misses, self._encode(misses)))
+            self.cache.set_many(self.model_name, encoded)
+            vectors.update(encoded)
+        return [vectors[text].tolist() for text in texts]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.embedder.encode(texts, batch_size=self.batch_size)
+
+    def close(self):
+        self.embedder.close()
 
     def get_dimension(self) -> int:
-        return self.model.get_sentence_embedding_dimension()
+        return self.embedder.dimension
 
     def clear_cache(self):
         self.cache.clear()
+
+    def cache_info(self) -> Dict[str, float]:
+        return self.cache.stats()
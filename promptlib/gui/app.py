@@ -12,12 +12,13 @@ from promptlib.storage.sqlite import SQLiteRepository
 from promptlib.config.settings import settings
 from promptlib.services.prompt_service import PromptService
 from promptlib.services.rendering import RenderingService
+from promptlib.utils.dedupe import NearDuplicateIndex
 
 def main():
     # Initialize Core Services (similar to CLI)
-    repo = SQLiteRepository(settings.sqlite_url)
-    rendering_service = RenderingService()
-    prompt_service = PromptService(repo, rendering_service)
+    repo = SQLiteRepository(settings.sqlite_url, pragmas=settings.sqlite_pragmas(), pool_size=settings.sqlite_pool_size)
+    rendering_service = RenderingService(settings.template_cache_size)
+    prompt_service = PromptService(repo, rendering_service, duplicate_index=lambda: NearDuplicateIndex(settings.dedupe_index_path))
 
     app = QApplication(sys.argv)
     # Set overall layout direction to RTL for Arabic
@@ -45,10 +45,10 @@ class PromptListWidget(QWidget):
 
     def refresh_list(self):
         self.list_widget.clear()
-        prompts = self.prompt_service.list_prompts()
-        for p in prompts:
+        # Only the listed columns are loaded; the full prompt is fetched on click
+        for p in self.prompt_service.iter_summaries():
             item = QListWidgetItem(f"{p.name} (v{p.version})")
-            item.setData(Qt.ItemDataRole.UserRole, p)
+            item.setData(Qt.ItemDataRole.UserRole, p.id)
             self.list_widget.addItem(item)
 
     def search_prompts(self, text):
@@ -57,12 +57,12 @@ class PromptListWidget(QWidget):
             return
 
         self.list_widget.clear()
-        results = self.prompt_service.search_prompts(text)
+        results = self.prompt_service.search_prompts(text, k=100)
         for p in results:
             item = QListWidgetItem(f"{p.name} (v{p.version})")
-            item.setData(Qt.ItemDataRole.UserRole, p)
+            item.setData(Qt.ItemDataRole.UserRole, p.id)
             self.list_widget.addItem(item)
 
     def on_item_clicked(self, item):
-        prompt = item.data(Qt.ItemDataRole.UserRole)
+        prompt = self.prompt_service.get_prompt(item.data(Qt.ItemDataRole.UserRole))
         self.prompt_selected.emit(prompt)
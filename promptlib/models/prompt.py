@@ -26,3 +26,14 @@ class Prompt(BaseModel):
     content_hash: Optional[str] = None
     embedding_vector: Optional[List[float]] = None
     hash_signature: Optional[str] = None # For backward compatibility or integrity
+
+class PromptSummary(BaseModel):
+    """Listing projection of a Prompt: the columns shown in lists, plus the checksum for change detection."""
+    id: UUID
+    name: str
+    version: str = "1.0.0"
+    category: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    usage_count: int = 0
+    updated_at: Optional[datetime] = None
+    checksum: Optional[str] = None
@@ -0,0 +1,281 @@
+import hmac
+import http.client
+import json
+import logging
+import os
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+from uuid import UUID
+from promptlib.core.exceptions import PromptLibError, PromptNotFoundError, ValidationError, StorageError, WorkflowError
+
+if TYPE_CHECKING:
+    # Clients only need the stdlib half of this module
+    from promptlib.services.prompt_service import PromptService
+    from promptlib.services.workflow_service import UltimateWorkflowService
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ("render", "render_many", "search", "list", "workflow_run")
+# Write commands still run in their own process, so the daemon's store must
+# tolerate other writers: SQLite does. The file and log backends keep
+# per-process manifests and offsets, and snapshots are only reread on reopen.
+SERVE_BACKENDS = ("sqlite",)
+
+TOKEN_HEADER = "X-PromptLib-Token"
+# Browsers send the page's own host name, so anything else is a rebinding or cross-site request
+_LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# Errors are sent by class name and raised again on the client side
+_ERRORS = {cls.__name__: cls for cls in (PromptLibError, PromptNotFoundError, ValidationError, StorageError, WorkflowError)}
+
+def library_key(settings: Any) -> Dict[str, str]:
+    """Identifies the library a process serves, so clients only route to a daemon over the same data."""
+    locations = {
+        "sqlite": settings.sqlite_url,
+        "json": os.path.abspath(settings.json_dir),
+        "yaml": os.path.abspath(settings.yaml_dir),
+        "log": os.path.abspath(settings.log_storage_dir),
+        "snapshot": os.path.abspath(settings.snapshot_path),
+    }
+    location = locations.get(settings.storage_backend, "")
+    if location.startswith("sqlite:///") and not location.startswith("sqlite:////"):
+        location = "sqlite:///" + os.path.abspath(location[len("sqlite:///"):])
+    return {"backend": settings.storage_backend, "location": location}
+
+class PromptDaemon:
+    """Serves render, search, list and workflow runs from one warm PromptService.
+
+    The service, its repository connections, compiled templates, the embedding
+    model and the vector index (loaded up front, or by the first semantic
+    search) stay warm for the life of the process. Requests are JSON over a
+    local HTTP socket, handled on one thread per connection; the model and
+    index are shared, so semantic searches are serialized.
+
+    While running, the daemon advertises its address and a random access token
+    in `state_path` (readable by its owner only), which clients read through
+    `find_daemon`. Requests without that token, with a non-JSON body or with a
+    Host other than this machine are refused, so web pages cannot drive it. Only serve SERVE_BACKENDS libraries:
+    create, edit, delete and the other write commands keep running locally.
+    """
+
+    def __init__(self,
+                 service: "PromptService",
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 state_path: Optional[str] = None,
+                 library: Optional[Dict[str, str]] = None,
+                 load_semantic: Optional[Callable[[], None]] = None,
+                 workflow_service: Optional[Callable[[], "UltimateWorkflowService"]] = None):
+        self.service = service
+        self.state_path = os.path.abspath(state_path) if state_path else None
+        self.library = library or {}
+        self.token = secrets.token_urlsafe(32)
+        self._load_semantic = load_semantic
+        self._workflow_service = workflow_service
+        self._semantic_lock = threading.Lock()
+        self._index_mtime = self._index_file_mtime()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _handler(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _allowed(self, needs_body: bool) -> bool:
+                host = (self.headers.get("Host") or "").rsplit(":", 1)[0].strip("[]")
+                if host not in _LOCAL_HOSTS and host != daemon.host:
+                    self._reply(403, {"error": "Requests must address the daemon by a local host name", "type": "PromptLibError"})
+                    return False
+                if not hmac.compare_digest(self.headers.get(TOKEN_HEADER) or "", daemon.token):
+                    self._reply(401, {"error": "Missing or invalid daemon token", "type": "PromptLibError"})
+                    return False
+                content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+                if needs_body and content_type != "application/json":
+                    self._reply(415, {"error": "Request bodies must be application/json", "type": "PromptLibError"})
+                    return False
+                return True
+
+            def do_GET(self):
+                if not self._allowed(needs_body=False):
+                    return
+                if self.path == "/v1/health":
+                    self._reply(200, {"result": {"pid": os.getpid(), **daemon.library}})
+                else:
+                    self._reply(404, {"error": f"Unknown path {self.path}", "type": "PromptLibError"})
+
+            def do_POST(self):
+                if not self._allowed(needs_body=True):
+                    return
+                op = self.path[len("/v1/"):] if self.path.startswith("/v1/") else None
+                if op not in OPERATIONS:
+                    self._reply(404, {"error": f"Unknown operation {op or self.path}", "type": "PromptLibError"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    params = json.loads(self.rfile.read(length) or b"{}")
+                    self._reply(200, {"result": daemon.dispatch(op, params)})
+                except PromptNotFoundError as e:
+                    self._reply(404, {"error": str(e), "type": type(e).__name__})
+                except Exception as e:
+                    status = 400 if isinstance(e, (PromptLibError, ValueError, TypeError)) else 500
+                    if status == 500:
+                        logger.exception("Daemon request %s failed", op)
+                    self._reply(status, {"error": str(e), "type": type(e).__name__})
+
+            def _reply(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug("%s - %s", self.address_string(), format % args)
+
+        return Handler
+
+    def dispatch(self, op: str, params: Dict[str, Any]) -> Any:
+        svc = self.service
+        if op == "render":
+            return svc.render_prompt(UUID(params["prompt_id"]), params.get("variables") or {})
+        if op == "render_many":
+            return list(svc.render_many(UUID(params["prompt_id"]), params.get("variable_sets") or []))
+        if op == "search":
+            semantic = bool(params.get("semantic"))
+            query, k = params["query"], params.get("k", 5)
+            if semantic:
+                with self._semantic_lock:
+                    self._ensure_semantic()
+                    results = svc.search_prompts_scored(query, semantic=True, k=k)
+            else:
+                results = svc.search_prompts_scored(query, k=k)
+            return [{"prompt": p.model_dump(mode="json"), "score": score} for p, score in results]
+        if op == "list":
+            after = params.get("after_id")
+            summaries = svc.iter_summaries(category=params.get("category"), tags=params.get("tags"),
+                                           tag_mode=params.get("tag_mode", "all"), order_by=params.get("order_by", "name"),
+                                           after_id=UUID(after) if after else None, limit=params.get("limit"),
+                                           offset=params.get("offset", 0))
+            return [s.model_dump(mode="json") for s in summaries]
+        if op == "workflow_run":
+            if self._workflow_service is None:
+                raise WorkflowError("This daemon does not run workflows")
+            return self._workflow_service().run_workflow(params["workflow_id"], params.get("context") or {})
+        raise PromptLibError(f"Unknown operation {op}")
+
+    def _ensure_semantic(self):
+        # Called with _semantic_lock held. Other processes may rewrite the index
+        # file (create, import, reindex), so reload it whenever it changes on disk.
+        if self.service.embedding_engine is None and self._load_semantic:
+            self._load_semantic()
+            self._index_mtime = self._index_file_mtime()
+        mtime = self._index_file_mtime()
+        if mtime is not None and mtime != self._index_mtime:
+            self.service.vector_index.load(self.service.vector_index.index_path)
+            self._index_mtime = mtime
+
+    def _index_file_mtime(self) -> Optional[int]:
+        index = self.service.vector_index
+        if index is None or not index.index_path:
+            return None
+        try:
+            return os.stat(index.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _write_state(self):
+        if not self.state_path:
+            return
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        # The token is the only credential, so the file is private from the moment it exists
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"host": self.host, "port": self.port, "pid": os.getpid(), "token": self.token, "library": self.library}, f)
+        os.replace(tmp, self.state_path)
+
+    def _clear_state(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path) as f:
+                owner = json.load(f).get("pid")
+        except (OSError, ValueError):
+            return
+        if owner == os.getpid():
+            os.remove(self.state_path)
+
+    def serve_forever(self):
+        self._write_state()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self._clear_state()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+class DaemonClient:
+    """Calls a running PromptDaemon.
+
+    ConnectionRefusedError means the request never left this process. Any other
+    OSError happened after it was sent, so the daemon may have carried it out.
+    """
+
+    def __init__(self, host: str, port: int, token: str, timeout: float = 60.0):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[str] = None) -> Any:
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.connect()
+            headers = {TOKEN_HEADER: self.token}
+            if body is not None:
+                headers["Content-Type"] = "application/json"
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = json.loads(response.read() or b"{}")
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise _ERRORS.get(payload.get("type"), PromptLibError)(payload.get("error", f"Daemon returned HTTP {response.status}"))
+        return payload["result"]
+
+    def call(self, op: str, **params) -> Any:
+        return self._request("POST", f"/v1/{op}", json.dumps(params))
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/v1/health")
+
+def find_daemon(state_path: str, library: Dict[str, str], timeout: float = 60.0) -> Optional[DaemonClient]:
+    """Client for the daemon advertised in `state_path`, if it serves `library` and its process is alive."""
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("library") != library:
+        return None
+    try:
+        os.kill(state["pid"], 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass # alive, but owned by another user
+    except (KeyError, TypeError):
+        return None
+    try:
+        return DaemonClient(state["host"], state["port"], state["token"], timeout=timeout)
+    except KeyError:
+        return None # Written by an older daemon without a token
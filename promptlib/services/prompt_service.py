@@ -1,41 +1,104 @@
 import hashlib
 import difflib
-from typing import List, Optional, Dict, Any
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, List, Optional, Dict, Any, Iterable, Iterator, Tuple, Union
 from uuid import UUID
 from datetime import datetime
-from promptlib.models.prompt import Prompt
+import numpy as np
+from promptlib.models.prompt import Prompt, PromptSummary
 from promptlib.models.version import PromptVersion
 from promptlib.storage.base import BaseRepository
+from promptlib.storage.stats import TAG_MODES
+from promptlib.storage.paging import parse_order
+from promptlib.storage.embeddings import DEFAULT_MODEL
 from promptlib.services.rendering import RenderingService
 from promptlib.utils.linter import PromptLinter, LinterResult
-from promptlib.embeddings.engine import EmbeddingEngine
-from promptlib.vector_index.faiss_index import VectorIndex
+from promptlib.utils.dedupe import NearDuplicateIndex
 from promptlib.optimization.optimizer import AutomatedOptimizer
+from promptlib.services.usage_buffer import UsageBuffer
 from promptlib.core.exceptions import PromptNotFoundError, ValidationError
 
+if TYPE_CHECKING:
+    # Annotations only: importing these pulls in torch and faiss
+    from promptlib.embeddings.engine import EmbeddingEngine
+    from promptlib.vector_index.faiss_index import VectorIndex
+
+# Reciprocal-rank fusion damping constant (Cormack et al.)
+RRF_K = 60
+
+def _chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 class PromptService:
     def __init__(self,
                  repository: BaseRepository,
                  rendering_service: RenderingService,
-                 embedding_engine: EmbeddingEngine = None,
-                 vector_index: VectorIndex = None,
+                 embedding_engine: "EmbeddingEngine" = None,
+                 vector_index: "VectorIndex" = None,
                  linter: PromptLinter = None,
-                 optimizer: AutomatedOptimizer = None):
+                 optimizer: AutomatedOptimizer = None,
+                 usage_buffer: UsageBuffer = None,
+                 duplicate_index: Union[NearDuplicateIndex, Callable[[], NearDuplicateIndex]] = None,
+                 embedding_dtype: str = "float32"):
         self.repository = repository
         self.rendering_service = rendering_service
         self.embedding_engine = embedding_engine
         self.vector_index = vector_index
         self.linter = linter or PromptLinter()
         self.optimizer = optimizer or AutomatedOptimizer()
+        self.usage_buffer = usage_buffer
+        # An index, or a factory called the first time lint or dedupe need one
+        self._duplicate_index = duplicate_index
+        self.embedding_dtype = embedding_dtype
+        self._prefetched = threading.local()
+
+    @property
+    def duplicate_index(self) -> Optional[NearDuplicateIndex]:
+        if callable(self._duplicate_index):
+            self._duplicate_index = self._duplicate_index()
+        return self._duplicate_index
+
+    def _loaded_duplicate_index(self) -> Optional[NearDuplicateIndex]:
+        # Writes never load the index; ones it misses are re-signed by the next sync
+        return None if callable(self._duplicate_index) else self._duplicate_index
 
     def _calculate_checksum(self, content: str) -> str:
         return hashlib.sha256(content.encode()).hexdigest()
 
-    def create_prompt(self, name: str, content: str, **kwargs) -> Prompt:
+    def _embedding_model(self) -> str:
+        model = getattr(self.embedding_engine, "model_name", None)
+        return model if isinstance(model, str) else DEFAULT_MODEL
+
+    def _store_embeddings(self, prompts: List[Prompt], vectors: List[List[float]]) -> None:
+        self.repository.update_embeddings(
+            {p.id: v for p, v in zip(prompts, vectors)}, self._embedding_model(),
+            {p.id: p.content_hash for p in prompts}, self.embedding_dtype
+        )
+
+    def _load_prompt(self, prompt_id: UUID) -> Optional[Prompt]:
+        prefetched = getattr(self._prefetched, "prompts", None)
+        if prefetched and prompt_id in prefetched:
+            return prefetched[prompt_id]
+        return self.repository.get_by_id(prompt_id)
+
+    def _record_usage(self, prompt_id: UUID, count: int = 1) -> None:
+        if self.usage_buffer:
+            self.usage_buffer.record(prompt_id, count)
+        else:
+            self.repository.update_usage(prompt_id, count)
+
+    def _build_prompt(self, name: str, content: str, **kwargs) -> Prompt:
         checksum = self._calculate_checksum(content)
         variables = self.rendering_service.extract_variables(content)
 
-        prompt = Prompt(
+        return Prompt(
             name=name,
             content=content,
             checksum=checksum,
@@ -44,26 +107,75 @@ class PromptService:
             **kwargs
         )
 
-        if self.embedding_engine:
-            prompt.embedding_vector = self.embedding_engine.generate(content)
-
-        self.repository.save(prompt)
-
-        if self.vector_index and prompt.embedding_vector:
-            self.vector_index.add(str(prompt.id), prompt.embedding_vector)
-
-        # Save initial version
-        version = PromptVersion(
+    def _initial_version(self, prompt: Prompt) -> PromptVersion:
+        return PromptVersion(
             prompt_id=prompt.id,
             version=prompt.version,
             content=prompt.content,
-            checksum=checksum,
+            checksum=prompt.checksum,
             change_log="Initial version"
         )
-        self.repository.save_version(version)
+
+    def create_prompt(self, name: str, content: str, **kwargs) -> Prompt:
+        prompt = self._build_prompt(name, content, **kwargs)
+        vector = self.embedding_engine.generate(content) if self.embedding_engine else None
+
+        self.repository.save(prompt)
+
+        if vector:
+            self._store_embeddings([prompt], [vector])
+            if self.vector_index:
+                self.vector_index.add(str(prompt.id), vector, prompt.content_hash)
+
+        # Save initial version
+        self.repository.save_version(self._initial_version(prompt))
+
+        duplicate_index = self._loaded_duplicate_index()
+        if duplicate_index is not None:
+            duplicate_index.add(str(prompt.id), prompt.content, prompt.checksum)
 
         return prompt
 
+    def create_prompts_bulk(self, records: Iterable[Dict[str, Any]], chunk_size: int = 500) -> int:
+        """Create many prompts from dicts with at least 'name' and 'content'.
+
+        Records are consumed lazily; each chunk is embedded with one batched forward
+        pass and written (prompts, initial versions, FTS rows) in one transaction.
+        All vectors are added to the index in a single call at the end.
+        Returns the number of prompts created.
+        """
+        created = 0
+        index_ids: List[str] = []
+        index_vectors: List[List[float]] = []
+        index_hashes: List[str] = []
+        duplicate_index = self._loaded_duplicate_index()
+
+        try:
+            for chunk in _chunked(records, chunk_size):
+                prompts = []
+                for record in chunk:
+                    data = dict(record)
+                    prompts.append(self._build_prompt(data.pop("name"), data.pop("content"), **data))
+
+                vectors = self.embedding_engine.generate_batch([p.content for p in prompts]) if self.embedding_engine else []
+
+                self.repository.save_bulk(prompts, [self._initial_version(p) for p in prompts])
+                created += len(prompts)
+                if vectors:
+                    self._store_embeddings(prompts, vectors)
+                    index_ids.extend(str(p.id) for p in prompts)
+                    index_vectors.extend(vectors)
+                    index_hashes.extend(p.content_hash for p in prompts)
+                if duplicate_index is not None:
+                    for p in prompts:
+                        duplicate_index.add(str(p.id), p.content, p.checksum)
+        finally:
+            # Index whatever was committed, even if a later chunk failed
+            if self.vector_index and index_ids:
+                self.vector_index.add_batch(index_ids, index_vectors, index_hashes)
+
+        return created
+
     def update_prompt(self, prompt_id: UUID, content: Optional[str] = None, **kwargs) -> Prompt:
         prompt = self.repository.get_by_id(prompt_id)
         if not prompt:
@@ -75,8 +187,8 @@ class PromptService:
             prompt.checksum = self._calculate_checksum(content)
             prompt.content_hash = prompt.checksum
             prompt.variables = self.rendering_service.extract_variables(content)
-            if self.embedding_engine:
-                prompt.embedding_vector = self.embedding_engine.generate(content)
+            # Without an engine the stored vector's content_hash no longer matches; reindex will rebuild it
+            prompt.embedding_vector = None
             content_changed = True
 
         for key, value in kwargs.items():
@@ -102,89 +214,229 @@ class PromptService:
             self.repository.save_version(version)
 
         self.repository.save(prompt)
+        if content_changed and self.embedding_engine:
+            self._store_embeddings([prompt], [self.embedding_engine.generate(prompt.content)])
+        duplicate_index = self._loaded_duplicate_index()
+        if content_changed and duplicate_index is not None:
+            duplicate_index.add(str(prompt.id), prompt.content, prompt.checksum)
         return prompt
 
     def render_prompt(self, prompt_id: UUID, variables: Dict[str, Any]) -> str:
-        prompt = self.repository.get_by_id(prompt_id)
+        prompt = self._load_prompt(prompt_id)
         if not prompt:
             raise PromptNotFoundError(f"Prompt {prompt_id} not found")
 
+        cache_key = prompt.checksum or prompt.content_hash
         final_vars = self.rendering_service.validate_variables(
             prompt.content,
             variables,
-            getattr(prompt, "variable_definitions", [])
+            getattr(prompt, "variable_definitions", []),
+            cache_key=cache_key
         )
-        rendered = self.rendering_service.render(prompt.content, final_vars)
+        rendered = self.rendering_service.render(prompt.content, final_vars, cache_key=cache_key)
 
-        self.repository.update_usage(prompt_id)
+        self._record_usage(prompt_id)
         return rendered
 
+    def render_many(self, prompt_id: UUID, variable_sets: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Render one prompt against many variable sets, yielding outputs in input order.
+
+        The prompt is fetched and compiled once, and usage is recorded with a single
+        increment for all rendered rows once the stream is exhausted or closed.
+        Rows render sequentially: Jinja rendering is pure Python and holds the GIL,
+        so a thread pool only adds overhead.
+        """
+        prompt = self.get_prompt(prompt_id)
+        cache_key = prompt.checksum or prompt.content_hash
+        definitions = getattr(prompt, "variable_definitions", [])
+        template, _ = self.rendering_service.compile(prompt.content, cache_key)
+
+        rendered_count = 0
+        try:
+            for index, variables in enumerate(variable_sets):
+                try:
+                    final_vars = self.rendering_service.validate_variables(prompt.content, variables, definitions, cache_key=cache_key)
+                    rendered = template.render(**final_vars)
+                except ValidationError as e:
+                    raise ValidationError(f"Row {index}: {e}")
+                except Exception as e:
+                    raise ValidationError(f"Row {index}: Rendering failed: {e}")
+                rendered_count += 1
+                yield rendered
+        finally:
+            if rendered_count:
+                self._record_usage(prompt_id, rendered_count)
+
     def get_prompt(self, prompt_id: UUID) -> Prompt:
-        prompt = self.repository.get_by_id(prompt_id)
+        prompt = self._load_prompt(prompt_id)
         if not prompt:
             raise PromptNotFoundError(f"Prompt {prompt_id} not found")
         return prompt
 
-    def list_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None) -> List[Prompt]:
-        return self.repository.list_all(category, tags)
+    def get_prompts(self, prompt_ids: List[UUID]) -> Dict[UUID, Prompt]:
+        return self.repository.get_by_ids(prompt_ids)
+
+    @contextmanager
+    def prefetch(self, prompt_ids: Iterable[UUID]):
+        """Batch-load prompts once and serve get/render lookups for them from memory
+        for the duration of the block (scoped to the calling thread)."""
+        previous = getattr(self._prefetched, "prompts", None)
+        prompts = dict(previous or {})
+        missing = [pid for pid in dict.fromkeys(prompt_ids) if pid not in prompts]
+        if missing:
+            prompts.update(self.repository.get_by_ids(missing))
+        self._prefetched.prompts = prompts
+        try:
+            yield prompts
+        finally:
+            self._prefetched.prompts = previous
+
+    def list_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Prompt]:
+        self._check_listing(tag_mode)
+        return self.repository.list_all(category, tags, tag_mode)
+
+    def iter_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                     order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[Prompt]:
+        """Stream full prompts one page at a time; pass the last seen id as `after_id` to continue."""
+        self._check_listing(tag_mode, order_by)
+        return self.repository.iter_prompts(category, tags, tag_mode, order_by, after_id, limit, offset)
+
+    def iter_summaries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                       order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[PromptSummary]:
+        """Like iter_prompts, but only the listing columns are read."""
+        self._check_listing(tag_mode, order_by)
+        return self.repository.iter_summaries(category, tags, tag_mode, order_by, after_id, limit, offset)
+
+    def tag_counts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> Dict[str, int]:
+        """Number of prompts carrying each tag, within the given filters."""
+        self._check_listing(tag_mode)
+        return self.repository.get_tag_counts(category, tags, tag_mode)
+
+    @staticmethod
+    def _check_listing(tag_mode: str, order_by: str = "name"):
+        if tag_mode not in TAG_MODES:
+            raise ValidationError(f"Unknown tag mode '{tag_mode}', expected one of {', '.join(TAG_MODES)}")
+        try:
+            parse_order(order_by)
+        except ValueError as e:
+            raise ValidationError(str(e))
 
     def search_prompts(self, query: str, semantic: bool = False, k: int = 5) -> List[Prompt]:
+        return [p for p, _ in self.search_prompts_scored(query, semantic=semantic, k=k)]
+
+    def search_prompts_scored(self, query: str, semantic: bool = False, k: int = 5, semantic_weight: float = 0.5) -> List[Tuple[Prompt, float]]:
+        """Top-k search returning (prompt, score) pairs, best first.
+
+        Keyword-only scores come from the backend (bm25 on SQLite). Hybrid search
+        fuses the keyword and vector rankings with weighted reciprocal-rank fusion.
+        """
         if not semantic or not self.embedding_engine or not self.vector_index:
-            return self.repository.search(query)
+            return self.repository.search_scored(query, limit=k)
 
-        # Hybrid search logic
+        # Look a little deeper than k on each side so fusion can reorder
+        candidates = k * 2
         query_vec = self.embedding_engine.generate(query)
-        matches = self.vector_index.search(query_vec, k=k)
+        matches = self.vector_index.search(query_vec, k=candidates)
+        keyword_hits = self.repository.search_scored(query, limit=candidates)
+
+        scores: Dict[UUID, float] = {}
+        prompts: Dict[UUID, Prompt] = {}
+        for rank, (p, _) in enumerate(keyword_hits):
+            scores[p.id] = scores.get(p.id, 0.0) + (1 - semantic_weight) / (RRF_K + rank + 1)
+            prompts[p.id] = p
 
         semantic_ids = [UUID(m[0]) for m in matches]
-        keyword_results = self.repository.search(query)
-
-        # Batch fetch semantic prompts
-        semantic_prompts = []
-        if semantic_ids:
-            # We need a batch get method, but for now we can use list_all with IDs if supported
-            # or just multiple gets if few.
-            # Let's assume the repository should have a batch get.
-            # For now, let's keep it simple but more efficient than a loop if we can.
-            # Actually, the loop is fine if K is small (e.g. 5-10).
-            for pid in semantic_ids:
-                p = self.repository.get_by_id(pid)
-                if p:
-                    semantic_prompts.append(p)
-
-        combined_ids = set()
-        final_results = []
-
-        for p in keyword_results:
-            if p.id not in combined_ids:
-                final_results.append(p)
-                combined_ids.add(p.id)
-
-        for p in semantic_prompts:
-            if p.id not in combined_ids:
-                final_results.append(p)
-                combined_ids.add(p.id)
-
-        return final_results[:k]
+        missing = [pid for pid in semantic_ids if pid not in prompts]
+        if missing:
+            prompts.update(self.repository.get_by_ids(missing))
+        for rank, pid in enumerate(semantic_ids):
+            if pid in prompts:
+                scores[pid] = scores.get(pid, 0.0) + semantic_weight / (RRF_K + rank + 1)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(prompts[pid], score) for pid, score in ranked]
 
     def delete_prompt(self, prompt_id: UUID) -> None:
         self.repository.delete(prompt_id)
+        duplicate_index = self._loaded_duplicate_index()
+        if duplicate_index is not None:
+            duplicate_index.remove(str(prompt_id))
 
     def get_versions(self, prompt_id: UUID) -> List[PromptVersion]:
         return self.repository.get_versions(prompt_id)
 
-    def reindex(self):
+    def reindex(self, full: bool = False, batch_size: int = 256, checkpoint_every: int = 10) -> Dict[str, int]:
+        """Bring the vector index in line with the library, embedding only what changed.
+
+        Vectors are tracked by the content_hash they were built from. Deleted or
+        edited prompts are dropped from the index, stale prompts are re-embedded in
+        batches and their vectors written back in bulk. The index is saved every
+        checkpoint_every batches, so an interrupted run resumes where it stopped.
+        A different embedding model than the index was built with forces a full rebuild.
+        """
+        stats = {"kept": 0, "removed": 0, "reused": 0, "embedded": 0}
         if not self.vector_index:
-            return
-        self.vector_index.reset()
-        all_prompts = self.repository.list_all()
-        for p in all_prompts:
-            if p.embedding_vector:
-                self.vector_index.add(str(p.id), p.embedding_vector)
-            elif self.embedding_engine:
-                p.embedding_vector = self.embedding_engine.generate(p.content)
-                self.repository.save(p)
-                self.vector_index.add(str(p.id), p.embedding_vector)
+            return stats
+
+        model = self._embedding_model()
+        model_changed = bool(self.vector_index.model and self.vector_index.model != model)
+        if full or model_changed:
+            self.vector_index.reset()
+        self.vector_index.model = model
+        backend = getattr(self.embedding_engine, "backend", None)
+        if isinstance(backend, str):
+            self.vector_index.backend = backend
+
+        # Listing columns are enough to diff; only prompts saved without a checksum are opened
+        hashes = {str(s.id): s.checksum for s in self.repository.iter_summaries()}
+        unhashed = [UUID(pid) for pid, checksum in hashes.items() if not checksum]
+        for chunk in _chunked(unhashed, batch_size):
+            for p in self.repository.get_by_ids(chunk).values():
+                hashes[str(p.id)] = p.content_hash or self._calculate_checksum(p.content)
+
+        # Drop vectors of deleted or edited prompts, and any duplicate entries
+        seen = set()
+        doomed = set()
+        for pid in self.vector_index.ids:
+            if pid in seen or pid not in hashes or self.vector_index.hashes.get(pid) != hashes[pid]:
+                doomed.add(pid)
+            seen.add(pid)
+        stats["removed"] = self.vector_index.remove(doomed)
+
+        indexed = set(self.vector_index.ids)
+        stats["kept"] = len(indexed)
+        pending = [UUID(pid) for pid in hashes if pid not in indexed]
+
+        # Stored vectors for this model are reused when built from the current content
+        stored = {} if full else self.repository.get_embeddings(pending, model)
+        reusable = {
+            pid: vector for pid, (vector, content_hash) in stored.items()
+            if vector.shape[0] == self.vector_index.dimension and content_hash in (None, hashes[str(pid)])
+        }
+        if reusable:
+            self.vector_index.add_batch([str(pid) for pid in reusable], np.stack(list(reusable.values())),
+                                        [hashes[str(pid)] for pid in reusable])
+            stats["reused"] = len(reusable)
+            self.vector_index.save()
+
+        to_embed = [pid for pid in pending if pid not in reusable]
+        if not self.embedding_engine:
+            return stats
+
+        for batch_no, ids in enumerate(_chunked(to_embed, batch_size), start=1):
+            chunk = list(self.repository.get_by_ids(ids).values())
+            if not chunk:
+                continue
+            vectors = self.embedding_engine.generate_batch([p.content for p in chunk])
+            self.repository.update_embeddings({p.id: v for p, v in zip(chunk, vectors)}, model,
+                                              {p.id: hashes[str(p.id)] for p in chunk}, self.embedding_dtype)
+            self.vector_index.add_batch([str(p.id) for p in chunk], vectors, [hashes[str(p.id)] for p in chunk])
+            stats["embedded"] += len(chunk)
+            if batch_no % checkpoint_every == 0:
+                self.vector_index.save()
+
+        self.vector_index.save()
+        return stats
 
     def rollback(self, prompt_id: UUID, version_str: str) -> Prompt:
         versions = self.repository.get_versions(prompt_id)
@@ -194,10 +446,63 @@ class PromptService:
 
         return self.update_prompt(prompt_id, content=target_version.content, change_log=f"Rollback to {version_str}")
 
-    def lint_prompt(self, prompt_id: UUID) -> List[LinterResult]:
+    def _sync_duplicate_index(self) -> None:
+        """Re-sign prompts whose checksum differs from what the index holds, and drop deleted ones.
+
+        Other processes, or services built without the index, may have written
+        to the library since it was saved, so it is checked rather than trusted.
+        The check is skipped while the most recently updated prompt is the one
+        the last check saw; deletes do not move that marker, so ids that no
+        longer resolve are dropped where lint and dedupe meet them.
+        """
+        index = self.duplicate_index
+        latest = next(self.repository.iter_summaries(order_by="-updated_at", limit=1), None)
+        marker = f"{latest.updated_at.isoformat()}/{latest.id}" if latest else ""
+        if marker == index.synced:
+            return
+        current = {str(s.id): s.checksum for s in self.repository.iter_summaries()}
+        for pid in [pid for pid in index.signatures if pid not in current]:
+            index.remove(pid)
+        stale = [UUID(pid) for pid, checksum in current.items()
+                 if pid not in index or (checksum and index.hashes.get(pid) != checksum)]
+        for chunk in _chunked(stale, 500):
+            for prompt in self.repository.get_by_ids(chunk).values():
+                index.add(str(prompt.id), prompt.content, prompt.checksum)
+        index.mark_synced(marker)
+
+    def _resolve_duplicates(self, prompt_ids: List[str]) -> Dict[UUID, Prompt]:
+        prompts = self.repository.get_by_ids([UUID(pid) for pid in prompt_ids])
+        for pid in prompt_ids:
+            if UUID(pid) not in prompts:
+                self.duplicate_index.remove(pid)
+        return prompts
+
+    def lint_prompt(self, prompt_id: UUID, candidate_threshold: float = 0.35) -> List[LinterResult]:
         prompt = self.get_prompt(prompt_id)
-        other_prompts = self.repository.list_all()
-        return self.linter.lint(prompt, other_prompts)
+        if self.duplicate_index is None:
+            return self.linter.lint(prompt, self.repository.list_all())
+
+        # Only prompts sharing LSH buckets reach the exact (difflib) comparison. The
+        # threshold is an estimated Jaccard low enough to keep every pair the
+        # linter's ratio > 0.9 rule would flag, even with scattered edits.
+        self._sync_duplicate_index()
+        matches = self.duplicate_index.query(prompt.content, threshold=candidate_threshold, exclude=str(prompt.id))
+        candidates = self._resolve_duplicates([pid for pid, _ in matches])
+        return self.linter.lint(prompt, list(candidates.values()))
+
+    def find_duplicates(self, threshold: float = 0.8) -> List[List[Prompt]]:
+        """Cluster the whole library into near-duplicate groups in one pass."""
+        if self.duplicate_index is not None:
+            self._sync_duplicate_index()
+            clusters = self.duplicate_index.clusters(threshold)
+            prompts = self._resolve_duplicates([pid for cluster in clusters for pid in cluster])
+        else:
+            index = NearDuplicateIndex()
+            index.build((str(p.id), p.content) for p in self.repository.list_all())
+            clusters = index.clusters(threshold)
+            prompts = self.repository.get_by_ids([UUID(pid) for cluster in clusters for pid in cluster])
+        clusters = [[prompts[UUID(pid)] for pid in cluster if UUID(pid) in prompts] for cluster in clusters]
+        return [cluster for cluster in clusters if len(cluster) > 1]
 
     def optimize_prompt(self, prompt_id: UUID) -> Any:
         prompt = self.get_prompt(prompt_id)
@@ -223,16 +528,7 @@ class PromptService:
         return "\n".join(diff)
 
     def get_stats(self) -> Dict[str, Any]:
-        all_prompts = self.repository.list_all()
-        total_prompts = len(all_prompts)
-        total_usage = sum(p.usage_count for p in all_prompts)
-        categories = {}
-        for p in all_prompts:
-            cat = p.category or "Uncategorized"
-            categories[cat] = categories.get(cat, 0) + 1
-
-        return {
-            "total_prompts": total_prompts,
-            "total_usage": total_usage,
-            "categories": categories
-        }
+        # Make buffered usage visible before aggregating
+        if self.usage_buffer:
+            self.usage_buffer.flush()
+        return self.repository.get_stats()
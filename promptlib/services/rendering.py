@@ -1,10 +1,15 @@
-from jinja2 import Environment, meta, StrictUndefined, TemplateSyntaxError
-from typing import Dict, Any, List
+from jinja2 import Environment, Template, meta, StrictUndefined, TemplateSyntaxError
+from typing import Dict, Any, List, Optional, FrozenSet, Tuple
+from promptlib.core.caching import LRUCache
 from promptlib.core.exceptions import ValidationError
 
 class RenderingService:
-    def __init__(self):
+    def __init__(self, cache_size: int = 512):
         self.env = Environment(undefined=StrictUndefined)
+        # Compiled templates and their undeclared variables, keyed by prompt checksum
+        # (or by the raw source when no checksum is available). Entries keep their
+        # source, so a key whose stored checksum is stale never serves old text.
+        self.template_cache = LRUCache(cache_size)
 
     def extract_variables(self, template_content: str) -> List[str]:
         try:
@@ -13,15 +18,32 @@ class RenderingService:
         except TemplateSyntaxError as e:
             raise ValidationError(f"Invalid template syntax: {e}")
 
-    def render(self, template_content: str, variables: Dict[str, Any]) -> str:
+    def compile(self, template_content: str, cache_key: Optional[str] = None) -> Tuple[Template, FrozenSet[str]]:
+        """Parse and compile a template once, returning it with its undeclared variables."""
+        key = cache_key or template_content
+        entry = self.template_cache.get(key)
+        if entry is not None and entry[2] == template_content:
+            return entry[0], entry[1]
+
+        try:
+            ast = self.env.parse(template_content)
+            variables = frozenset(meta.find_undeclared_variables(ast))
+            template = self.env.from_string(ast)
+        except TemplateSyntaxError as e:
+            raise ValidationError(f"Invalid template syntax: {e}")
+
+        self.template_cache.set(key, (template, variables, template_content))
+        return template, variables
+
+    def render(self, template_content: str, variables: Dict[str, Any], cache_key: Optional[str] = None) -> str:
         try:
-            template = self.env.from_string(template_content)
+            template, _ = self.compile(template_content, cache_key)
             return template.render(**variables)
         except Exception as e:
             raise ValidationError(f"Rendering failed: {e}")
 
-    def validate_variables(self, template_content: str, provided_variables: Dict[str, Any], variable_definitions: List[Any] = None) -> Dict[str, Any]:
-        required = self.extract_variables(template_content)
+    def validate_variables(self, template_content: str, provided_variables: Dict[str, Any], variable_definitions: List[Any] = None, cache_key: Optional[str] = None) -> Dict[str, Any]:
+        _, required = self.compile(template_content, cache_key)
         final_variables = provided_variables.copy()
 
         # Apply definitions (defaults, types, etc.)
@@ -51,3 +73,6 @@ class RenderingService:
                         final_variables[var_name] = val.lower() in ("true", "1", "yes")
 
         return final_variables
+
+    def cache_info(self) -> Dict[str, int]:
+        return self.template_cache.info()
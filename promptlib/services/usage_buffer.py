@@ -0,0 +1,247 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from promptlib.storage.base import BaseRepository
+from promptlib.core.exceptions import ValidationError
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+def _try_lock(path: str) -> Optional[int]:
+    """An exclusively locked descriptor for `path`, or None while another holder has it."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+class UsageBuffer:
+    """Write-behind accumulator for usage_count/last_used updates.
+
+    Renders only touch memory; deltas are flushed to the repository with one
+    update_usage_bulk call on a timer, once flush_threshold renders are pending,
+    and at process exit.
+
+    Modes:
+      buffered - pending deltas live in memory only; a crash loses at most the
+                 counts recorded since the last flush.
+      journal  - each record is appended to a local journal before returning.
+                 Every buffer writes its own `<journal_path>.<pid>-<tag>` file and
+                 holds a lock on it; on start-up the journals whose lock is free,
+                 i.e. whose owner died, are replayed and removed. Delivery is
+                 at-least-once: a crash between a flush and the journal cleanup
+                 can double count that batch. Set fsync=True to also survive
+                 power loss.
+    """
+
+    MODES = ("buffered", "journal")
+
+    def __init__(self,
+                 repository: BaseRepository,
+                 flush_interval: float = 5.0,
+                 flush_threshold: int = 1000,
+                 mode: str = "buffered",
+                 journal_path: Optional[str] = None,
+                 fsync: bool = False):
+        if mode not in self.MODES:
+            raise ValidationError(f"Unknown usage buffer mode: {mode}")
+        if mode == "journal" and not journal_path:
+            raise ValidationError("Journal mode requires a journal_path")
+
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.mode = mode
+        self.journal_path = journal_path
+        self.fsync = fsync
+
+        self._pending: Dict[UUID, List] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._closed = False
+        self._journal = None
+        self._journal_lock = None
+
+        if self.mode == "journal":
+            # Lock our own journal before adopting orphans so no other start-up takes it
+            self._own_path = f"{journal_path}.{os.getpid()}-{uuid4().hex[:8]}"
+            self._journal_lock = _try_lock(self._own_path + ".lock")
+            self._replay_orphans()
+            self._journal = open(self._own_path, "a")
+
+        self._thread = None
+        if flush_interval and flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name="usage-flush", daemon=True)
+            self._thread.start()
+
+        atexit.register(self.close)
+
+    def record(self, prompt_id: UUID, count: int = 1) -> None:
+        used_at = datetime.now()
+        with self._lock:
+            if self._journal:
+                self._journal.write(json.dumps({"id": str(prompt_id), "count": count, "last_used": used_at.isoformat()}) + "\n")
+                self._journal.flush()
+                if self.fsync:
+                    os.fsync(self._journal.fileno())
+            entry = self._pending.get(prompt_id)
+            if entry:
+                entry[0] += count
+                entry[1] = max(entry[1], used_at)
+            else:
+                self._pending[prompt_id] = [count, used_at]
+            self._pending_count += count
+            should_flush = self._pending_count >= self.flush_threshold
+
+        if should_flush:
+            self.flush()
+
+    def pending(self, prompt_id: Optional[UUID] = None) -> int:
+        with self._lock:
+            if prompt_id is None:
+                return self._pending_count
+            entry = self._pending.get(prompt_id)
+            return entry[0] if entry else 0
+
+    def flush(self) -> int:
+        """Write all pending deltas in one batch. Returns the number of prompts updated."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                deltas = {pid: (entry[0], entry[1]) for pid, entry in self._pending.items()}
+                self._pending = {}
+                self._pending_count = 0
+                flushing_path = self._rotate_journal()
+
+            try:
+                self.repository.update_usage_bulk(deltas)
+            except Exception:
+                self._restore(deltas, flushing_path)
+                raise
+
+            if flushing_path and os.path.exists(flushing_path):
+                os.remove(flushing_path)
+            return len(deltas)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        try:
+            self.flush()
+        finally:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+                if not self._pending:
+                    self._remove_journal(self._own_path)
+            if self._journal_lock is not None:
+                os.close(self._journal_lock)
+                self._journal_lock = None
+            atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Usage flush failed, will retry: %s", e)
+
+    def _rotate_journal(self) -> Optional[str]:
+        # Called with self._lock held: records made during the flush go to a fresh journal
+        if not self._journal:
+            return None
+        self._journal.close()
+        flushing_path = self._own_path + ".flushing"
+        os.replace(self._own_path, flushing_path)
+        self._journal = open(self._own_path, "a")
+        return flushing_path
+
+    def _restore(self, deltas: Dict[UUID, Tuple[int, datetime]], flushing_path: Optional[str]) -> None:
+        with self._lock:
+            for pid, (count, used_at) in deltas.items():
+                entry = self._pending.get(pid)
+                if entry:
+                    entry[0] += count
+                    entry[1] = max(entry[1], used_at)
+                else:
+                    self._pending[pid] = [count, used_at]
+                self._pending_count += count
+
+            if flushing_path and self._journal:
+                with open(flushing_path, "r") as f:
+                    self._journal.write(f.read())
+                self._journal.flush()
+                os.remove(flushing_path)
+
+    def _replay_orphans(self) -> None:
+        """Apply and remove the journals left behind by buffers that are gone."""
+        lock_paths = glob.glob(glob.escape(self.journal_path) + ".*.lock")
+        for lock_path in lock_paths:
+            journal = lock_path[:-len(".lock")]
+            if journal == self._own_path:
+                continue
+            fd = _try_lock(lock_path)
+            if fd is None:
+                continue # Its owner is still running
+            try:
+                self._replay([journal + ".flushing", journal])
+                self._remove_journal(journal)
+            finally:
+                os.close(fd)
+        # Journals written before they were per process have no lock to test
+        legacy = [self.journal_path + ".flushing", self.journal_path]
+        self._replay(legacy)
+        for path in legacy:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _replay(self, paths: List[str]) -> None:
+        deltas: Dict[UUID, Tuple[int, datetime]] = {}
+        for path in paths:
+            try:
+                f = open(path, "r")
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        continue
+                    pid = UUID(record["id"])
+                    used_at = datetime.fromisoformat(record["last_used"])
+                    count, last = deltas.get(pid, (0, used_at))
+                    deltas[pid] = (count + record["count"], max(last, used_at))
+        if deltas:
+            self.repository.update_usage_bulk(deltas)
+
+    @staticmethod
+    def _remove_journal(journal: str) -> None:
+        # The lock file goes last: while it exists, a dead owner's journal is still discoverable
+        for path in (journal + ".flushing", journal, journal + ".lock"):
+            if os.path.exists(path):
+                os.remove(path)
@@ -1,18 +1,29 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from uuid import UUID
-from promptlib.models.prompt import Prompt
+import numpy as np
+from promptlib.models.prompt import Prompt, PromptSummary
 from promptlib.models.version import PromptVersion
+from promptlib.storage.embeddings import Vector
 
 class BaseRepository(ABC):
     @abstractmethod
     def save(self, prompt: Prompt) -> None:
         pass
 
+    @abstractmethod
+    def save_bulk(self, prompts: List[Prompt], versions: List[PromptVersion]) -> None:
+        pass
+
     @abstractmethod
     def get_by_id(self, prompt_id: UUID) -> Optional[Prompt]:
         pass
 
+    @abstractmethod
+    def get_by_ids(self, prompt_ids: List[UUID]) -> Dict[UUID, Prompt]:
+        pass
+
     @abstractmethod
     def get_by_name(self, name: str) -> Optional[Prompt]:
         pass
@@ -22,13 +33,31 @@ class BaseRepository(ABC):
         pass
 
     @abstractmethod
-    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None) -> List[Prompt]:
+    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Prompt]:
+        pass
+
+    @abstractmethod
+    def iter_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                     order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[Prompt]:
+        pass
+
+    @abstractmethod
+    def iter_summaries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                       order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[PromptSummary]:
+        pass
+
+    @abstractmethod
+    def get_tag_counts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> Dict[str, int]:
         pass
 
     @abstractmethod
     def search(self, query: str) -> List[Prompt]:
         pass
 
+    @abstractmethod
+    def search_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Prompt, float]]:
+        pass
+
     @abstractmethod
     def save_version(self, version: PromptVersion) -> None:
         pass
@@ -38,7 +67,24 @@ class BaseRepository(ABC):
         pass
 
     @abstractmethod
-    def update_usage(self, prompt_id: UUID) -> None:
+    def update_usage(self, prompt_id: UUID, count: int = 1) -> None:
+        pass
+
+    @abstractmethod
+    def update_usage_bulk(self, deltas: Dict[UUID, Tuple[int, datetime]]) -> None:
+        pass
+
+    @abstractmethod
+    def update_embeddings(self, vectors: Dict[UUID, Vector], model: str, content_hashes: Optional[Dict[UUID, str]] = None,
+                          dtype: str = "float32") -> None:
+        pass
+
+    @abstractmethod
+    def get_embeddings(self, prompt_ids: List[UUID], model: str) -> Dict[UUID, Tuple[np.ndarray, Optional[str]]]:
+        pass
+
+    @abstractmethod
+    def get_stats(self, recent: int = 5) -> Dict[str, Any]:
         pass
 
     @abstractmethod
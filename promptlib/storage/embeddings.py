@@ -0,0 +1,76 @@
+import json
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+import numpy as np
+
+EMBEDDING_DTYPES = ("float32", "float16")
+
+# Older versions kept vectors inline on the prompt and only ever embedded
+# with the EmbeddingEngine default, so that is what inline vectors belong to
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+Vector = Union[Sequence[float], np.ndarray]
+
+def pack_vector(vector: Vector, dtype: str = "float32") -> bytes:
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype '{dtype}', expected one of {', '.join(EMBEDDING_DTYPES)}")
+    return np.asarray(vector, dtype=dtype).tobytes()
+
+def unpack_vector(blob: bytes, dtype: str = "float32") -> np.ndarray:
+    """Read-only view over the packed bytes; nothing is copied until a caller casts or stacks it."""
+    return np.frombuffer(blob, dtype=dtype)
+
+class EmbeddingSidecar:
+    """Packed vectors for file backends, one file per prompt and model.
+
+    Each `<model>/<prompt_id>.vec` file is a one-line JSON header (dtype,
+    content hash) followed by the raw vector bytes, so prompt files stay small
+    and vectors are only read when something asks for them.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def _model_dir(model: str) -> str:
+        return re.sub(r"[^A-Za-z0-9._-]", "_", model)
+
+    def _path(self, prompt_id: UUID, model: str) -> str:
+        return os.path.join(self.root, self._model_dir(model), f"{prompt_id}.vec")
+
+    def exists(self, prompt_id: UUID, model: str) -> bool:
+        return os.path.exists(self._path(prompt_id, model))
+
+    def save(self, prompt_id: UUID, model: str, vector: Vector, content_hash: Optional[str] = None, dtype: str = "float32"):
+        path = self._path(prompt_id, model)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = json.dumps({"dtype": dtype, "content_hash": content_hash}).encode()
+        with open(path, "wb") as f:
+            f.write(header + b"\n" + pack_vector(vector, dtype))
+
+    def load(self, prompt_id: UUID, model: str) -> Optional[Tuple[np.ndarray, Optional[str]]]:
+        path = self._path(prompt_id, model)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            header, blob = f.read().split(b"\n", 1)
+        meta = json.loads(header)
+        return unpack_vector(blob, meta["dtype"]), meta.get("content_hash")
+
+    def load_many(self, prompt_ids: List[UUID], model: str) -> Dict[UUID, Tuple[np.ndarray, Optional[str]]]:
+        found = {}
+        for prompt_id in prompt_ids:
+            stored = self.load(prompt_id, model)
+            if stored is not None:
+                found[prompt_id] = stored
+        return found
+
+    def delete(self, prompt_id: UUID):
+        if not os.path.isdir(self.root):
+            return
+        for model_dir in os.listdir(self.root):
+            path = os.path.join(self.root, model_dir, f"{prompt_id}.vec")
+            if os.path.exists(path):
+                os.remove(path)
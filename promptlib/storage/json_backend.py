@@ -1,77 +1,106 @@
 import json
 import os
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict, Iterator, Tuple
 from uuid import UUID
 from datetime import datetime
-from promptlib.models.prompt import Prompt
+import numpy as np
+from promptlib.models.prompt import Prompt, PromptSummary
 from promptlib.models.version import PromptVersion
 from promptlib.storage.base import BaseRepository
+from promptlib.storage.stats import compute_stats, count_tags, matches_filters, score_matches
+from promptlib.storage.paging import page_prompts, page_summaries
+from promptlib.storage.embeddings import DEFAULT_MODEL, EmbeddingSidecar, Vector
+from promptlib.storage.manifest import FileManifest, MANIFEST_FIELDS
+from promptlib.storage.loader import FileLoader
 
 class JSONRepository(BaseRepository):
-    def __init__(self, storage_dir: str = "prompts_json"):
+    def __init__(self, storage_dir: str = "prompts_json", load_workers: int = 8, load_mode: str = "thread"):
         self.storage_dir = storage_dir
         self.prompts_dir = os.path.join(storage_dir, "prompts")
         self.versions_dir = os.path.join(storage_dir, "versions")
         os.makedirs(self.prompts_dir, exist_ok=True)
         os.makedirs(self.versions_dir, exist_ok=True)
+        self.embeddings = EmbeddingSidecar(os.path.join(storage_dir, "embeddings"))
+        self.loader = FileLoader(load_workers, load_mode)
+        self.manifest = FileManifest(self.prompts_dir, os.path.join(storage_dir, "manifest.json"), ".json", self._read_many)
 
     def _get_path(self, prompt_id: UUID) -> str:
         return os.path.join(self.prompts_dir, f"{prompt_id}.json")
 
     def save(self, prompt: Prompt) -> None:
+        if prompt.embedding_vector and not self.embeddings.exists(prompt.id, DEFAULT_MODEL):
+            # A vector carried on the model comes from older inline storage
+            self.embeddings.save(prompt.id, DEFAULT_MODEL, prompt.embedding_vector, prompt.content_hash or prompt.checksum)
         path = self._get_path(prompt.id)
         with open(path, 'w') as f:
-            f.write(prompt.model_dump_json(indent=2))
+            f.write(prompt.model_dump_json(indent=2, exclude={"embedding_vector"}))
+        self.manifest.record(path, prompt.model_dump(mode='json', include=set(MANIFEST_FIELDS)))
+
+    def save_bulk(self, prompts: List[Prompt], versions: List[PromptVersion]) -> None:
+        for prompt in prompts:
+            self.save(prompt)
+        for version in versions:
+            self.save_version(version)
 
     def get_by_id(self, prompt_id: UUID) -> Optional[Prompt]:
         path = self._get_path(prompt_id)
         if not os.path.exists(path):
             return None
-        with open(path, 'r') as f:
-            data = json.load(f)
-            return Prompt(**data)
+        with open(path, 'rb') as f:
+            # Parse and validate in one native pass rather than json.load + Prompt(**data)
+            return Prompt.model_validate_json(f.read())
+
+    def get_by_ids(self, prompt_ids: List[UUID]) -> Dict[UUID, Prompt]:
+        unique_ids = list(dict.fromkeys(prompt_ids))
+        if not unique_ids:
+            return {}
+        # Overlap file open/read latency across prompts
+        return {p.id: p for p in self.loader.map(self.get_by_id, unique_ids) if p}
 
     def get_by_name(self, name: str) -> Optional[Prompt]:
-        # Linear scan for name search in JSON files
-        for filename in os.listdir(self.prompts_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(self.prompts_dir, filename), 'r') as f:
-                    data = json.load(f)
-                    if data.get("name") == name:
-                        return Prompt(**data)
-        return None
+        prompt_id = self.manifest.find_by_name(name)
+        return self.get_by_id(UUID(prompt_id)) if prompt_id else None
 
     def delete(self, prompt_id: UUID) -> None:
         path = self._get_path(prompt_id)
         if os.path.exists(path):
             os.remove(path)
+        self.manifest.remove(path)
+        self.embeddings.delete(prompt_id)
 
-    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None) -> List[Prompt]:
-        prompts = []
-        for filename in os.listdir(self.prompts_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(self.prompts_dir, filename), 'r') as f:
-                    data = json.load(f)
-                    p = Prompt(**data)
-                    if category and p.category != category:
-                        continue
-                    if tags and not all(t in p.tags for t in tags):
-                        continue
-                    prompts.append(p)
-        return prompts
+    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Prompt]:
+        # Filter on the manifest so non-matching files are never opened
+        prompts = self.loader.map(self.get_by_id, [UUID(entry["id"]) for entry in self._entries(category, tags, tag_mode)])
+        return [p for p in prompts if p]
+
+    # Manifest entries carry every listing column, so ordering a page opens no files
+    def iter_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                     order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[Prompt]:
+        return page_prompts(self._entries(), self.get_by_ids, order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def iter_summaries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                       order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[PromptSummary]:
+        return page_summaries(self._entries(), order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def get_tag_counts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> Dict[str, int]:
+        return count_tags(self._entries(category, tags, tag_mode))
 
     def search(self, query: str) -> List[Prompt]:
-        prompts = []
-        for filename in os.listdir(self.prompts_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(self.prompts_dir, filename), 'r') as f:
-                    data = json.load(f)
-                    if query.lower() in data.get("name", "").lower() or query.lower() in data.get("content", "").lower():
-                        prompts.append(Prompt(**data))
+        needle = query.lower()
+        named, rest = [], []
+        for entry in self.manifest.snapshot().values():
+            # Name hits are settled by the manifest; only the rest need their body read
+            (named if needle in (entry.get("name") or "").lower() else rest).append(UUID(entry["id"]))
+        prompts = list(self.get_by_ids(named).values())
+        bodies = self._read_many([self._get_path(pid) for pid in rest])
+        prompts += [Prompt(**data) for data in bodies if data and needle in (data.get("content") or "").lower()]
         # Usage-based ranking
         prompts.sort(key=lambda x: x.usage_count, reverse=True)
         return prompts
 
+    def search_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Prompt, float]]:
+        return score_matches(self.search(query), query, limit)
+
     def save_version(self, version: PromptVersion) -> None:
         v_dir = os.path.join(self.versions_dir, str(version.prompt_id))
         os.makedirs(v_dir, exist_ok=True)
@@ -83,21 +112,58 @@ class JSONRepository(BaseRepository):
         v_dir = os.path.join(self.versions_dir, str(prompt_id))
         if not os.path.exists(v_dir):
             return []
-        versions = []
-        for filename in os.listdir(v_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(v_dir, filename), 'r') as f:
-                    data = json.load(f)
-                    versions.append(PromptVersion(**data))
-        return versions
-
-    def update_usage(self, prompt_id: UUID) -> None:
+        paths = [os.path.join(v_dir, filename) for filename in os.listdir(v_dir) if filename.endswith(".json")]
+        return [PromptVersion(**data) for data in self._read_many(paths) if data]
+
+    def update_usage(self, prompt_id: UUID, count: int = 1) -> None:
         prompt = self.get_by_id(prompt_id)
         if prompt:
-            prompt.usage_count += 1
+            prompt.usage_count += count
             prompt.last_used = datetime.now()
             self.save(prompt)
 
+    def update_usage_bulk(self, deltas: Dict[UUID, Tuple[int, datetime]]) -> None:
+        # One rewrite per prompt per batch, regardless of how many renders it covers
+        for prompt_id, (count, last_used) in deltas.items():
+            prompt = self.get_by_id(prompt_id)
+            if prompt:
+                prompt.usage_count += count
+                prompt.last_used = last_used
+                self.save(prompt)
+
+    def update_embeddings(self, vectors: Dict[UUID, Vector], model: str, content_hashes: Optional[Dict[UUID, str]] = None,
+                          dtype: str = "float32") -> None:
+        hashes = content_hashes or {}
+        for prompt_id, vector in vectors.items():
+            self.embeddings.save(prompt_id, model, vector, hashes.get(prompt_id), dtype)
+
+    def get_embeddings(self, prompt_ids: List[UUID], model: str) -> Dict[UUID, Tuple[np.ndarray, Optional[str]]]:
+        found = self.embeddings.load_many(prompt_ids, model)
+        if model == DEFAULT_MODEL:
+            # Prompt files written before sidecars existed still carry the vector inline
+            for prompt_id in prompt_ids:
+                if prompt_id not in found:
+                    prompt = self.get_by_id(prompt_id)
+                    if prompt and prompt.embedding_vector:
+                        found[prompt_id] = (np.asarray(prompt.embedding_vector, dtype="float32"), prompt.content_hash or prompt.checksum)
+        return found
+
+    def _read_raw(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _read_many(self, paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return self.loader.map(self._read_raw, paths)
+
+    def _entries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Dict[str, Any]]:
+        return [e for e in self.manifest.snapshot().values() if matches_filters(e, category, tags, tag_mode)]
+
+    def get_stats(self, recent: int = 5) -> Dict[str, Any]:
+        return compute_stats(self._entries(), recent)
+
     def save_agent(self, agent: Any) -> None:
         agents_dir = os.path.join(self.storage_dir, "agents")
         os.makedirs(agents_dir, exist_ok=True)
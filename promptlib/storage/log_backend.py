@@ -0,0 +1,465 @@
+import atexit
+import base64
+import json
+import logging
+import os
+import threading
+from typing import List, Optional, Any, Dict, Iterator, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime
+import numpy as np
+from promptlib.models.prompt import Prompt, PromptSummary
+from promptlib.models.version import PromptVersion
+from promptlib.storage.base import BaseRepository
+from promptlib.storage.stats import compute_stats, count_tags, matches_filters, score_matches
+from promptlib.storage.paging import page_prompts, page_summaries
+from promptlib.storage.embeddings import DEFAULT_MODEL, Vector, pack_vector, unpack_vector
+from promptlib.storage.manifest import MANIFEST_FIELDS
+from promptlib.core.exceptions import StorageError
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("prompt", "version", "agent", "workflow", "embedding")
+
+def _record_head(op: str, kind: str, key: str) -> bytes:
+    return json.dumps({"op": op, "kind": kind, "key": key}).encode()
+
+def _put_length(kind: str, key: str, doc_length: int) -> int:
+    """Bytes of a whole put line: header, tab, document and newline."""
+    return len(_record_head("put", kind, key)) + doc_length + 2
+
+class LogRepository(BaseRepository):
+    """Append-only single-file storage.
+
+    Every write appends one line to `data.log`: a small JSON header (op, kind,
+    key), a tab, then the document JSON. An in-memory index maps each live key
+    to the offset and length of its document, and prompt listing fields are
+    kept alongside it, so reads are a single pread and filters never touch the
+    log. Overwritten and deleted records stay in the log as dead bytes until a
+    background compaction copies the live records into a fresh segment.
+
+    On close the index is written to `index.snapshot`; opening loads it and
+    only replays records appended after it. A torn final record from a crash
+    is cut off during that replay. Offsets are tracked per process, so one
+    repository owns the directory at a time: opening takes an exclusive lock
+    on `lock` and raises StorageError while another holds it.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, storage_dir: str = "prompts_log", fsync: bool = False, compact_interval: float = 60.0,
+                 compact_ratio: float = 0.5, compact_min_bytes: int = 1 << 20):
+        self.storage_dir = storage_dir
+        self.log_path = os.path.join(storage_dir, "data.log")
+        self.snapshot_path = os.path.join(storage_dir, "index.snapshot")
+        self.fsync = fsync
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        os.makedirs(storage_dir, exist_ok=True)
+        self._lock_fd = self._acquire_dir_lock(os.path.join(storage_dir, "lock"))
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Tuple[int, int]]] = {kind: {} for kind in KINDS}
+        self._meta: Dict[str, Dict[str, Any]] = {} # prompt id -> listing fields
+        self._by_name: Dict[str, str] = {}
+        self._dead = 0
+        self._closed = False
+
+        if not os.path.exists(self.log_path):
+            self._create_segment(self.log_path, uuid4().hex)
+        self._open()
+        self._recover()
+
+        self._stop = threading.Event()
+        self._thread = None
+        if compact_interval and compact_interval > 0:
+            self._thread = threading.Thread(target=self._run, args=(compact_interval,), name="log-compact", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _acquire_dir_lock(path: str) -> int:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            raise StorageError(f"{os.path.dirname(path)} is already open in another LogRepository or process")
+        return fd
+
+    def _release_dir_lock(self):
+        # Closing the descriptor drops the lock
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    # Segment files
+
+    @staticmethod
+    def _create_segment(path: str, generation: str) -> int:
+        header = json.dumps({"op": "segment", "generation": generation}).encode() + b"\n"
+        with open(path, "wb") as f:
+            f.write(header)
+        return len(header)
+
+    def _open(self):
+        self._log = open(self.log_path, "ab")
+        self._fd = os.open(self.log_path, os.O_RDONLY)
+        with open(self.log_path, "rb") as f:
+            self._generation = json.loads(f.readline())["generation"]
+        self._size = os.path.getsize(self.log_path)
+
+    def _close_files(self):
+        self._log.close()
+        os.close(self._fd)
+
+    def _recover(self):
+        start = None
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r") as f:
+                    snapshot = json.load(f)
+                if (snapshot.get("version") == self.SNAPSHOT_VERSION and snapshot["generation"] == self._generation
+                        and snapshot["end"] <= self._size):
+                    self._index = {kind: {k: tuple(v) for k, v in snapshot["index"].get(kind, {}).items()} for kind in KINDS}
+                    self._meta = snapshot["meta"]
+                    self._dead = snapshot["dead"]
+                    start = snapshot["end"]
+            except (OSError, ValueError, KeyError):
+                logger.warning("Ignoring unreadable index snapshot %s", self.snapshot_path)
+        if start is None:
+            with open(self.log_path, "rb") as f:
+                start = len(f.readline())
+        self._by_name = {entry["name"]: pid for pid, entry in self._meta.items() if entry.get("name")}
+        end = self._replay(start)
+        if end < self._size:
+            logger.warning("Truncating %d bytes of incomplete records from %s", self._size - end, self.log_path)
+            os.truncate(self.log_path, end)
+            self._size = end
+
+    def _replay(self, start: int) -> int:
+        """Apply records from `start` to the in-memory index; returns where the intact log ends.
+
+        Only a torn final write (no trailing newline) ends the log. A complete
+        line that does not parse is skipped and counted as dead, so the
+        committed records after it survive and compaction drops it.
+        """
+        pos = start
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # Torn final write
+                try:
+                    self._apply_line(line, pos)
+                except (ValueError, KeyError):
+                    logger.error("Skipping corrupt record at offset %d of %s", pos, self.log_path)
+                    self._dead += len(line)
+                pos += len(line)
+        return pos
+
+    def _apply_line(self, line: bytes, pos: int, meta: bool = True):
+        head, sep, doc = line.rstrip(b"\n").partition(b"\t")
+        record = json.loads(head)
+        kind, key = record["kind"], record["key"]
+        if record["op"] == "put":
+            self._track(kind, key, (pos + len(head) + 1, len(doc)), json.loads(doc) if meta and kind == "prompt" else None)
+        else:
+            self._untrack(kind, key, meta)
+            self._dead += len(line)
+
+    # Index bookkeeping
+
+    def _track(self, kind: str, key: str, location: Tuple[int, int], data: Optional[Dict[str, Any]] = None):
+        previous = self._index[kind].get(key)
+        if previous:
+            self._dead += _put_length(kind, key, previous[1])
+        self._index[kind][key] = location
+        if data is not None:
+            self._untrack_name(key)
+            entry = {k: data.get(k) for k in MANIFEST_FIELDS}
+            self._meta[key] = entry
+            if entry.get("name"):
+                self._by_name[entry["name"]] = key
+
+    def _untrack(self, kind: str, key: str, meta: bool = True):
+        previous = self._index[kind].pop(key, None)
+        if previous:
+            self._dead += _put_length(kind, key, previous[1])
+        if meta and kind == "prompt":
+            self._untrack_name(key)
+            self._meta.pop(key, None)
+
+    def _untrack_name(self, key: str):
+        entry = self._meta.get(key)
+        if entry and self._by_name.get(entry.get("name")) == key:
+            del self._by_name[entry["name"]]
+
+    # Appends and reads
+
+    def _append(self, records: List[Tuple[str, str, str, Optional[bytes], Optional[Dict[str, Any]]]]):
+        """Append (op, kind, key, doc, listing data) records with a single flush."""
+        with self._lock:
+            for op, kind, key, doc, data in records:
+                head = _record_head(op, kind, key)
+                line = head + b"\t" + doc + b"\n" if doc is not None else head + b"\n"
+                self._log.write(line)
+                if op == "put":
+                    self._track(kind, key, (self._size + len(head) + 1, len(doc)), data)
+                else:
+                    self._untrack(kind, key)
+                    self._dead += len(line)
+                self._size += len(line)
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+
+    def _read(self, kind: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            location = self._index[kind].get(key)
+            if location is None:
+                return None
+            return os.pread(self._fd, location[1], location[0])
+
+    def _prompt_record(self, prompt: Prompt):
+        doc = prompt.model_dump_json(exclude={"embedding_vector"}).encode()
+        return ("put", "prompt", str(prompt.id), doc, prompt.model_dump(mode='json', include=set(MANIFEST_FIELDS)))
+
+    def _prompt_records(self, prompt: Prompt):
+        records = [self._prompt_record(prompt)]
+        if prompt.embedding_vector and self._embedding_key(prompt.id, DEFAULT_MODEL) not in self._index["embedding"]:
+            # A vector carried on the model comes from older inline storage
+            records.append(self._embedding_record(prompt.id, DEFAULT_MODEL, prompt.embedding_vector,
+                                                  prompt.content_hash or prompt.checksum, "float32"))
+        return records
+
+    @staticmethod
+    def _version_key(prompt_id: UUID, version: str) -> str:
+        return f"{prompt_id}/{version}"
+
+    @staticmethod
+    def _embedding_key(prompt_id: UUID, model: str) -> str:
+        return f"{prompt_id}/{model}"
+
+    def _embedding_record(self, prompt_id: UUID, model: str, vector: Vector, content_hash: Optional[str], dtype: str):
+        doc = json.dumps({"dtype": dtype, "content_hash": content_hash,
+                          "vector": base64.b64encode(pack_vector(vector, dtype)).decode()}).encode()
+        return ("put", "embedding", self._embedding_key(prompt_id, model), doc, None)
+
+    # Compaction and snapshots
+
+    def dead_ratio(self) -> float:
+        with self._lock:
+            return self._dead / self._size if self._size else 0.0
+
+    def compact(self) -> int:
+        """Rewrite the log with only live records. Returns the number of bytes reclaimed.
+
+        Live records are copied without holding the write lock; anything
+        appended meanwhile is carried over verbatim just before the swap.
+        """
+        with self._compact_lock:
+            with self._lock:
+                end = self._size
+                live = [(kind, key, location) for kind in KINDS for key, location in self._index[kind].items()]
+            tmp_path = self.log_path + ".compact"
+            generation = uuid4().hex
+            pos = self._create_segment(tmp_path, generation)
+            index: Dict[str, Dict[str, Tuple[int, int]]] = {kind: {} for kind in KINDS}
+            with open(tmp_path, "ab") as out:
+                for kind, key, (offset, length) in live:
+                    head = _record_head("put", kind, key)
+                    out.write(head + b"\t" + os.pread(self._fd, length, offset) + b"\n")
+                    index[kind][key] = (pos + len(head) + 1, length)
+                    pos += len(head) + length + 2
+
+                with self._lock:
+                    tail = os.pread(self._fd, self._size - end, end) if self._size > end else b""
+                    out.write(tail)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    old_size = self._size
+                    self._index, self._dead = index, 0
+                    for line in tail.splitlines(keepends=True):
+                        # Listing fields are already current, only offsets move
+                        self._apply_line(line, pos, meta=False)
+                        pos += len(line)
+                    self._close_files()
+                    os.replace(tmp_path, self.log_path)
+                    self._open()
+                    reclaimed = old_size - self._size
+            self.write_snapshot()
+            return reclaimed
+
+    def maybe_compact(self) -> int:
+        with self._lock:
+            due = self._size >= self.compact_min_bytes and self.dead_ratio() >= self.compact_ratio
+        return self.compact() if due else 0
+
+    def write_snapshot(self):
+        with self._lock:
+            payload = {"version": self.SNAPSHOT_VERSION, "generation": self._generation, "end": self._size,
+                       "dead": self._dead, "index": self._index, "meta": self._meta}
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.snapshot_path)
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.maybe_compact()
+            except Exception as e:
+                logger.warning("Log compaction failed, will retry: %s", e)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        try:
+            if os.path.isdir(self.storage_dir):
+                self.write_snapshot()
+        finally:
+            self._close_files()
+            self._release_dir_lock()
+            atexit.unregister(self.close)
+
+    # BaseRepository
+
+    def save(self, prompt: Prompt) -> None:
+        self._append(self._prompt_records(prompt))
+
+    def save_bulk(self, prompts: List[Prompt], versions: List[PromptVersion]) -> None:
+        records = [r for prompt in prompts for r in self._prompt_records(prompt)]
+        records += [("put", "version", self._version_key(v.prompt_id, v.version), v.model_dump_json().encode(), None) for v in versions]
+        self._append(records)
+
+    def get_by_id(self, prompt_id: UUID) -> Optional[Prompt]:
+        doc = self._read("prompt", str(prompt_id))
+        return Prompt.model_validate_json(doc) if doc is not None else None
+
+    def get_by_ids(self, prompt_ids: List[UUID]) -> Dict[UUID, Prompt]:
+        prompts = (self.get_by_id(pid) for pid in dict.fromkeys(prompt_ids))
+        return {p.id: p for p in prompts if p}
+
+    def get_by_name(self, name: str) -> Optional[Prompt]:
+        with self._lock:
+            prompt_id = self._by_name.get(name)
+        return self.get_by_id(UUID(prompt_id)) if prompt_id else None
+
+    def delete(self, prompt_id: UUID) -> None:
+        with self._lock:
+            prefix = f"{prompt_id}/"
+            records = [("del", "embedding", key, None, None) for key in self._index["embedding"] if key.startswith(prefix)]
+            if str(prompt_id) in self._index["prompt"]:
+                records.append(("del", "prompt", str(prompt_id), None, None))
+            if records:
+                self._append(records)
+
+    def _entries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._meta.values())
+        return [e for e in entries if matches_filters(e, category, tags, tag_mode)]
+
+    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Prompt]:
+        prompts = (self.get_by_id(UUID(entry["id"])) for entry in self._entries(category, tags, tag_mode))
+        return [p for p in prompts if p]
+
+    def iter_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                     order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[Prompt]:
+        return page_prompts(self._entries(), self.get_by_ids, order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def iter_summaries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                       order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[PromptSummary]:
+        return page_summaries(self._entries(), order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def get_tag_counts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> Dict[str, int]:
+        return count_tags(self._entries(category, tags, tag_mode))
+
+    def search(self, query: str) -> List[Prompt]:
+        needle = query.lower()
+        prompts = []
+        for entry in self._entries():
+            doc = self._read("prompt", entry["id"])
+            if doc is None:
+                continue
+            # Name hits are settled by the index; only the rest need their body parsed
+            if needle in (entry.get("name") or "").lower() or needle in (json.loads(doc).get("content") or "").lower():
+                prompts.append(Prompt.model_validate_json(doc))
+        # Usage-based ranking
+        prompts.sort(key=lambda x: x.usage_count, reverse=True)
+        return prompts
+
+    def search_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Prompt, float]]:
+        return score_matches(self.search(query), query, limit)
+
+    def save_version(self, version: PromptVersion) -> None:
+        self._append([("put", "version", self._version_key(version.prompt_id, version.version), version.model_dump_json().encode(), None)])
+
+    def get_versions(self, prompt_id: UUID) -> List[PromptVersion]:
+        prefix = f"{prompt_id}/"
+        with self._lock:
+            keys = [key for key in self._index["version"] if key.startswith(prefix)]
+        docs = (self._read("version", key) for key in keys)
+        return [PromptVersion.model_validate_json(doc) for doc in docs if doc is not None]
+
+    def update_usage(self, prompt_id: UUID, count: int = 1) -> None:
+        self.update_usage_bulk({prompt_id: (count, datetime.now())})
+
+    def update_usage_bulk(self, deltas: Dict[UUID, Tuple[int, datetime]]) -> None:
+        # The whole batch is one append
+        records = []
+        for prompt_id, (count, last_used) in deltas.items():
+            prompt = self.get_by_id(prompt_id)
+            if prompt:
+                prompt.usage_count += count
+                prompt.last_used = last_used
+                records.append(self._prompt_record(prompt))
+        if records:
+            self._append(records)
+
+    def update_embeddings(self, vectors: Dict[UUID, Vector], model: str, content_hashes: Optional[Dict[UUID, str]] = None,
+                          dtype: str = "float32") -> None:
+        hashes = content_hashes or {}
+        self._append([self._embedding_record(pid, model, vector, hashes.get(pid), dtype) for pid, vector in vectors.items()])
+
+    def get_embeddings(self, prompt_ids: List[UUID], model: str) -> Dict[UUID, Tuple[np.ndarray, Optional[str]]]:
+        found = {}
+        for prompt_id in prompt_ids:
+            doc = self._read("embedding", self._embedding_key(prompt_id, model))
+            if doc is not None:
+                stored = json.loads(doc)
+                found[prompt_id] = (unpack_vector(base64.b64decode(stored["vector"]), stored["dtype"]), stored.get("content_hash"))
+        return found
+
+    def get_stats(self, recent: int = 5) -> Dict[str, Any]:
+        return compute_stats(self._entries(), recent)
+
+    def save_agent(self, agent: Any) -> None:
+        self._append([("put", "agent", str(agent.id), agent.model_dump_json().encode(), None)])
+
+    def get_agent(self, agent_id: UUID) -> Optional[Any]:
+        from promptlib.models.agent import Agent
+        doc = self._read("agent", str(agent_id))
+        return Agent.model_validate_json(doc) if doc is not None else None
+
+    def save_workflow(self, workflow: Any) -> None:
+        self._append([("put", "workflow", str(workflow.id), workflow.model_dump_json().encode(), None)])
+
+    def get_workflow(self, workflow_id: UUID) -> Optional[Any]:
+        from promptlib.models.workflow import Workflow
+        doc = self._read("workflow", str(workflow_id))
+        return Workflow.model_validate_json(doc) if doc is not None else None
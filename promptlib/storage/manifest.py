@@ -0,0 +1,146 @@
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Per-prompt fields kept in the manifest: enough for lookups, filters,
+# listings and stats without opening the prompt file
+MANIFEST_FIELDS = ("id", "name", "category", "tags", "checksum", "version", "usage_count",
+                   "last_used", "created_at", "updated_at")
+
+class FileManifest:
+    """Index of the prompt files in a directory, persisted next to them.
+
+    Each entry records the file's mtime and size. refresh() stats the
+    directory and re-reads only files that were added or changed behind our
+    back (e.g. by a git checkout); writes through the repository update their
+    entry directly. The scan itself is skipped while the directory's mtime is
+    the one the last scan saw, so lookups and listings stay O(1) in stat calls.
+    Files edited in place behind our back do not touch the directory; a
+    long-lived process still rescans every `rescan_interval` seconds to catch
+    them. The manifest file is written lazily on flush() and at exit.
+    """
+
+    VERSION = 1
+    # A directory mtime this close to now may hide a change made in the same clock tick
+    RACY_NS = 1_000_000_000
+
+    def __init__(self, prompts_dir: str, manifest_path: str, suffix: str,
+                 read_many: Callable[[List[str]], List[Optional[Dict[str, Any]]]], rescan_interval: float = 30.0):
+        self.prompts_dir = prompts_dir
+        self.manifest_path = manifest_path
+        self.suffix = suffix
+        # Reads a batch of files in order, None for any that vanished
+        self.read_many = read_many
+        self.entries: Dict[str, Dict[str, Any]] = {} # filename -> entry
+        self._by_name: Dict[str, str] = {}
+        self.rescan_interval = rescan_interval
+        self._dir_mtime_ns: Optional[int] = None # Directory mtime the entries were last scanned at
+        self._scanned_at = time.monotonic()
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return # Unreadable manifest; refresh() rebuilds it
+        if stored.get("version") == self.VERSION:
+            self.entries = stored.get("entries", {})
+            self._dir_mtime_ns = stored.get("dir_mtime_ns")
+            self._by_name = {e["name"]: fname for fname, e in self.entries.items() if e.get("name")}
+
+    def flush(self):
+        with self._lock:
+            # Nothing new, or the storage directory is already gone
+            if not self._dirty or not os.path.isdir(os.path.dirname(self.manifest_path) or "."):
+                return
+            payload = {"version": self.VERSION, "dir_mtime_ns": self._dir_mtime_ns, "entries": self.entries}
+            self._dirty = False
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _set(self, filename: str, data: Dict[str, Any], stat: os.stat_result):
+        previous = self.entries.get(filename)
+        if previous and self._by_name.get(previous.get("name")) == filename:
+            del self._by_name[previous["name"]]
+        entry = {k: data.get(k) for k in MANIFEST_FIELDS}
+        entry["id"] = str(entry["id"])
+        entry["mtime_ns"] = stat.st_mtime_ns
+        entry["size"] = stat.st_size
+        self.entries[filename] = entry
+        if entry.get("name"):
+            self._by_name[entry["name"]] = filename
+        self._dirty = True
+
+    def _drop(self, filename: str):
+        entry = self.entries.pop(filename, None)
+        if entry is None:
+            return
+        if self._by_name.get(entry.get("name")) == filename:
+            del self._by_name[entry["name"]]
+        self._dirty = True
+
+    def refresh(self):
+        """Bring the manifest in line with the directory, re-reading only changed files."""
+        try:
+            # Taken before the scan, so anything added during it shows as a change next time
+            dir_mtime_ns = os.stat(self.prompts_dir).st_mtime_ns
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if dir_mtime_ns == self._dir_mtime_ns and time.monotonic() - self._scanned_at < self.rescan_interval:
+                return
+            seen = set()
+            changed = []
+            with os.scandir(self.prompts_dir) as it:
+                for dirent in it:
+                    if not dirent.name.endswith(self.suffix):
+                        continue
+                    seen.add(dirent.name)
+                    stat = dirent.stat()
+                    entry = self.entries.get(dirent.name)
+                    if not (entry and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size):
+                        changed.append((dirent, stat))
+            for (dirent, stat), data in zip(changed, self.read_many([d.path for d, _ in changed])):
+                if data is None:
+                    seen.discard(dirent.name) # Deleted while we were scanning
+                    continue
+                self._set(dirent.name, data, stat)
+            for filename in [f for f in self.entries if f not in seen]:
+                self._drop(filename)
+            trusted = dir_mtime_ns if time.time_ns() - dir_mtime_ns > self.RACY_NS else None
+            if trusted != self._dir_mtime_ns:
+                self._dir_mtime_ns = trusted
+                self._dirty = True
+            self._scanned_at = time.monotonic()
+
+    def record(self, path: str, data: Dict[str, Any]):
+        """Update the entry for a file the repository just wrote."""
+        with self._lock:
+            self._set(os.path.basename(path), data, os.stat(path))
+
+    def remove(self, path: str):
+        with self._lock:
+            self._drop(os.path.basename(path))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        self.refresh()
+        with self._lock:
+            return dict(self.entries)
+
+    def find_by_name(self, name: str) -> Optional[str]:
+        """Prompt ID stored under `name`, if any."""
+        self.refresh()
+        with self._lock:
+            filename = self._by_name.get(name)
+            return self.entries[filename]["id"] if filename else None
@@ -0,0 +1,77 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+from promptlib.models.prompt import Prompt, PromptSummary
+from promptlib.core.exceptions import PromptNotFoundError
+from promptlib.storage.stats import matches_filters
+
+# Columns list_all iteration can be ordered by; prefix with "-" for descending
+ORDER_FIELDS = ("name", "created_at", "updated_at", "usage_count")
+SUMMARY_FIELDS = ("id", "name", "version", "category", "tags", "usage_count", "updated_at", "checksum")
+# What file backends keep per prompt while ordering a directory listing
+PAGE_FIELDS = SUMMARY_FIELDS + ("created_at",)
+# Prompts loaded per get_by_ids call while streaming a page
+LOAD_BATCH = 64
+
+def parse_order(order_by: str) -> Tuple[str, bool]:
+    """Split an order spec into (field, descending)."""
+    descending = order_by.startswith("-")
+    field = order_by.lstrip("-")
+    if field not in ORDER_FIELDS:
+        raise ValueError(f"Cannot order by '{field}', expected one of {', '.join(ORDER_FIELDS)}")
+    return field, descending
+
+def slim_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: data[k] for k in PAGE_FIELDS if data.get(k) is not None}
+
+def to_summary(record: Dict[str, Any]) -> PromptSummary:
+    return PromptSummary(**{k: v for k, v in record.items() if k in SUMMARY_FIELDS})
+
+def page_records(entries: Iterable[Dict[str, Any]], order_by: str = "name", after_id: Optional[UUID] = None,
+                 limit: Optional[int] = None, offset: int = 0, category: Optional[str] = None,
+                 tags: Optional[List[str]] = None, tag_mode: str = "all") -> Iterator[Dict[str, Any]]:
+    """Filter every stored prompt dict, order by (field, id) and cut out one page.
+
+    Mirrors the keyset semantics of the SQL backend: the `after_id` anchor is
+    looked up among all entries, not just the filtered ones, and the page
+    resumes at the first match whose key sorts after it. A cursor therefore
+    survives its prompt being edited out of the filter. `offset` and `limit`
+    apply after that.
+    """
+    field, descending = parse_order(order_by)
+    missing = 0 if field == "usage_count" else ""
+    key = lambda d: (d.get(field) or missing, str(d.get("id")))
+    records = []
+    anchor = None
+    for entry in entries:
+        if after_id is not None and str(entry.get("id")) == str(after_id):
+            anchor = key(entry)
+        if matches_filters(entry, category, tags, tag_mode):
+            records.append(slim_record(entry))
+    if after_id is not None:
+        if anchor is None:
+            raise PromptNotFoundError(f"Prompt {after_id} not found")
+        records = [d for d in records if (key(d) < anchor if descending else key(d) > anchor)]
+    records.sort(key=key, reverse=descending)
+    end = offset + limit if limit is not None else None
+    return iter(records[offset:end])
+
+def page_summaries(entries: Iterable[Dict[str, Any]], order_by: str = "name", after_id: Optional[UUID] = None,
+                   limit: Optional[int] = None, offset: int = 0, category: Optional[str] = None,
+                   tags: Optional[List[str]] = None, tag_mode: str = "all") -> Iterator[PromptSummary]:
+    """iter_summaries for backends that keep every listing column in memory."""
+    for record in page_records(entries, order_by, after_id, limit, offset, category, tags, tag_mode):
+        yield to_summary(record)
+
+def page_prompts(entries: Iterable[Dict[str, Any]], load_many: Callable[[List[UUID]], Dict[UUID, Prompt]],
+                 order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None,
+                 offset: int = 0, category: Optional[str] = None, tags: Optional[List[str]] = None,
+                 tag_mode: str = "all") -> Iterator[Prompt]:
+    """iter_prompts for the same backends: the page is ordered on the entries, then
+    only its prompts are loaded, LOAD_BATCH at a time through `load_many`."""
+    ids = [UUID(str(record["id"])) for record in page_records(entries, order_by, after_id, limit, offset, category, tags, tag_mode)]
+    for start in range(0, len(ids), LOAD_BATCH):
+        chunk = ids[start:start + LOAD_BATCH]
+        prompts = load_many(chunk)
+        for prompt_id in chunk:
+            if prompt_id in prompts: # Deleted since the page was cut
+                yield prompts[prompt_id]
@@ -0,0 +1,308 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import List, Optional, Any, Dict, Iterator, Tuple
+from uuid import UUID
+import numpy as np
+from promptlib.models.prompt import Prompt, PromptSummary
+from promptlib.models.version import PromptVersion
+from promptlib.storage.base import BaseRepository
+from promptlib.storage.stats import compute_stats, count_tags, matches_filters, score_matches
+from promptlib.storage.paging import page_prompts, page_summaries
+from promptlib.storage.embeddings import DEFAULT_MODEL, Vector
+from promptlib.storage.manifest import MANIFEST_FIELDS
+from promptlib.core.exceptions import StorageError
+
+# File layout (all integers little-endian):
+#
+#   magic, u64 header length, JSON header with counts and section offsets
+#   rows        one ROW entry per prompt, ordered by (name, id): offsets of the
+#               prompt document, its name and its listing summary
+#   ids         one ID entry per prompt, ordered by UUID bytes: (uuid, row)
+#   records     prompt documents (JSON), names (UTF-8), summaries (JSON)
+#   embeddings  float32 matrix, row i belongs to rows[i]; a u8 mask marks rows
+#               that have a vector
+#
+# Sections start on 64-byte boundaries so the matrix can be viewed in place.
+
+MAGIC = b"PLSNAP1\n"
+FORMAT_VERSION = 1
+ROW = struct.Struct("<QIQIQI")
+ID = struct.Struct("<16sI")
+ALIGN = 64
+_CHUNK = 500
+
+def _pad(f) -> int:
+    pos = f.tell()
+    f.write(b"\0" * (-pos % ALIGN))
+    return f.tell()
+
+def build_snapshot(repository: BaseRepository, path: str, model: str = DEFAULT_MODEL) -> Dict[str, Any]:
+    """Compile every prompt in `repository`, plus its `model` embeddings, into one immutable file.
+
+    The file is written next to `path` and renamed into place, so readers
+    reopening `path` see either the previous snapshot or the new one.
+    """
+    prompts = sorted(repository.iter_prompts(), key=lambda p: (p.name.encode(), p.id.bytes))
+    vectors: Dict[UUID, Tuple[np.ndarray, Optional[str]]] = {}
+    for start in range(0, len(prompts), _CHUNK):
+        vectors.update(repository.get_embeddings([p.id for p in prompts[start:start + _CHUNK]], model))
+    dims = {len(v) for v, _ in vectors.values()}
+    if len(dims) > 1:
+        raise StorageError(f"Embeddings for model '{model}' have mixed dimensions: {sorted(dims)}")
+    dim = dims.pop() if dims else 0
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        # Header is written last, once the section offsets are known; reserve room for it
+        f.write(b"\0" * 4096)
+        sections: Dict[str, List[int]] = {}
+
+        blob_start = _pad(f)
+        rows = []
+        for p in prompts:
+            stored = vectors.get(p.id)
+            summary = p.model_dump(mode="json", include=set(MANIFEST_FIELDS))
+            summary["embedding_hash"] = stored[1] if stored else None
+            entry = []
+            for part in (p.model_dump_json(exclude={"embedding_vector"}).encode(), p.name.encode(), json.dumps(summary).encode()):
+                entry += [f.tell(), len(part)]
+                f.write(part)
+            rows.append(entry)
+        sections["records"] = [blob_start, f.tell() - blob_start]
+
+        start = _pad(f)
+        for entry in rows:
+            f.write(ROW.pack(*entry))
+        sections["rows"] = [start, f.tell() - start]
+
+        start = _pad(f)
+        for uuid_bytes, row in sorted((p.id.bytes, i) for i, p in enumerate(prompts)):
+            f.write(ID.pack(uuid_bytes, row))
+        sections["ids"] = [start, f.tell() - start]
+
+        if dim:
+            matrix = np.zeros((len(prompts), dim), dtype="<f4")
+            mask = np.zeros(len(prompts), dtype="u1")
+            for i, p in enumerate(prompts):
+                if p.id in vectors:
+                    matrix[i] = vectors[p.id][0]
+                    mask[i] = 1
+            start = _pad(f)
+            f.write(matrix.tobytes())
+            sections["embeddings"] = [start, f.tell() - start]
+            start = _pad(f)
+            f.write(mask.tobytes())
+            sections["embedding_mask"] = [start, f.tell() - start]
+
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "count": len(prompts),
+            "model": model if dim else None,
+            "dim": dim,
+            "created_at": datetime.now().isoformat(),
+            "sections": sections
+        }).encode()
+        if len(MAGIC) + 8 + len(header) > 4096:
+            raise StorageError("Snapshot header does not fit its reserved space")
+        f.seek(0)
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return {"prompts": len(prompts), "embeddings": len(vectors), "dim": dim, "bytes": os.path.getsize(path)}
+
+class SnapshotRepository(BaseRepository):
+    """Read-only repository over a file made by build_snapshot().
+
+    The file is mmapped, so every process on a host shares one copy through
+    the page cache and opening it only reads the header. Lookups by id and
+    name binary-search fixed-width tables in place, and embeddings come back
+    as views into the mapped matrix. Usage updates are dropped (serving nodes
+    do not track usage); every other write raises StorageError. Versions,
+    agents and workflows are not part of a snapshot.
+    """
+
+    def __init__(self, path: str = "promptlib.snapshot"):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise StorageError(f"{path} is not a promptlib snapshot")
+        (header_len,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mm[start:start + header_len])
+        if self.header["version"] != FORMAT_VERSION:
+            raise StorageError(f"Unsupported snapshot version {self.header['version']}")
+        self.count = self.header["count"]
+        self.model = self.header["model"]
+        self.dim = self.header["dim"]
+        self._sections = self.header["sections"]
+        self._summaries: Optional[List[Dict[str, Any]]] = None
+
+    def close(self):
+        self._mm.close()
+
+    # Table access
+
+    def _row(self, i: int) -> Tuple[int, ...]:
+        return ROW.unpack_from(self._mm, self._sections["rows"][0] + i * ROW.size)
+
+    def _name(self, i: int) -> bytes:
+        row = self._row(i)
+        return self._mm[row[2]:row[2] + row[3]]
+
+    def _document(self, i: int) -> bytes:
+        row = self._row(i)
+        return self._mm[row[0]:row[0] + row[1]]
+
+    def _find_id(self, prompt_id: UUID) -> Optional[int]:
+        base = self._sections["ids"][0]
+        key = prompt_id.bytes
+        ids = _Column(self.count, lambda i: ID.unpack_from(self._mm, base + i * ID.size)[0])
+        i = bisect.bisect_left(ids, key)
+        if i < self.count and ids[i] == key:
+            return ID.unpack_from(self._mm, base + i * ID.size)[1]
+        return None
+
+    def _summary_records(self) -> List[Dict[str, Any]]:
+        # Parsed once, on the first listing, and kept for the life of the mapping
+        if self._summaries is None:
+            summaries = []
+            for i in range(self.count):
+                row = self._row(i)
+                summaries.append(json.loads(self._mm[row[4]:row[4] + row[5]]))
+            self._summaries = summaries
+        return self._summaries
+
+    def _entries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Dict[str, Any]]:
+        return [e for e in self._summary_records() if matches_filters(e, category, tags, tag_mode)]
+
+    def _read_only(self):
+        raise StorageError("Snapshot repositories are read-only; rebuild the snapshot to change it")
+
+    # Writes
+
+    def save(self, prompt: Prompt) -> None:
+        self._read_only()
+
+    def save_bulk(self, prompts: List[Prompt], versions: List[PromptVersion]) -> None:
+        self._read_only()
+
+    def delete(self, prompt_id: UUID) -> None:
+        self._read_only()
+
+    def save_version(self, version: PromptVersion) -> None:
+        self._read_only()
+
+    def update_embeddings(self, vectors: Dict[UUID, Vector], model: str, content_hashes: Optional[Dict[UUID, str]] = None,
+                          dtype: str = "float32") -> None:
+        self._read_only()
+
+    def save_agent(self, agent: Any) -> None:
+        self._read_only()
+
+    def save_workflow(self, workflow: Any) -> None:
+        self._read_only()
+
+    def update_usage(self, prompt_id: UUID, count: int = 1) -> None:
+        pass
+
+    def update_usage_bulk(self, deltas: Dict[UUID, Tuple[int, datetime]]) -> None:
+        pass
+
+    # Reads
+
+    def get_by_id(self, prompt_id: UUID) -> Optional[Prompt]:
+        i = self._find_id(prompt_id)
+        return Prompt.model_validate_json(self._document(i)) if i is not None else None
+
+    def get_by_ids(self, prompt_ids: List[UUID]) -> Dict[UUID, Prompt]:
+        prompts = (self.get_by_id(pid) for pid in dict.fromkeys(prompt_ids))
+        return {p.id: p for p in prompts if p}
+
+    def get_by_name(self, name: str) -> Optional[Prompt]:
+        key = name.encode()
+        names = _Column(self.count, self._name)
+        i = bisect.bisect_left(names, key)
+        if i < self.count and names[i] == key:
+            return Prompt.model_validate_json(self._document(i))
+        return None
+
+    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Prompt]:
+        prompts = (self.get_by_id(UUID(entry["id"])) for entry in self._entries(category, tags, tag_mode))
+        return [p for p in prompts if p]
+
+    def iter_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                     order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[Prompt]:
+        return page_prompts(self._entries(), self.get_by_ids, order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def iter_summaries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                       order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[PromptSummary]:
+        return page_summaries(self._entries(), order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def get_tag_counts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> Dict[str, int]:
+        return count_tags(self._entries(category, tags, tag_mode))
+
+    def search(self, query: str) -> List[Prompt]:
+        needle = query.lower()
+        prompts = []
+        for i in range(self.count):
+            doc = self._document(i)
+            # Name hits are settled by the name table; only the rest need their body parsed
+            if needle in self._name(i).decode().lower() or needle in (json.loads(doc).get("content") or "").lower():
+                prompts.append(Prompt.model_validate_json(doc))
+        # Usage-based ranking
+        prompts.sort(key=lambda x: x.usage_count, reverse=True)
+        return prompts
+
+    def search_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Prompt, float]]:
+        return score_matches(self.search(query), query, limit)
+
+    def get_versions(self, prompt_id: UUID) -> List[PromptVersion]:
+        return []
+
+    def embedding_matrix(self) -> np.ndarray:
+        """The whole (count, dim) float32 matrix as a read-only view, row order as in iter_prompts(order_by="name")."""
+        if not self.dim:
+            return np.zeros((self.count, 0), dtype="float32")
+        start = self._sections["embeddings"][0]
+        return np.frombuffer(self._mm, dtype="<f4", count=self.count * self.dim, offset=start).reshape(self.count, self.dim)
+
+    def get_embeddings(self, prompt_ids: List[UUID], model: str) -> Dict[UUID, Tuple[np.ndarray, Optional[str]]]:
+        if model != self.model:
+            return {}
+        matrix = self.embedding_matrix()
+        mask_start = self._sections["embedding_mask"][0]
+        found = {}
+        for prompt_id in prompt_ids:
+            i = self._find_id(prompt_id)
+            if i is not None and self._mm[mask_start + i]:
+                row = self._row(i)
+                found[prompt_id] = (matrix[i], json.loads(self._mm[row[4]:row[4] + row[5]]).get("embedding_hash"))
+        return found
+
+    def get_stats(self, recent: int = 5) -> Dict[str, Any]:
+        return compute_stats(self._entries(), recent)
+
+    def get_agent(self, agent_id: UUID) -> Optional[Any]:
+        return None
+
+    def get_workflow(self, workflow_id: UUID) -> Optional[Any]:
+        return None
+
+class _Column:
+    """Sequence view over one field of a fixed-width table, for bisect."""
+
+    def __init__(self, length: int, get):
+        self._length = length
+        self._get = get
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int):
+        return self._get(i)
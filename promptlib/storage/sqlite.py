@@ -1,15 +1,31 @@
 import json
 from datetime import datetime
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict, Iterator, Tuple
 from uuid import UUID
-from sqlalchemy import create_engine, Column, String, DateTime, Integer, Text, JSON as SQLiteJSON, ForeignKey, text
+from sqlalchemy import create_engine, event, inspect, Column, String, DateTime, Integer, Text, LargeBinary, JSON as SQLiteJSON, ForeignKey, Index, text, update, bindparam, select, func, literal, literal_column, tuple_
+from sqlalchemy.exc import OperationalError, IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
-from promptlib.models.prompt import Prompt
+import numpy as np
+from promptlib.models.prompt import Prompt, PromptSummary
 from promptlib.models.version import PromptVersion
 from promptlib.storage.base import BaseRepository
+from promptlib.storage.stats import PERCENTILES, UNCATEGORIZED, percentile_rank
+from promptlib.storage.paging import parse_order
+from promptlib.storage.embeddings import DEFAULT_MODEL, Vector, pack_vector, unpack_vector
+from promptlib.core.exceptions import PromptNotFoundError, StorageError
 
 Base = declarative_base()
 
+# bm25() column weights for (name, description, content)
+_BM25_WEIGHTS = "5.0, 2.0, 1.0"
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lookups
+_IN_CHUNK_SIZE = 500
+
+# Rows fetched per round trip when streaming listings
+_STREAM_BATCH = 1000
+
 class SQLPrompt(Base):
     __tablename__ = 'prompts'
     id = Column(String(36), primary_key=True)
@@ -29,9 +45,25 @@ class SQLPrompt(Base):
     metadata_json = Column(SQLiteJSON)
     checksum = Column(String(255))
     content_hash = Column(String(255))
-    embedding_vector_json = Column(SQLiteJSON)
+    embedding_vector_json = Column(SQLiteJSON) # Legacy; migrated into prompt_embeddings
     hash_signature = Column(String(255))
 
+class SQLPromptTag(Base):
+    # Normalized copy of prompts.tags maintained by triggers; (tag, prompt_id) serves tag filters
+    __tablename__ = 'prompt_tags'
+    prompt_id = Column(String(36), primary_key=True)
+    tag = Column(String(255), primary_key=True)
+    __table_args__ = (Index('ix_prompt_tags_tag', 'tag', 'prompt_id'),)
+
+class SQLPromptEmbedding(Base):
+    # Packed vectors, one per prompt and embedding model, kept off the prompt rows
+    __tablename__ = 'prompt_embeddings'
+    prompt_id = Column(String(36), primary_key=True)
+    model = Column(String(255), primary_key=True)
+    dtype = Column(String(16), default="float32")
+    content_hash = Column(String(255))
+    vector = Column(LargeBinary)
+
 class SQLPromptVersion(Base):
     __tablename__ = 'prompt_versions'
     id = Column(String(36), primary_key=True)
@@ -62,41 +94,169 @@ class SQLWorkflow(Base):
     steps_json = Column(SQLiteJSON)
     metadata_json = Column(SQLiteJSON)
 
+# prompt_fts is an external-content index over prompts: it stores only the
+# inverted index and reads column text back from prompts by rowid. The
+# triggers keep it in step inside the same transaction as the row change.
+_FTS_TABLE = "CREATE VIRTUAL TABLE IF NOT EXISTS prompt_fts USING fts5(name, description, content, content='prompts', content_rowid='rowid')"
+_FTS_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS prompts_fts_ai AFTER INSERT ON prompts BEGIN
+        INSERT INTO prompt_fts (rowid, name, description, content) VALUES (new.rowid, new.name, new.description, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS prompts_fts_ad AFTER DELETE ON prompts BEGIN
+        INSERT INTO prompt_fts (prompt_fts, rowid, name, description, content) VALUES ('delete', old.rowid, old.name, old.description, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS prompts_fts_au AFTER UPDATE OF name, description, content ON prompts BEGIN
+        INSERT INTO prompt_fts (prompt_fts, rowid, name, description, content) VALUES ('delete', old.rowid, old.name, old.description, old.content);
+        INSERT INTO prompt_fts (rowid, name, description, content) VALUES (new.rowid, new.name, new.description, new.content);
+    END""",
+]
+
+_TAG_INSERT = "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) SELECT new.id, value FROM json_each(new.tags) WHERE type = 'text';"
+_TAG_TRIGGERS = {
+    "prompts_tags_ai": f"CREATE TRIGGER prompts_tags_ai AFTER INSERT ON prompts BEGIN {_TAG_INSERT} END",
+    "prompts_tags_ad": "CREATE TRIGGER prompts_tags_ad AFTER DELETE ON prompts BEGIN DELETE FROM prompt_tags WHERE prompt_id = old.id; END",
+    "prompts_tags_au": f"""CREATE TRIGGER prompts_tags_au AFTER UPDATE OF tags ON prompts BEGIN
+        DELETE FROM prompt_tags WHERE prompt_id = old.id;
+        {_TAG_INSERT}
+    END""",
+}
+
+def _json_or(column: str, empty: str) -> str:
+    # JSON columns hold SQL NULL or the text 'null' when unset
+    return f"json(COALESCE(NULLIF(prompts.{column}, 'null'), '{empty}'))"
+
+# Rows are rendered as one JSON document each so reads hand pydantic-core a
+# single string to parse natively, instead of SQLAlchemy decoding every JSON
+# and DateTime column in Python and pydantic then validating the result
+_PROMPT_JSON = literal_column(
+    "json_object("
+    "'id', prompts.id, 'name', prompts.name, 'description', prompts.description, 'content', prompts.content, "
+    f"'variables', {_json_or('variables', '[]')}, 'variable_definitions', {_json_or('variable_definitions_json', '[]')}, "
+    f"'tags', {_json_or('tags', '[]')}, 'category', prompts.category, 'version', prompts.version, "
+    "'created_at', prompts.created_at, 'updated_at', prompts.updated_at, 'usage_count', COALESCE(prompts.usage_count, 0), "
+    "'last_used', prompts.last_used, 'author', prompts.author, "
+    f"'metadata', {_json_or('metadata_json', '{}')}, 'checksum', prompts.checksum, 'content_hash', prompts.content_hash, "
+    "'hash_signature', prompts.hash_signature)"
+)
+_SUMMARY_JSON = literal_column(
+    "json_object("
+    "'id', prompts.id, 'name', prompts.name, 'version', prompts.version, 'category', prompts.category, "
+    f"'tags', {_json_or('tags', '[]')}, 'usage_count', COALESCE(prompts.usage_count, 0), 'updated_at', prompts.updated_at, "
+    "'checksum', prompts.checksum)"
+)
+
+def _is_memory_url(database_url: str) -> bool:
+    return database_url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in database_url
+
 class SQLiteRepository(BaseRepository):
-    def __init__(self, database_url: str = "sqlite:///promptlib.db"):
-        self.engine = create_engine(database_url)
+    def __init__(self, database_url: str = "sqlite:///promptlib.db", pragmas: Optional[Dict[str, Any]] = None, pool_size: Optional[int] = None):
+        engine_kwargs: Dict[str, Any] = {}
+        if pragmas:
+            engine_kwargs["connect_args"] = {"cached_statements": 256}
+        if pool_size and not _is_memory_url(database_url):
+            engine_kwargs["pool_size"] = pool_size
+            engine_kwargs["max_overflow"] = pool_size
+        self.engine = create_engine(database_url, **engine_kwargs)
+        if pragmas:
+            event.listen(self.engine, "connect", self._pragma_listener(pragmas))
+        legacy_embeddings = inspect(self.engine).has_table("prompts") and not inspect(self.engine).has_table("prompt_embeddings")
         Base.metadata.create_all(self.engine)
         self._init_fts()
+        self._init_tags()
+        self._init_embeddings(legacy_embeddings)
+        self._init_indexes()
         self.Session = sessionmaker(bind=self.engine)
 
+    @staticmethod
+    def _pragma_listener(pragmas: Dict[str, Any]):
+        def on_connect(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+        return on_connect
+
     def _init_fts(self):
+        with self.engine.begin() as conn:
+            existing = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'prompt_fts'")).scalar()
+            # Databases from older versions kept a standalone copy of every prompt in the index
+            migrate = existing is not None and "content='prompts'" not in existing
+            if migrate:
+                conn.execute(text("DROP TABLE prompt_fts"))
+            conn.execute(text(_FTS_TABLE))
+            for trigger in _FTS_TRIGGERS:
+                conn.execute(text(trigger))
+            if migrate:
+                conn.execute(text("INSERT INTO prompt_fts (prompt_fts) VALUES ('rebuild')"))
+
+    def _init_tags(self):
+        with self.engine.begin() as conn:
+            existing = {r[0] for r in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+            missing = [name for name in _TAG_TRIGGERS if name not in existing]
+            if not missing:
+                return
+            for name in missing:
+                conn.execute(text(_TAG_TRIGGERS[name]))
+            # First open of a database created before prompt_tags existed
+            conn.execute(text(
+                "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) "
+                "SELECT p.id, j.value FROM prompts p, json_each(p.tags) AS j WHERE j.type = 'text'"
+            ))
+
+    def _init_embeddings(self, migrate: bool):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS prompts_embeddings_ad AFTER DELETE ON prompts BEGIN "
+                "DELETE FROM prompt_embeddings WHERE prompt_id = old.id; END"
+            ))
+            if not migrate:
+                return
+            # Move JSON float lists off the prompt rows into packed float32 BLOBs
+            legacy = conn.execution_options(yield_per=_STREAM_BATCH).execute(text(
+                "SELECT id, embedding_vector_json, COALESCE(content_hash, checksum) FROM prompts "
+                "WHERE embedding_vector_json IS NOT NULL AND embedding_vector_json != 'null'"
+            ))
+            moved = 0
+            for batch in legacy.partitions():
+                conn.execute(SQLPromptEmbedding.__table__.insert(), [
+                    {"prompt_id": pid, "model": DEFAULT_MODEL, "dtype": "float32", "content_hash": content_hash,
+                     "vector": pack_vector(json.loads(vector))}
+                    for pid, vector, content_hash in batch
+                ])
+                moved += len(batch)
+            if moved:
+                conn.execute(text("UPDATE prompts SET embedding_vector_json = NULL WHERE embedding_vector_json IS NOT NULL"))
+
+    def _init_indexes(self):
+        # Created explicitly so databases from older versions pick them up too
         with self.engine.connect() as conn:
-            conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS prompt_fts USING fts5(prompt_id UNINDEXED, name, description, content);"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_usage_count ON prompts (usage_count)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_last_used ON prompts (last_used)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_created_at ON prompts (created_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_updated_at ON prompts (updated_at)"))
             conn.commit()
 
-    def _to_domain(self, sql_prompt: SQLPrompt) -> Prompt:
-        from promptlib.models.variable import VariableDefinition
-        return Prompt(
-            id=UUID(sql_prompt.id),
-            name=sql_prompt.name,
-            description=sql_prompt.description,
-            content=sql_prompt.content,
-            variables=sql_prompt.variables or [],
-            variable_definitions=[VariableDefinition(**d) for d in (sql_prompt.variable_definitions_json or [])],
-            tags=sql_prompt.tags or [],
-            category=sql_prompt.category,
-            version=sql_prompt.version,
-            created_at=sql_prompt.created_at,
-            updated_at=sql_prompt.updated_at,
-            usage_count=sql_prompt.usage_count,
-            last_used=sql_prompt.last_used,
-            author=sql_prompt.author,
-            metadata=sql_prompt.metadata_json or {},
-            checksum=sql_prompt.checksum,
-            content_hash=sql_prompt.content_hash,
-            embedding_vector=sql_prompt.embedding_vector_json,
-            hash_signature=sql_prompt.hash_signature
-        )
+    def rebuild_search_index(self) -> None:
+        """Regenerate the full-text index from the prompts table."""
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO prompt_fts (prompt_fts) VALUES ('rebuild')"))
+
+    def optimize_search_index(self) -> None:
+        """Merge the full-text index b-trees into one for faster queries."""
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO prompt_fts (prompt_fts) VALUES ('optimize')"))
+
+    def vacuum(self) -> None:
+        # VACUUM may renumber the implicit rowids the index is keyed on
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        self.rebuild_search_index()
+
+    def _select_prompts(self, document=_PROMPT_JSON):
+        return select(document).select_from(SQLPrompt.__table__)
+
+    def _load(self, conn, stmt) -> List[Prompt]:
+        return [Prompt.model_validate_json(doc) for doc in conn.execute(stmt).scalars()]
 
     def _to_sql(self, prompt: Prompt) -> SQLPrompt:
         return SQLPrompt(
@@ -117,7 +277,6 @@ class SQLiteRepository(BaseRepository):
             metadata_json=prompt.metadata,
             checksum=prompt.checksum,
             content_hash=prompt.content_hash,
-            embedding_vector_json=prompt.embedding_vector,
             hash_signature=prompt.hash_signature
         )
 
@@ -125,77 +284,170 @@ class SQLiteRepository(BaseRepository):
         with self.Session() as session:
             sql_prompt = self._to_sql(prompt)
             session.merge(sql_prompt)
+            if prompt.embedding_vector:
+                # A vector carried on the model comes from older inline storage
+                session.merge(SQLPromptEmbedding(
+                    prompt_id=str(prompt.id), model=DEFAULT_MODEL, dtype="float32",
+                    content_hash=prompt.content_hash or prompt.checksum, vector=pack_vector(prompt.embedding_vector)
+                ))
             session.commit()
 
-            # Update FTS
-            with self.engine.connect() as conn:
-                conn.execute(text("DELETE FROM prompt_fts WHERE prompt_id = :id"), {"id": str(prompt.id)})
-                conn.execute(text("INSERT INTO prompt_fts (prompt_id, name, description, content) VALUES (:id, :name, :description, :content)"),
-                             {"id": str(prompt.id), "name": prompt.name, "description": prompt.description, "content": prompt.content})
-                conn.commit()
+    def save_bulk(self, prompts: List[Prompt], versions: List[PromptVersion]) -> None:
+        # Prompts, their versions and (via triggers) FTS rows land in a single transaction
+        with self.Session() as session:
+            try:
+                session.add_all([self._to_sql(p) for p in prompts])
+                session.add_all([self._version_to_sql(v) for v in versions])
+                session.commit()
+            except IntegrityError as e:
+                session.rollback()
+                raise StorageError(f"Bulk save failed: {e.orig}")
 
     def get_by_id(self, prompt_id: UUID) -> Optional[Prompt]:
-        with self.Session() as session:
-            sql_prompt = session.query(SQLPrompt).filter(SQLPrompt.id == str(prompt_id)).first()
-            return self._to_domain(sql_prompt) if sql_prompt else None
+        with self.engine.connect() as conn:
+            found = self._load(conn, self._select_prompts().where(SQLPrompt.id == str(prompt_id)))
+        return found[0] if found else None
+
+    def get_by_ids(self, prompt_ids: List[UUID]) -> Dict[UUID, Prompt]:
+        keys = list(dict.fromkeys(str(pid) for pid in prompt_ids))
+        prompts = {}
+        with self.engine.connect() as conn:
+            for i in range(0, len(keys), _IN_CHUNK_SIZE):
+                stmt = self._select_prompts().where(SQLPrompt.id.in_(keys[i:i + _IN_CHUNK_SIZE]))
+                for prompt in self._load(conn, stmt):
+                    prompts[prompt.id] = prompt
+        return prompts
 
     def get_by_name(self, name: str) -> Optional[Prompt]:
-        with self.Session() as session:
-            sql_prompt = session.query(SQLPrompt).filter(SQLPrompt.name == name).first()
-            return self._to_domain(sql_prompt) if sql_prompt else None
+        with self.engine.connect() as conn:
+            found = self._load(conn, self._select_prompts().where(SQLPrompt.name == name))
+        return found[0] if found else None
 
     def delete(self, prompt_id: UUID) -> None:
         with self.Session() as session:
             session.query(SQLPrompt).filter(SQLPrompt.id == str(prompt_id)).delete()
             session.commit()
 
-            with self.engine.connect() as conn:
-                conn.execute(text("DELETE FROM prompt_fts WHERE prompt_id = :id"), {"id": str(prompt_id)})
-                conn.commit()
+    def _apply_filters(self, query, category: Optional[str], tags: Optional[List[str]], tag_mode: str):
+        if category:
+            query = query.filter(SQLPrompt.category == category)
+        if tags:
+            wanted = list(dict.fromkeys(tags))
+            matching = select(SQLPromptTag.prompt_id).where(SQLPromptTag.tag.in_(wanted))
+            if tag_mode == "all":
+                matching = matching.group_by(SQLPromptTag.prompt_id).having(func.count() == len(wanted))
+            query = query.filter(SQLPrompt.id.in_(matching))
+        return query
 
-    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None) -> List[Prompt]:
-        with self.Session() as session:
-            query = session.query(SQLPrompt)
-            if category:
-                query = query.filter(SQLPrompt.category == category)
-            # Tag filtering is a bit harder with JSON column in SQLite, but we can do it in Python for now
-            # or use JSON_EACH if available. For simplicity, Python filtering first.
-            results = query.all()
-            prompts = [self._to_domain(r) for r in results]
-            if tags:
-                prompts = [p for p in prompts if all(t in p.tags for t in tags)]
-            return prompts
+    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Prompt]:
+        with self.engine.connect() as conn:
+            return self._load(conn, self._apply_filters(self._select_prompts(), category, tags, tag_mode))
+
+    def _page(self, conn, query, order_by: str, after_id: Optional[UUID], limit: Optional[int], offset: int):
+        # Keyset pagination on (field, id): resuming after a row is an index seek, not an OFFSET scan
+        field, descending = parse_order(order_by)
+        column = getattr(SQLPrompt, field)
+        if after_id is not None:
+            anchor = conn.execute(select(column).where(SQLPrompt.id == str(after_id))).first()
+            if anchor is None:
+                raise PromptNotFoundError(f"Prompt {after_id} not found")
+            key = tuple_(column, SQLPrompt.id)
+            bound = tuple_(literal(anchor[0], column.type), literal(str(after_id)))
+            query = query.filter(key < bound if descending else key > bound)
+        if descending:
+            query = query.order_by(column.desc(), SQLPrompt.id.desc())
+        else:
+            query = query.order_by(column, SQLPrompt.id)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return conn.execution_options(yield_per=_STREAM_BATCH).execute(query).scalars()
+
+    def iter_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                     order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[Prompt]:
+        with self.engine.connect() as conn:
+            query = self._apply_filters(self._select_prompts(), category, tags, tag_mode)
+            for doc in self._page(conn, query, order_by, after_id, limit, offset):
+                yield Prompt.model_validate_json(doc)
+
+    def iter_summaries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                       order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[PromptSummary]:
+        with self.engine.connect() as conn:
+            query = self._apply_filters(self._select_prompts(_SUMMARY_JSON), category, tags, tag_mode)
+            for doc in self._page(conn, query, order_by, after_id, limit, offset):
+                yield PromptSummary.model_validate_json(doc)
+
+    def get_tag_counts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> Dict[str, int]:
+        query = select(SQLPromptTag.tag, func.count()).group_by(SQLPromptTag.tag)
+        if category or tags:
+            query = query.where(SQLPromptTag.prompt_id.in_(self._apply_filters(select(SQLPrompt.id), category, tags, tag_mode)))
+        with self.engine.connect() as conn:
+            return dict(conn.execute(query).all())
 
     def search(self, query: str) -> List[Prompt]:
-        with self.Session() as session:
+        with self.engine.connect() as conn:
             # Using FTS5 for search
-            with self.engine.connect() as conn:
-                res = conn.execute(text("SELECT prompt_id FROM prompt_fts WHERE prompt_fts MATCH :query"), {"query": query})
-                ids = [r[0] for r in res]
+            res = conn.execute(text(
+                "SELECT p.id FROM prompt_fts JOIN prompts p ON p.rowid = prompt_fts.rowid WHERE prompt_fts MATCH :query"
+            ), {"query": query})
+            ids = [r[0] for r in res]
 
             if not ids:
                 # Fallback to simple LIKE if FTS returns nothing (or for very short queries)
-                results = session.query(SQLPrompt).filter(
+                stmt = self._select_prompts().where(
                     (SQLPrompt.name.contains(query)) | (SQLPrompt.content.contains(query))
-                ).order_by(SQLPrompt.usage_count.desc()).all()
-                return [self._to_domain(r) for r in results]
+                ).order_by(SQLPrompt.usage_count.desc())
+                return self._load(conn, stmt)
+
+            return self._load(conn, self._select_prompts().where(SQLPrompt.id.in_(ids)).order_by(SQLPrompt.usage_count.desc()))
 
-            results = session.query(SQLPrompt).filter(SQLPrompt.id.in_(ids)).order_by(SQLPrompt.usage_count.desc()).all()
-            return [self._to_domain(r) for r in results]
+    def _match_ids(self, conn, query: str, limit: Optional[int]) -> List[Tuple[str, float]]:
+        sql = (f"SELECT p.id, bm25(prompt_fts, {_BM25_WEIGHTS}) AS rank FROM prompt_fts "
+               "JOIN prompts p ON p.rowid = prompt_fts.rowid WHERE prompt_fts MATCH :query ORDER BY rank")
+        params = {"query": query}
+        if limit:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+        return [(r[0], r[1]) for r in conn.execute(text(sql), params)]
+
+    def search_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Prompt, float]]:
+        with self.engine.connect() as conn:
+            try:
+                rows = self._match_ids(conn, query, limit)
+            except OperationalError:
+                # Free text that is not valid FTS5 syntax: match the terms as quoted phrases
+                quoted = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+                rows = self._match_ids(conn, quoted, limit) if quoted else []
+
+        if rows:
+            # Only the top rows are hydrated; bm25 is lower-is-better so flip the sign
+            prompts = self.get_by_ids([UUID(pid) for pid, _ in rows])
+            return [(prompts[UUID(pid)], -rank) for pid, rank in rows if UUID(pid) in prompts]
+
+        fallback = self._select_prompts().where(
+            (SQLPrompt.name.contains(query)) | (SQLPrompt.content.contains(query))
+        ).order_by(SQLPrompt.usage_count.desc())
+        if limit:
+            fallback = fallback.limit(limit)
+        with self.engine.connect() as conn:
+            return [(p, 0.0) for p in self._load(conn, fallback)]
+
+    def _version_to_sql(self, version: PromptVersion) -> SQLPromptVersion:
+        return SQLPromptVersion(
+            id=str(version.id),
+            prompt_id=str(version.prompt_id),
+            version=version.version,
+            content=version.content,
+            checksum=version.checksum,
+            created_at=version.created_at,
+            author=version.author,
+            change_log=version.change_log
+        )
 
     def save_version(self, version: PromptVersion) -> None:
         with self.Session() as session:
-            sql_version = SQLPromptVersion(
-                id=str(version.id),
-                prompt_id=str(version.prompt_id),
-                version=version.version,
-                content=version.content,
-                checksum=version.checksum,
-                created_at=version.created_at,
-                author=version.author,
-                change_log=version.change_log
-            )
-            session.add(sql_version)
+            session.add(self._version_to_sql(version))
             session.commit()
 
     def get_versions(self, prompt_id: UUID) -> List[PromptVersion]:
@@ -214,13 +466,84 @@ class SQLiteRepository(BaseRepository):
                 ) for r in results
             ]
 
-    def update_usage(self, prompt_id: UUID) -> None:
+    def update_usage(self, prompt_id: UUID, count: int = 1) -> None:
+        self.update_usage_bulk({prompt_id: (count, datetime.now())})
+
+    def update_usage_bulk(self, deltas: Dict[UUID, Tuple[int, datetime]]) -> None:
+        if not deltas:
+            return
+        table = SQLPrompt.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("prompt_id"))
+            # Usage is not an edit: keep updated_at instead of letting onupdate bump it
+            .values(usage_count=table.c.usage_count + bindparam("count"), last_used=bindparam("used_at"),
+                    updated_at=table.c.updated_at)
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt, [
+                {"prompt_id": str(pid), "count": count, "used_at": last_used}
+                for pid, (count, last_used) in deltas.items()
+            ])
+
+    def update_embeddings(self, vectors: Dict[UUID, Vector], model: str, content_hashes: Optional[Dict[UUID, str]] = None,
+                          dtype: str = "float32") -> None:
+        if not vectors:
+            return
+        hashes = content_hashes or {}
+        stmt = sqlite_insert(SQLPromptEmbedding.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["prompt_id", "model"],
+            set_={"dtype": stmt.excluded.dtype, "content_hash": stmt.excluded.content_hash, "vector": stmt.excluded.vector}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt, [
+                {"prompt_id": str(pid), "model": model, "dtype": dtype, "content_hash": hashes.get(pid),
+                 "vector": pack_vector(vector, dtype)}
+                for pid, vector in vectors.items()
+            ])
+
+    def get_embeddings(self, prompt_ids: List[UUID], model: str) -> Dict[UUID, Tuple[np.ndarray, Optional[str]]]:
+        table = SQLPromptEmbedding.__table__
+        keys = list(dict.fromkeys(str(pid) for pid in prompt_ids))
+        found = {}
+        with self.engine.connect() as conn:
+            for i in range(0, len(keys), _IN_CHUNK_SIZE):
+                stmt = select(table.c.prompt_id, table.c.dtype, table.c.content_hash, table.c.vector).where(
+                    table.c.model == model, table.c.prompt_id.in_(keys[i:i + _IN_CHUNK_SIZE])
+                )
+                for pid, dtype, content_hash, blob in conn.execute(stmt):
+                    found[UUID(pid)] = (unpack_vector(blob, dtype), content_hash)
+        return found
+
+    def get_stats(self, recent: int = 5) -> Dict[str, Any]:
+        with self.engine.connect() as conn:
+            total_prompts, total_usage = conn.execute(text("SELECT COUNT(*), COALESCE(SUM(usage_count), 0) FROM prompts")).one()
+            categories = dict(conn.execute(
+                text("SELECT COALESCE(NULLIF(category, ''), :uncategorized) AS cat, COUNT(*) FROM prompts GROUP BY cat"),
+                {"uncategorized": UNCATEGORIZED}
+            ).all())
+            percentiles = {}
+            for p in PERCENTILES:
+                value = conn.execute(
+                    text("SELECT usage_count FROM prompts ORDER BY usage_count LIMIT 1 OFFSET :offset"),
+                    {"offset": percentile_rank(p, total_prompts)}
+                ).scalar()
+                percentiles[f"p{p}"] = value or 0
+
         with self.Session() as session:
-            sql_prompt = session.query(SQLPrompt).filter(SQLPrompt.id == str(prompt_id)).first()
-            if sql_prompt:
-                sql_prompt.usage_count += 1
-                sql_prompt.last_used = datetime.now()
-                session.commit()
+            rows = session.query(SQLPrompt.id, SQLPrompt.name, SQLPrompt.last_used).filter(
+                SQLPrompt.last_used.isnot(None)
+            ).order_by(SQLPrompt.last_used.desc()).limit(recent).all()
+
+        return {
+            "total_prompts": total_prompts,
+            "total_usage": total_usage,
+            "categories": categories,
+            "tags": self.get_tag_counts(),
+            "usage_percentiles": percentiles,
+            "recently_used": [{"id": r.id, "name": r.name, "last_used": r.last_used} for r in rows]
+        }
 
     def save_agent(self, agent: Any) -> None:
         with self.Session() as session:
@@ -0,0 +1,73 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PERCENTILES = (50, 90, 99)
+UNCATEGORIZED = "Uncategorized"
+TAG_MODES = ("all", "any")
+
+def percentile_rank(percentile: int, count: int) -> int:
+    """Zero-based position of the nearest-rank percentile in a sorted list of `count` values."""
+    return max(0, math.ceil(percentile / 100 * count) - 1)
+
+def matches_filters(data: Dict[str, Any], category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> bool:
+    """Whether a raw stored prompt dict passes the list_all category/tag filters."""
+    if category and data.get("category") != category:
+        return False
+    if tags:
+        present = set(data.get("tags") or [])
+        check = any if tag_mode == "any" else all
+        return check(t in present for t in tags)
+    return True
+
+def count_tags(records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for data in records:
+        for tag in set(data.get("tags") or []):
+            counts[tag] = counts.get(tag, 0) + 1
+    return counts
+
+def score_matches(prompts: Iterable[Any], query: str, limit: Optional[int] = None) -> List[Tuple[Any, float]]:
+    """Rank substring search hits for backends without a full-text index.
+
+    Name hits weigh more than body occurrences; ties go to the most used prompt.
+    """
+    needle = query.lower()
+    scored = [(p, 5.0 * p.name.lower().count(needle) + p.content.lower().count(needle)) for p in prompts]
+    scored.sort(key=lambda item: (item[1], item[0].usage_count), reverse=True)
+    return scored[:limit] if limit else scored
+
+def _as_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+def compute_stats(records: Iterable[Dict[str, Any]], recent: int = 5) -> Dict[str, Any]:
+    """Aggregate raw stored prompt dicts without building Prompt objects."""
+    total_usage = 0
+    categories: Dict[str, int] = {}
+    tags: Dict[str, int] = {}
+    usages: List[int] = []
+    used: List[Dict[str, Any]] = []
+
+    for data in records:
+        usage = data.get("usage_count") or 0
+        total_usage += usage
+        usages.append(usage)
+        cat = data.get("category") or UNCATEGORIZED
+        categories[cat] = categories.get(cat, 0) + 1
+        for tag in set(data.get("tags") or []):
+            tags[tag] = tags.get(tag, 0) + 1
+        if data.get("last_used"):
+            used.append({"id": str(data.get("id")), "name": data.get("name"), "last_used": _as_datetime(data["last_used"])})
+
+    usages.sort()
+    used.sort(key=lambda u: u["last_used"], reverse=True)
+    return {
+        "total_prompts": len(usages),
+        "total_usage": total_usage,
+        "categories": categories,
+        "tags": tags,
+        "usage_percentiles": {f"p{p}": usages[percentile_rank(p, len(usages))] if usages else 0 for p in PERCENTILES},
+        "recently_used": used[:recent]
+    }
@@ -1,131 +1,248 @@
+import copy
 import yaml
 import os
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict, Iterator, Tuple
 from uuid import UUID
 from datetime import datetime
-from promptlib.models.prompt import Prompt
+import numpy as np
+from promptlib.models.prompt import Prompt, PromptSummary
 from promptlib.models.version import PromptVersion
 from promptlib.storage.base import BaseRepository
+from promptlib.storage.stats import compute_stats, count_tags, matches_filters, score_matches
+from promptlib.storage.paging import page_prompts, page_summaries
+from promptlib.storage.embeddings import DEFAULT_MODEL, EmbeddingSidecar, Vector
+from promptlib.storage.manifest import FileManifest
+from promptlib.storage.loader import FileLoader
+from promptlib.core.caching import LRUCache
+
+try:
+    # libyaml bindings, when PyYAML was built with them, parse and emit several times faster
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+PARSE_CACHE_SIZE = 50000
+
+# Parsed documents shared by every YAMLRepository in the process, keyed by
+# (absolute path, mtime_ns, size) so an edited file is simply a new key;
+# superseded entries age out of the LRU.
+_parse_cache = LRUCache(PARSE_CACHE_SIZE)
+
+def _cache_key(path: str) -> Tuple[str, int, int]:
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def _parse_file(path: str) -> Optional[Any]:
+    # Module-level so process pools can pickle it
+    try:
+        with open(path, 'r') as f:
+            return yaml.load(f, Loader=SafeLoader)
+    except FileNotFoundError:
+        return None
+
+def _load(path: str) -> Any:
+    key = _cache_key(path)
+    data = _parse_cache.get(key)
+    if data is None:
+        with open(path, 'r') as f:
+            data = yaml.load(f, Loader=SafeLoader)
+        _parse_cache.set(key, data)
+    # Callers own what they get back; the cached copy is never handed out
+    return copy.deepcopy(data)
+
+def _lookup(path: str) -> Tuple[Optional[Tuple[str, int, int]], Optional[Any]]:
+    try:
+        key = _cache_key(path)
+    except FileNotFoundError:
+        return None, None
+    return key, _parse_cache.get(key)
+
+def _load_many(paths: List[str], loader: FileLoader) -> List[Optional[Any]]:
+    """_load for a batch, in order: cache lookups fan out on threads, misses are
+    parsed on the loader's CPU pool. None stands in for files that are gone."""
+    found = loader.map(_lookup, paths)
+    misses = [i for i, (key, data) in enumerate(found) if key and data is None]
+    results = [data for _, data in found]
+    for i, data in zip(misses, loader.map(_parse_file, [paths[i] for i in misses], cpu_bound=True)):
+        if data is not None:
+            _parse_cache.set(found[i][0], data)
+        results[i] = data
+    return [copy.deepcopy(data) if data is not None else None for data in results]
+
+def _dump(data: Any, path: str, remember: bool = False) -> None:
+    with open(path, 'w') as f:
+        yaml.dump(data, f, Dumper=SafeDumper)
+    if remember:
+        # What we just wrote is what the next read would parse
+        _parse_cache.set(_cache_key(path), copy.deepcopy(data))
+
+def parse_cache_info() -> Dict[str, int]:
+    return _parse_cache.info()
 
 class YAMLRepository(BaseRepository):
-    def __init__(self, storage_dir: str = "prompts_yaml"):
+    def __init__(self, storage_dir: str = "prompts_yaml", load_workers: int = 8, load_mode: str = "thread"):
         self.storage_dir = storage_dir
         self.prompts_dir = os.path.join(storage_dir, "prompts")
         self.versions_dir = os.path.join(storage_dir, "versions")
         os.makedirs(self.prompts_dir, exist_ok=True)
         os.makedirs(self.versions_dir, exist_ok=True)
+        self.embeddings = EmbeddingSidecar(os.path.join(storage_dir, "embeddings"))
+        self.loader = FileLoader(load_workers, load_mode)
+        self.manifest = FileManifest(self.prompts_dir, os.path.join(storage_dir, "manifest.json"), ".yaml", self._read_many)
 
     def _get_path(self, prompt_id: UUID) -> str:
         return os.path.join(self.prompts_dir, f"{prompt_id}.yaml")
 
     def save(self, prompt: Prompt) -> None:
+        if prompt.embedding_vector and not self.embeddings.exists(prompt.id, DEFAULT_MODEL):
+            # A vector carried on the model comes from older inline storage
+            self.embeddings.save(prompt.id, DEFAULT_MODEL, prompt.embedding_vector, prompt.content_hash or prompt.checksum)
         path = self._get_path(prompt.id)
-        with open(path, 'w') as f:
-            yaml.dump(prompt.model_dump(mode='json'), f)
+        data = prompt.model_dump(mode='json', exclude={"embedding_vector"})
+        _dump(data, path, remember=True)
+        self.manifest.record(path, data)
+
+    def save_bulk(self, prompts: List[Prompt], versions: List[PromptVersion]) -> None:
+        for prompt in prompts:
+            self.save(prompt)
+        for version in versions:
+            self.save_version(version)
 
     def get_by_id(self, prompt_id: UUID) -> Optional[Prompt]:
         path = self._get_path(prompt_id)
-        if not os.path.exists(path):
+        try:
+            return Prompt(**_load(path))
+        except FileNotFoundError:
             return None
-        with open(path, 'r') as f:
-            data = yaml.safe_load(f)
-            return Prompt(**data)
+
+    def get_by_ids(self, prompt_ids: List[UUID]) -> Dict[UUID, Prompt]:
+        unique_ids = list(dict.fromkeys(prompt_ids))
+        if not unique_ids:
+            return {}
+        prompts = [Prompt(**data) for data in self._read_many([self._get_path(pid) for pid in unique_ids]) if data]
+        return {p.id: p for p in prompts}
 
     def get_by_name(self, name: str) -> Optional[Prompt]:
-        for filename in os.listdir(self.prompts_dir):
-            if filename.endswith(".yaml"):
-                with open(os.path.join(self.prompts_dir, filename), 'r') as f:
-                    data = yaml.safe_load(f)
-                    if data.get("name") == name:
-                        return Prompt(**data)
-        return None
+        prompt_id = self.manifest.find_by_name(name)
+        return self.get_by_id(UUID(prompt_id)) if prompt_id else None
 
     def delete(self, prompt_id: UUID) -> None:
         path = self._get_path(prompt_id)
         if os.path.exists(path):
             os.remove(path)
+        self.manifest.remove(path)
+        self.embeddings.delete(prompt_id)
 
-    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None) -> List[Prompt]:
-        prompts = []
-        if not os.path.exists(self.prompts_dir):
-            return []
-        for filename in os.listdir(self.prompts_dir):
-            if filename.endswith(".yaml"):
-                with open(os.path.join(self.prompts_dir, filename), 'r') as f:
-                    data = yaml.safe_load(f)
-                    p = Prompt(**data)
-                    if category and p.category != category:
-                        continue
-                    if tags and not all(t in p.tags for t in tags):
-                        continue
-                    prompts.append(p)
-        return prompts
+    def list_all(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Prompt]:
+        # Filter on the manifest so non-matching files are never opened
+        paths = [self._get_path(entry["id"]) for entry in self._entries(category, tags, tag_mode)]
+        return [Prompt(**data) for data in self._read_many(paths) if data]
+
+    # Manifest entries carry every listing column, so ordering a page opens no files
+    def iter_prompts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                     order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[Prompt]:
+        return page_prompts(self._entries(), self.get_by_ids, order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def iter_summaries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all",
+                       order_by: str = "name", after_id: Optional[UUID] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[PromptSummary]:
+        return page_summaries(self._entries(), order_by, after_id, limit, offset, category, tags, tag_mode)
+
+    def get_tag_counts(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> Dict[str, int]:
+        return count_tags(self._entries(category, tags, tag_mode))
 
     def search(self, query: str) -> List[Prompt]:
-        prompts = []
-        if not os.path.exists(self.prompts_dir):
-            return []
-        for filename in os.listdir(self.prompts_dir):
-            if filename.endswith(".yaml"):
-                with open(os.path.join(self.prompts_dir, filename), 'r') as f:
-                    data = yaml.safe_load(f)
-                    if query.lower() in data.get("name", "").lower() or query.lower() in data.get("content", "").lower():
-                        prompts.append(Prompt(**data))
+        needle = query.lower()
+        named, rest = [], []
+        for entry in self.manifest.snapshot().values():
+            # Name hits are settled by the manifest; only the rest need their body read
+            (named if needle in (entry.get("name") or "").lower() else rest).append(UUID(entry["id"]))
+        prompts = list(self.get_by_ids(named).values())
+        bodies = self._read_many([self._get_path(pid) for pid in rest])
+        prompts += [Prompt(**data) for data in bodies if data and needle in (data.get("content") or "").lower()]
+        # Usage-based ranking
         prompts.sort(key=lambda x: x.usage_count, reverse=True)
         return prompts
 
+    def search_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Prompt, float]]:
+        return score_matches(self.search(query), query, limit)
+
     def save_version(self, version: PromptVersion) -> None:
         v_dir = os.path.join(self.versions_dir, str(version.prompt_id))
         os.makedirs(v_dir, exist_ok=True)
         path = os.path.join(v_dir, f"{version.version}.yaml")
-        with open(path, 'w') as f:
-            yaml.dump(version.model_dump(mode='json'), f)
+        _dump(version.model_dump(mode='json'), path)
 
     def get_versions(self, prompt_id: UUID) -> List[PromptVersion]:
         v_dir = os.path.join(self.versions_dir, str(prompt_id))
         if not os.path.exists(v_dir):
             return []
-        versions = []
-        for filename in os.listdir(v_dir):
-            if filename.endswith(".yaml"):
-                with open(os.path.join(v_dir, filename), 'r') as f:
-                    data = yaml.safe_load(f)
-                    versions.append(PromptVersion(**data))
-        return versions
-
-    def update_usage(self, prompt_id: UUID) -> None:
+        paths = [os.path.join(v_dir, filename) for filename in os.listdir(v_dir) if filename.endswith(".yaml")]
+        return [PromptVersion(**data) for data in self._read_many(paths) if data]
+
+    def update_usage(self, prompt_id: UUID, count: int = 1) -> None:
         prompt = self.get_by_id(prompt_id)
         if prompt:
-            prompt.usage_count += 1
+            prompt.usage_count += count
             prompt.last_used = datetime.now()
             self.save(prompt)
 
+    def update_usage_bulk(self, deltas: Dict[UUID, Tuple[int, datetime]]) -> None:
+        # One rewrite per prompt per batch, regardless of how many renders it covers
+        for prompt_id, (count, last_used) in deltas.items():
+            prompt = self.get_by_id(prompt_id)
+            if prompt:
+                prompt.usage_count += count
+                prompt.last_used = last_used
+                self.save(prompt)
+
+    def update_embeddings(self, vectors: Dict[UUID, Vector], model: str, content_hashes: Optional[Dict[UUID, str]] = None,
+                          dtype: str = "float32") -> None:
+        hashes = content_hashes or {}
+        for prompt_id, vector in vectors.items():
+            self.embeddings.save(prompt_id, model, vector, hashes.get(prompt_id), dtype)
+
+    def get_embeddings(self, prompt_ids: List[UUID], model: str) -> Dict[UUID, Tuple[np.ndarray, Optional[str]]]:
+        found = self.embeddings.load_many(prompt_ids, model)
+        if model == DEFAULT_MODEL:
+            # Prompt files written before sidecars existed still carry the vector inline
+            for prompt_id in prompt_ids:
+                if prompt_id not in found:
+                    prompt = self.get_by_id(prompt_id)
+                    if prompt and prompt.embedding_vector:
+                        found[prompt_id] = (np.asarray(prompt.embedding_vector, dtype="float32"), prompt.content_hash or prompt.checksum)
+        return found
+
+    def _read_many(self, paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return _load_many(paths, self.loader)
+
+    def _entries(self, category: Optional[str] = None, tags: Optional[List[str]] = None, tag_mode: str = "all") -> List[Dict[str, Any]]:
+        return [e for e in self.manifest.snapshot().values() if matches_filters(e, category, tags, tag_mode)]
+
+    def get_stats(self, recent: int = 5) -> Dict[str, Any]:
+        return compute_stats(self._entries(), recent)
+
     def save_agent(self, agent: Any) -> None:
         agents_dir = os.path.join(self.storage_dir, "agents")
         os.makedirs(agents_dir, exist_ok=True)
         path = os.path.join(agents_dir, f"{agent.id}.yaml")
-        with open(path, 'w') as f:
-            yaml.dump(agent.model_dump(mode='json'), f)
+        _dump(agent.model_dump(mode='json'), path)
 
     def get_agent(self, agent_id: UUID) -> Optional[Any]:
         from promptlib.models.agent import Agent
         path = os.path.join(self.storage_dir, "agents", f"{agent_id}.yaml")
         if not os.path.exists(path):
             return None
-        with open(path, 'r') as f:
-            return Agent(**yaml.safe_load(f))
+        return Agent(**_load(path))
 
     def save_workflow(self, workflow: Any) -> None:
         wf_dir = os.path.join(self.storage_dir, "workflows")
         os.makedirs(wf_dir, exist_ok=True)
         path = os.path.join(wf_dir, f"{workflow.id}.yaml")
-        with open(path, 'w') as f:
-            yaml.dump(workflow.model_dump(mode='json'), f)
+        _dump(workflow.model_dump(mode='json'), path)
 
     def get_workflow(self, workflow_id: UUID) -> Optional[Any]:
         from promptlib.models.workflow import Workflow
         path = os.path.join(self.storage_dir, "workflows", f"{workflow_id}.yaml")
         if not os.path.exists(path):
             return None
-        with open(path, 'r') as f:
-            return Workflow(**yaml.safe_load(f))
+        return Workflow(**_load(path))
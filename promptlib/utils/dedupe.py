@@ -0,0 +1,224 @@
+import atexit
+import hashlib
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+class NearDuplicateIndex:
+    """MinHash signatures over character shingles, bucketed with LSH banding.
+
+    Queries only compare against prompts that share at least one band bucket,
+    so finding near-duplicates does not scan the library. Scattered
+    one-character edits destroy every shingle they touch, so short shingles
+    are used: texts a difflib ratio of 0.9 calls duplicates still share ~0.45
+    of their 3-character shingles. The defaults (40 bands x 3 rows) make such
+    pairs candidates almost surely while prompts that merely share a preamble
+    (~0.2) mostly stay out of each other's buckets; candidates are then ranked
+    by estimated similarity.
+
+    Each entry remembers the content hash it was signed from, so a saved index
+    can be checked against the library and only changed prompts re-signed.
+    `synced` is an opaque marker of the library state it was last checked
+    against, saved with it.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, num_perm: int = 120, bands: int = 40, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.index_path = index_path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        gen = np.random.RandomState(seed)
+        self._a = gen.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = gen.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.hashes: Dict[str, str] = {} # Prompt ID -> content hash the signature was built from
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+        self.synced = ""
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if index_path:
+            if os.path.exists(index_path):
+                self.load(index_path)
+            atexit.register(self._save_if_dirty)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        normalized = re.sub(r"\s+", " ", text.lower()).strip()
+        n = self.shingle_size
+        if len(normalized) <= n:
+            grams = {normalized}
+        else:
+            grams = {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+        return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self._shingles(text)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _insert(self, prompt_id: str, signature: np.ndarray, content_hash: str):
+        self.signatures[prompt_id] = signature
+        self.hashes[prompt_id] = content_hash
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, set()).add(prompt_id)
+
+    def _discard(self, prompt_id: str) -> bool:
+        signature = self.signatures.pop(prompt_id, None)
+        if signature is None:
+            return False
+        self.hashes.pop(prompt_id, None)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            members = band.get(key)
+            if members:
+                members.discard(prompt_id)
+                if not members:
+                    del band[key]
+        return True
+
+    def add(self, prompt_id: str, content: str, content_hash: Optional[str] = None):
+        content_hash = content_hash or hashlib.sha256(content.encode()).hexdigest()
+        with self._lock:
+            if self.hashes.get(prompt_id) == content_hash:
+                return
+        signature = self.signature(content)
+        with self._lock:
+            self._discard(prompt_id)
+            self._insert(prompt_id, signature, content_hash)
+            self._dirty = True
+
+    def remove(self, prompt_id: str):
+        with self._lock:
+            if self._discard(prompt_id):
+                self._dirty = True
+
+    def mark_synced(self, marker: str):
+        with self._lock:
+            if marker != self.synced:
+                self.synced = marker
+                self._dirty = True
+
+    def _candidates(self, signature: np.ndarray) -> Set[str]:
+        found: Set[str] = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            found.update(band.get(key, ()))
+        return found
+
+    def similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.mean(a == b))
+
+    def query(self, content: str, threshold: float = 0.5, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Prompt IDs whose estimated Jaccard similarity to `content` is at least `threshold`."""
+        signature = self.signature(content)
+        with self._lock:
+            candidates = self._candidates(signature)
+            candidates.discard(exclude)
+            candidates = list(candidates)
+            matrix = np.stack([self.signatures[pid] for pid in candidates]) if candidates else None
+        if matrix is None:
+            return []
+        scores = (matrix == signature).mean(axis=1)
+        scored = [(pid, float(score)) for pid, score in zip(candidates, scores) if score >= threshold]
+        return sorted(scored, key=lambda s: s[1], reverse=True)
+
+    def clusters(self, threshold: float = 0.8) -> List[List[str]]:
+        """Group the whole index into near-duplicate clusters (singletons omitted).
+
+        Each bucket is merged once, against its first member, so the work is
+        linear in bucket sizes rather than quadratic; pairs a bucket misses
+        are usually joined through another band.
+        """
+        parent: Dict[str, str] = {}
+
+        def find(x: str) -> str:
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        with self._lock:
+            for band in self._buckets:
+                for members in band.values():
+                    if len(members) < 2:
+                        continue
+                    first, *rest = sorted(members)
+                    rest = [pid for pid in rest if find(pid) != find(first)]
+                    if not rest:
+                        continue
+                    scores = (np.stack([self.signatures[pid] for pid in rest]) == self.signatures[first]).mean(axis=1)
+                    for pid, score in zip(rest, scores):
+                        if score >= threshold:
+                            parent[find(pid)] = find(first)
+
+        groups: Dict[str, List[str]] = {}
+        for pid in list(parent):
+            groups.setdefault(find(pid), []).append(pid)
+        return [sorted(g) for g in groups.values() if len(g) > 1]
+
+    def build(self, items: Iterable[Tuple[str, str]]):
+        with self._lock:
+            self.signatures = {}
+            self.hashes = {}
+            self._buckets = [{} for _ in range(self.bands)]
+            self.synced = ""
+        for prompt_id, content in items:
+            signature = self.signature(content)
+            with self._lock:
+                self._insert(prompt_id, signature, hashlib.sha256(content.encode()).hexdigest())
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, prompt_id: str) -> bool:
+        return prompt_id in self.signatures
+
+    def save(self, path: Optional[str] = None):
+        target_path = path or self.index_path
+        if not target_path:
+            return
+        with self._lock:
+            ids = list(self.signatures.keys())
+            hashes = [self.hashes.get(i, "") for i in ids]
+            matrix = np.stack([self.signatures[i] for i in ids]) if ids else np.zeros((0, self.num_perm), dtype=np.uint32)
+            synced = self.synced
+            self._dirty = False
+        tmp_path = target_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, ids=np.array(ids, dtype=str), signatures=matrix, hashes=np.array(hashes, dtype=str), synced=np.array(synced),
+                     params=np.array([self.num_perm, self.bands, self.shingle_size, self.seed]))
+        os.replace(tmp_path, target_path)
+
+    def load(self, path: str):
+        with np.load(path) as data:
+            if tuple(int(v) for v in data["params"]) != (self.num_perm, self.bands, self.shingle_size, self.seed):
+                # Built with different parameters; start empty and let it be rebuilt
+                return
+            ids = data["ids"].tolist()
+            matrix = data["signatures"]
+            # Indexes saved without hashes are re-signed on the next sync
+            hashes = data["hashes"].tolist() if "hashes" in data.files else [""] * len(ids)
+            synced = str(data["synced"]) if "synced" in data.files else ""
+        with self._lock:
+            self.synced = synced
+            for prompt_id, signature, content_hash in zip(ids, matrix, hashes):
+                self._insert(prompt_id, signature, content_hash)
+
+    def _save_if_dirty(self):
+        if self._dirty:
+            self.save()
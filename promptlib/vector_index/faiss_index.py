@@ -1,22 +1,59 @@
 import faiss
+import json
+import logging
 import numpy as np
 import os
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
+
+logger = logging.getLogger(__name__)
 
 class VectorIndex:
-    def __init__(self, dimension: int, index_path: Optional[str] = None):
+    def __init__(self, dimension: int, index_path: Optional[str] = None, backend: Optional[str] = None):
         self.dimension = dimension
         self.index_path = index_path
+        self.backend = backend # Embedding backend the vectors came from, recorded with the dimension
         self.index = faiss.IndexFlatL2(dimension)
         self.ids: List[str] = [] # List of prompt IDs corresponding to index positions
+        self.hashes: Dict[str, str] = {} # Prompt ID -> content hash the vector was built from
+        self.model: Optional[str] = None # Embedding model the vectors came from
 
         if index_path and os.path.exists(index_path):
             self.load(index_path)
 
-    def add(self, prompt_id: str, vector: List[float]):
+    def add(self, prompt_id: str, vector: List[float], content_hash: Optional[str] = None):
         vec_np = np.array([vector]).astype('float32')
         self.index.add(vec_np)
         self.ids.append(prompt_id)
+        if content_hash:
+            self.hashes[prompt_id] = content_hash
+
+    def add_batch(self, prompt_ids: List[str], vectors: List[List[float]], content_hashes: Optional[List[str]] = None):
+        if not prompt_ids:
+            return
+        vec_np = np.asarray(vectors, dtype='float32')
+        self.index.add(vec_np)
+        self.ids.extend(prompt_ids)
+        if content_hashes:
+            for pid, content_hash in zip(prompt_ids, content_hashes):
+                if content_hash:
+                    self.hashes[pid] = content_hash
+
+    def remove(self, prompt_ids: Iterable[str]) -> int:
+        """Drop every vector stored for the given prompt IDs. Returns how many were removed."""
+        doomed = set(prompt_ids)
+        keep = [i for i, pid in enumerate(self.ids) if pid not in doomed]
+        removed = len(self.ids) - len(keep)
+        if not removed:
+            return 0
+
+        vectors = self.index.reconstruct_n(0, self.index.ntotal) if self.index.ntotal else None
+        self.index = faiss.IndexFlatL2(self.dimension)
+        if keep:
+            self.index.add(np.ascontiguousarray(vectors[keep]))
+        self.ids = [self.ids[i] for i in keep]
+        for pid in doomed:
+            self.hashes.pop(pid, None)
+        return removed
 
     def search(self, vector: List[float], k: int = 5) -> List[Tuple[str, float]]:
         if self.index.ntotal == 0:
@@ -39,13 +76,27 @@ class VectorIndex:
         # We also need to save the IDs mapping
         with open(target_path + ".ids", "w") as f:
             f.write("\n".join(self.ids))
+        with open(target_path + ".meta", "w") as f:
+            json.dump({"model": self.model, "backend": self.backend, "dimension": self.dimension, "hashes": self.hashes}, f)
 
     def load(self, path: str):
-        self.index = faiss.read_index(path)
+        index = faiss.read_index(path)
+        if index.d != self.dimension:
+            # Built by an embedder of another size; start empty so reindex rebuilds it
+            logger.warning("Ignoring %s: it holds %d-dimensional vectors, expected %d", path, index.d, self.dimension)
+            return
+        self.index = index
         if os.path.exists(path + ".ids"):
             with open(path + ".ids", "r") as f:
                 self.ids = f.read().splitlines()
+        if os.path.exists(path + ".meta"):
+            with open(path + ".meta", "r") as f:
+                meta = json.load(f)
+            self.model = meta.get("model")
+            self.backend = meta.get("backend", self.backend)
+            self.hashes = meta.get("hashes", {})
 
     def reset(self):
         self.index = faiss.IndexFlatL2(self.dimension)
         self.ids = []
+        self.hashes = {}
@@ -18,6 +18,15 @@ class AdvancedWorkflowEngine:
         return False
 
     def execute(self, workflow: Workflow, initial_context: Dict[str, Any]) -> Dict[str, Any]:
+        # Load every prompt the workflow can reach in one batch instead of one lookup per step
+        prompt_ids = [step.prompt_id for step in workflow.steps.values() if step.prompt_id]
+        agent_ids = [step.agent_id for step in workflow.steps.values() if step.agent_id]
+        if agent_ids:
+            prompt_ids += self.agent_orchestrator.assigned_prompts(agent_ids)
+        with self.prompt_service.prefetch(prompt_ids):
+            return self._run(workflow, initial_context)
+
+    def _run(self, workflow: Workflow, initial_context: Dict[str, Any]) -> Dict[str, Any]:
         context = initial_context.copy()
         current_step_id = workflow.start_step_id
 
@@ -1,7 +1,13 @@
 from promptlib.agents.engine import ExecutorAgent, AgentOrchestrator
 from promptlib.models.agent import Agent
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.workflows.engine import AdvancedWorkflowEngine
+from promptlib.models.workflow import Workflow, WorkflowStep
 from unittest.mock import MagicMock
 from uuid import uuid4
+import os
 
 def test_agent_orchestration():
     mock_svc = MagicMock()
@@ -17,5 +23,41 @@ def test_agent_orchestration():
     assert result["output"] == "Rendered result"
     print("Agent orchestration test passed!")
 
+def test_agent_assigned_prompts():
+    db_file = "test_agents.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    svc = PromptService(repo, RenderingService())
+    prompts = [svc.create_prompt(f"Assigned{i}", f"Step {i} for {{{{name}}}}") for i in range(3)]
+
+    agent_model = Agent(name="Batch", role="executor", assigned_prompts=[p.id for p in prompts])
+    orchestrator = AgentOrchestrator()
+    orchestrator.register_agent(agent_model.id, ExecutorAgent(agent_model, svc))
+
+    # Assigned prompts are loaded in one batch, never one by one
+    batches = []
+    get_by_ids = repo.get_by_ids
+    repo.get_by_ids = lambda ids: batches.append(list(ids)) or get_by_ids(ids)
+    repo.get_by_id = MagicMock(side_effect=AssertionError("per-prompt lookup"))
+
+    result = orchestrator.run_agent(agent_model.id, {"variables": {"name": "Ada"}})
+    assert result["outputs"] == {str(p.id): f"Step {i} for Ada" for i, p in enumerate(prompts)}
+    assert batches == [[p.id for p in prompts]]
+    assert len(agent_model.execution_history) == 3
+
+    # Agent steps in a workflow are covered by the workflow's prefetch
+    batches.clear()
+    wf = Workflow(name="AgentWF", start_step_id="s1",
+                  steps={"s1": WorkflowStep(id="s1", agent_id=agent_model.id, input_mapping={"prompt_id": "target", "variables": "vars"}, output_key="res")})
+    context = AdvancedWorkflowEngine(svc, orchestrator).execute(wf, {"target": str(prompts[1].id), "vars": {"name": "Bo"}})
+    assert context["res"] == "Step 1 for Bo"
+    assert batches == [[p.id for p in prompts]]
+
+    os.remove(db_file)
+    print("Agent assigned prompts test passed!")
+
 if __name__ == "__main__":
     test_agent_orchestration()
+    test_agent_assigned_prompts()
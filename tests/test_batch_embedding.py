@@ -0,0 +1,46 @@
+from promptlib.embeddings.engine import EmbeddingEngine
+from unittest.mock import patch, MagicMock
+import numpy as np
+import shutil
+import os
+
+def _fake_model():
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, batch_size=32: np.array([[float(len(t)), 1.0] for t in texts], dtype="float32")
+    return model
+
+def test_cache_aware_generate_batch():
+    cache_dir = "test_batch_cache"
+    if os.path.exists(cache_dir): shutil.rmtree(cache_dir)
+
+    with patch("sentence_transformers.SentenceTransformer", return_value=_fake_model()):
+        engine = EmbeddingEngine(model_name="fake", cache_dir=cache_dir, batch_size=16)
+
+    # Duplicates are encoded once, longest first, and results keep input order
+    texts = ["bb", "a", "bb", "cccc"]
+    assert engine.generate_batch(texts) == [[2.0, 1.0], [1.0, 1.0], [2.0, 1.0], [4.0, 1.0]]
+    (encoded,), kwargs = engine.model.encode.call_args
+    assert encoded == ["cccc", "bb", "a"] and kwargs["batch_size"] == 16
+
+    # Only misses reach the model; single texts share the same cached path
+    engine.model.encode.reset_mock()
+    assert engine.generate_batch(["a", "ddd", "cccc"]) == [[1.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+    assert engine.model.encode.call_args[0][0] == ["ddd"]
+    engine.model.encode.reset_mock()
+    assert engine.generate("bb") == [2.0, 1.0]
+    assert not engine.model.encode.called
+    assert engine.cache_info()["entries"] == 4
+
+    # Another model's engine over the same cache does not reuse these vectors
+    with patch("sentence_transformers.SentenceTransformer", return_value=_fake_model()):
+        other = EmbeddingEngine(model_name="other", cache_dir=cache_dir)
+    other.generate("bb")
+    assert other.model.encode.called
+
+    engine.cache.close()
+    other.cache.close()
+    shutil.rmtree(cache_dir)
+    print("Cache-aware batch embedding test passed!")
+
+if __name__ == "__main__":
+    test_cache_aware_generate_batch()
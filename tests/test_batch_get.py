@@ -0,0 +1,61 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.storage.json_backend import JSONRepository
+from promptlib.storage.yaml_backend import YAMLRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.workflows.engine import AdvancedWorkflowEngine
+from promptlib.models.prompt import Prompt
+from promptlib.models.workflow import Workflow, WorkflowStep
+from unittest.mock import MagicMock
+from uuid import uuid4
+import shutil
+import os
+
+def _check_batch_get(repo):
+    prompts = [Prompt(name=f"p{i}", content=f"Content {i}") for i in range(5)]
+    for p in prompts:
+        repo.save(p)
+
+    missing = uuid4()
+    ids = [prompts[3].id, missing, prompts[0].id, prompts[3].id]
+    found = repo.get_by_ids(ids)
+    assert set(found.keys()) == {prompts[0].id, prompts[3].id}
+    assert found[prompts[3].id].name == "p3"
+    assert repo.get_by_ids([]) == {}
+
+def test_batch_get():
+    db_file = "test_batch_get.db"
+    json_dir = "test_batch_get_json"
+    yaml_dir = "test_batch_get_yaml"
+    if os.path.exists(db_file): os.remove(db_file)
+    for d in [json_dir, yaml_dir]:
+        if os.path.exists(d): shutil.rmtree(d)
+
+    sqlite_repo = SQLiteRepository(f"sqlite:///{db_file}")
+    _check_batch_get(sqlite_repo)
+    _check_batch_get(JSONRepository(json_dir))
+    _check_batch_get(YAMLRepository(yaml_dir))
+
+    # Workflows prefetch their prompts in one batch
+    svc = PromptService(sqlite_repo, RenderingService())
+    p1 = svc.create_prompt("Step1", "Input is {{val}}")
+    p2 = svc.create_prompt("Step2", "Got: {{prev}}")
+    wf = Workflow(
+        name="Prefetch",
+        start_step_id="s1",
+        steps={
+            "s1": WorkflowStep(id="s1", prompt_id=p1.id, input_mapping={"val": "input"}, output_key="res1", next_step_id="s2"),
+            "s2": WorkflowStep(id="s2", prompt_id=p2.id, input_mapping={"prev": "res1"}, output_key="final")
+        }
+    )
+    sqlite_repo.get_by_id = MagicMock(side_effect=AssertionError("unexpected single fetch"))
+    ctx = AdvancedWorkflowEngine(svc, MagicMock()).execute(wf, {"input": "X"})
+    assert ctx["final"] == "Got: Input is X"
+
+    os.remove(db_file)
+    for d in [json_dir, yaml_dir]:
+        shutil.rmtree(d)
+    print("Batch get test passed!")
+
+if __name__ == "__main__":
+    test_batch_get()
@@ -0,0 +1,43 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.models.variable import VariableDefinition
+from promptlib.core.exceptions import ValidationError
+import os
+
+def test_batch_render():
+    db_file = "test_batch_render.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    svc = PromptService(repo, RenderingService())
+
+    v_def = VariableDefinition(name="lang", default_value="Python")
+    p = svc.create_prompt("Batch", "{{name}} codes in {{lang}}", variable_definitions=[v_def])
+
+    rows = [{"name": f"user{i}"} for i in range(50)] + [{"name": "last", "lang": "Rust"}]
+
+    # Outputs stream in input order
+    outputs = svc.render_many(p.id, iter(rows))
+    assert next(outputs) == "user0 codes in Python"
+    outputs = ["user0 codes in Python", *outputs]
+    assert len(outputs) == 51
+    assert outputs[-1] == "last codes in Rust"
+
+    # Usage is recorded once per batch with the number of rendered rows
+    assert svc.get_prompt(p.id).usage_count == 51
+
+    # Invalid rows report their position
+    try:
+        list(svc.render_many(p.id, [{"name": "ok"}, {}]))
+        assert False, "Should have raised ValidationError"
+    except ValidationError as e:
+        assert "Row 1" in str(e)
+    assert svc.get_prompt(p.id).usage_count == 52
+
+    os.remove(db_file)
+    print("Batch render test passed!")
+
+if __name__ == "__main__":
+    test_batch_render()
@@ -0,0 +1,46 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.vector_index.faiss_index import VectorIndex
+from promptlib.core.exceptions import StorageError
+from unittest.mock import MagicMock
+import os
+
+def test_bulk_import():
+    db_file = "test_bulk_import.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    engine = MagicMock()
+    engine.generate_batch.side_effect = lambda texts: [[float(len(t)), 1.0] for t in texts]
+    index = VectorIndex(dimension=2)
+    svc = PromptService(repo, RenderingService(), embedding_engine=engine, vector_index=index)
+
+    records = ({"name": f"bulk{i}", "content": f"Hello {{{{name}}}} number {i}", "tags": ["bulk"]} for i in range(25))
+    created = svc.create_prompts_bulk(records, chunk_size=10)
+    assert created == 25
+
+    # One embedding call per chunk and one index add for everything
+    assert engine.generate_batch.call_count == 3
+    assert index.index.ntotal == 25
+
+    p = repo.get_by_name("bulk7")
+    assert p.variables == ["name"]
+    assert p.tags == ["bulk"]
+    assert len(repo.get_versions(p.id)) == 1
+    assert any(r.name == "bulk7" for r in repo.search("number"))
+
+    # A failing chunk rolls back as a whole
+    try:
+        svc.create_prompts_bulk([{"name": "fresh", "content": "x"}, {"name": "bulk1", "content": "dup"}])
+        assert False, "Should have raised StorageError"
+    except StorageError:
+        pass
+    assert repo.get_by_name("fresh") is None
+
+    os.remove(db_file)
+    print("Bulk import test passed!")
+
+if __name__ == "__main__":
+    test_bulk_import()
@@ -0,0 +1,38 @@
+import subprocess
+import shutil
+import sys
+import uuid
+import os
+
+def test_cli_import_is_light():
+    # Importing the CLI must not load the embedding model stack or FAISS
+    heavy = ["sentence_transformers", "torch", "faiss"]
+    code = "import sys, promptlib.cli.main; print(','.join(m for m in %r if m in sys.modules))" % heavy
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": root})
+    assert out.stdout.strip() == "", out.stdout
+
+    # Non-semantic commands report a timing breakdown without loading the model
+    storage_dir = "test_cli_startup_prompts"
+    dedupe_file = "test_cli_startup.npz"
+    with open(dedupe_file, "wb") as f:
+        f.write(b"not an npz") # Reading it would fail the command
+    env = {**os.environ, "PYTHONPATH": root, "PROMPTLIB_STORAGE_BACKEND": "json", "PROMPTLIB_JSON_DIR": storage_dir,
+           "PROMPTLIB_DEDUPE_INDEX_PATH": dedupe_file}
+    out = subprocess.run([sys.executable, "-m", "promptlib.cli.main", "--timing", "list"],
+                         capture_output=True, text=True, check=True, env=env)
+    assert "open json repository" in out.stderr and "total" in out.stderr
+    assert "load embedding model" not in out.stderr
+
+    # Neither does a write; only lint and dedupe load the duplicate index
+    out = subprocess.run([sys.executable, "-m", "promptlib.cli.main", "--timing", "delete", str(uuid.uuid4())],
+                         capture_output=True, text=True, check=True, env=env)
+    assert "load duplicate index" not in out.stderr
+
+    shutil.rmtree(storage_dir, ignore_errors=True)
+    os.remove(dedupe_file)
+    print("CLI startup test passed!")
+
+if __name__ == "__main__":
+    test_cli_import_is_light()
@@ -0,0 +1,134 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.services.daemon import PromptDaemon, DaemonClient, find_daemon, TOKEN_HEADER
+from promptlib.core.exceptions import PromptNotFoundError, WorkflowError
+from uuid import uuid4
+import http.client
+import socket
+import subprocess
+import sys
+import threading
+import time
+import os
+
+def test_daemon_round_trip():
+    db_file = "test_daemon.db"
+    state_file = "test_daemon.state.json"
+    for f in [db_file, state_file]:
+        if os.path.exists(f): os.remove(f)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    svc = PromptService(repo, RenderingService())
+    p = svc.create_prompt("Greeting", "Hello {{name}}!", category="demo")
+    library = {"backend": "sqlite", "location": os.path.abspath(db_file)}
+
+    daemon = PromptDaemon(svc, port=0, state_path=state_file, library=library)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    try:
+        # Clients find the daemon only for the library it serves
+        while not os.path.exists(state_file):
+            time.sleep(0.01)
+        client = find_daemon(state_file, library)
+        assert client is not None and client.port == daemon.port
+        assert find_daemon(state_file, {"backend": "json", "location": "elsewhere"}) is None
+        assert client.health()["pid"] == os.getpid()
+
+        # The state file is private, and requests a web page could forge are refused
+        assert os.stat(state_file).st_mode & 0o777 == 0o600
+        def status(headers, body=b"{}"):
+            conn = http.client.HTTPConnection(daemon.host, daemon.port, timeout=5)
+            conn.request("POST", "/v1/list", body=body, headers=headers)
+            code = conn.getresponse().status
+            conn.close()
+            return code
+        json_headers = {"Content-Type": "application/json", TOKEN_HEADER: daemon.token}
+        assert status(json_headers) == 200
+        assert status({"Content-Type": "application/json"}) == 401
+        assert status({**json_headers, TOKEN_HEADER: "guess"}) == 401
+        assert status({**json_headers, "Content-Type": "text/plain"}) == 415
+        assert status({**json_headers, "Host": f"attacker.example:{daemon.port}"}) == 403
+
+        assert client.call("render", prompt_id=str(p.id), variables={"name": "Ada"}) == "Hello Ada!"
+        assert client.call("render_many", prompt_id=str(p.id), variable_sets=[{"name": "A"}, {"name": "B"}]) == ["Hello A!", "Hello B!"]
+        listed = client.call("list", category="demo")
+        assert [s["name"] for s in listed] == ["Greeting"]
+        hits = client.call("search", query="Hello")
+        assert hits[0]["prompt"]["id"] == str(p.id)
+        assert repo.get_by_id(p.id).usage_count == 3
+
+        # Service errors come back as the same exception types
+        try:
+            client.call("render", prompt_id=str(uuid4()), variables={})
+            assert False, "Expected PromptNotFoundError"
+        except PromptNotFoundError:
+            pass
+        try:
+            client.call("workflow_run", workflow_id="missing")
+            assert False, "Expected WorkflowError"
+        except WorkflowError:
+            pass
+    finally:
+        daemon.shutdown()
+        thread.join()
+
+    # The state file goes away with the daemon, and a dead address is a connection error
+    assert not os.path.exists(state_file)
+    try:
+        DaemonClient(daemon.host, daemon.port, daemon.token, timeout=5).call("list")
+        assert False, "Expected ConnectionError"
+    except ConnectionError:
+        pass
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    print("Daemon round trip test passed!")
+
+def test_serve_refuses_single_writer_backends():
+    # Write commands open their own repository, which the log backend does not allow beside the daemon
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root, "PROMPTLIB_STORAGE_BACKEND": "log", "PROMPTLIB_LOG_STORAGE_DIR": "test_serve_log",
+           "PROMPTLIB_DAEMON_STATE_PATH": "test_serve.state.json"}
+    out = subprocess.run([sys.executable, "-m", "promptlib.cli.main", "serve", "--lazy", "--port", "0"],
+                         capture_output=True, text=True, env=env, timeout=60)
+    assert out.returncode == 1 and "sqlite" in out.stderr
+    assert not os.path.exists("test_serve.state.json") and not os.path.exists("test_serve_log")
+    print("Serve backend check test passed!")
+
+def test_cli_fallback_only_when_refused():
+    import promptlib.cli.main as cli
+    from promptlib.core.exceptions import PromptLibError
+
+    # A daemon that reads the request and dies before answering
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    def accept_and_drop():
+        conn, _ = listener.accept()
+        conn.recv(65536)
+        conn.close()
+    thread = threading.Thread(target=accept_and_drop)
+    thread.start()
+    port = listener.getsockname()[1]
+    try:
+        cli._daemon_routing, cli._daemon_client = True, DaemonClient("127.0.0.1", port, "t", timeout=5)
+        try:
+            cli.call_daemon("workflow_run", workflow_id="wf")
+            assert False, "A request lost after sending must not fall back to running locally"
+        except PromptLibError as e:
+            assert "may have completed" in str(e)
+    finally:
+        thread.join()
+        listener.close()
+
+    # Nothing listening: refused before sending, so it runs locally
+    cli._daemon_routing, cli._daemon_client = True, DaemonClient("127.0.0.1", port, "t", timeout=5)
+    assert cli.call_daemon("list") is cli._LOCAL and not cli._daemon_routing
+    cli._daemon_client = None
+    print("CLI daemon fallback test passed!")
+
+if __name__ == "__main__":
+    test_daemon_round_trip()
+    test_serve_refuses_single_writer_backends()
+    test_cli_fallback_only_when_refused()
@@ -0,0 +1,143 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.utils.dedupe import NearDuplicateIndex
+import difflib
+import random
+import string
+import os
+
+BASE = "You are a senior Python reviewer. Point out bugs, style problems and missing tests in the code below."
+
+def test_near_duplicate_index():
+    db_file = "test_dedupe.db"
+    idx_file = "test_dedupe.npz"
+    for f in [db_file, idx_file]:
+        if os.path.exists(f): os.remove(f)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    index = NearDuplicateIndex(idx_file)
+    svc = PromptService(repo, RenderingService(), duplicate_index=index)
+
+    a = svc.create_prompt("Reviewer", BASE, description="d")
+    b = svc.create_prompt("Reviewer copy", BASE + " Be concise.", description="d")
+    c = svc.create_prompt("Poet", "Write a haiku about the ocean at dawn, in a calm and gentle tone.", description="d")
+
+    matches = index.query(BASE, threshold=0.5, exclude=str(a.id))
+    assert [m[0] for m in matches] == [str(b.id)]
+
+    results = svc.lint_prompt(a.id)
+    assert any("Reviewer copy" in r.message for r in results)
+    assert not any("Similar" in r.message for r in svc.lint_prompt(c.id))
+
+    clusters = svc.find_duplicates(threshold=0.7)
+    assert len(clusters) == 1
+    assert {p.name for p in clusters[0]} == {"Reviewer", "Reviewer copy"}
+
+    # Deletes are reflected and the index round-trips through disk
+    svc.delete_prompt(b.id)
+    assert index.query(BASE, exclude=str(a.id)) == []
+    index.save()
+    reloaded = NearDuplicateIndex(idx_file)
+    assert len(reloaded) == 2
+    assert str(c.id) in reloaded
+
+    for f in [db_file, idx_file]:
+        if os.path.exists(f): os.remove(f)
+    print("Near-duplicate index test passed!")
+
+def test_shared_preamble_stays_out_of_buckets():
+    # Prompts that only share boilerplate are neither lint candidates nor clustered
+    rng = random.Random(3)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(2000)]
+    index = NearDuplicateIndex()
+    texts = {str(i): BASE + " " + " ".join(rng.choice(words) for _ in range(40)) for i in range(300)}
+    index.build(texts.items())
+    assert sum(len(index.query(texts[str(i)], threshold=0.35, exclude=str(i))) for i in range(50)) <= 5
+    assert index.clusters(0.8) == []
+
+    # while copies of one of them still form a single cluster
+    for n in range(3):
+        index.add(f"copy{n}", texts["0"] + "!" * (n + 1))
+    assert index.clusters(0.8) == [["0", "copy0", "copy1", "copy2"]]
+    print("Shared preamble test passed!")
+
+def test_lint_keeps_scattered_edits():
+    # Pairs the linter's difflib rule flags (ratio > 0.9) must survive the LSH prefilter
+    db_file = "test_dedupe_lint.db"
+    if os.path.exists(db_file): os.remove(db_file)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    svc = PromptService(repo, RenderingService(), duplicate_index=NearDuplicateIndex())
+    base = svc.create_prompt("Base", BASE, description="d")
+    rng = random.Random(7)
+    edited = []
+    while len(edited) < 40:
+        chars = list(BASE)
+        for pos in rng.sample(range(len(chars)), 10):
+            chars[pos] = rng.choice([c for c in string.ascii_lowercase if c != chars[pos].lower()])
+        content = "".join(chars)
+        ratio = difflib.SequenceMatcher(None, BASE, content).ratio()
+        if 0.9 < ratio < 0.92:
+            edited.append(svc.create_prompt(f"Edited {len(edited)}", content, description="d"))
+
+    flagged = {r.message for r in svc.lint_prompt(base.id)}
+    assert {f"Highly similar to existing prompt: {p.name}" for p in edited} <= flagged
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    print("Scattered edit lint test passed!")
+
+def test_duplicate_index_resyncs_with_library():
+    db_file = "test_dedupe_sync.db"
+    idx_file = "test_dedupe_sync.npz"
+    for f in [db_file, idx_file]:
+        if os.path.exists(f): os.remove(f)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    svc = PromptService(repo, RenderingService(), duplicate_index=NearDuplicateIndex(idx_file))
+    a = svc.create_prompt("Reviewer", BASE, description="d")
+    b = svc.create_prompt("Poet", "Write a haiku about the ocean at dawn, in a calm and gentle tone.", description="d")
+    svc.duplicate_index.save()
+
+    # Writers without the index (the GUI before, other processes) leave the saved file stale
+    plain = PromptService(repo, RenderingService())
+    plain.update_prompt(b.id, content=BASE + " Thanks!")
+    c = plain.create_prompt("Reviewer copy", BASE + " Be concise.", description="d")
+    plain.delete_prompt(a.id)
+
+    reopened = PromptService(repo, RenderingService(), duplicate_index=NearDuplicateIndex(idx_file))
+    flagged = {r.message for r in reopened.lint_prompt(c.id)}
+    assert "Highly similar to existing prompt: Poet" in flagged
+    index = reopened.duplicate_index
+    assert str(a.id) not in index and str(c.id) in index
+    assert index.hashes[str(b.id)] == repo.get_by_id(b.id).checksum
+
+    # Hashes round-trip, so the next sync only re-signs what changes
+    index.save()
+    assert NearDuplicateIndex(idx_file).hashes == index.hashes
+
+    # While nothing was written the library is not rescanned; renders are not writes
+    reopened.render_prompt(c.id, {})
+    listings = []
+    iter_summaries = repo.iter_summaries
+    repo.iter_summaries = lambda *args, **kwargs: listings.append(kwargs) or iter_summaries(*args, **kwargs)
+    reopened.lint_prompt(c.id)
+    assert listings == [{"order_by": "-updated_at", "limit": 1}]
+    reopened.delete_prompt(b.id)
+    d = plain.create_prompt("Reviewer again", BASE + " Be brief.", description="d")
+    assert any("Reviewer again" in r.message for r in reopened.lint_prompt(c.id))
+    assert str(d.id) in index and str(b.id) not in index
+    repo.iter_summaries = iter_summaries
+    index.save() # Nothing left for the exit hook to write back
+
+    repo.engine.dispose()
+    for f in [db_file, idx_file]:
+        os.remove(f)
+    print("Duplicate index resync test passed!")
+
+if __name__ == "__main__":
+    test_near_duplicate_index()
+    test_shared_preamble_stays_out_of_buckets()
+    test_lint_keeps_scattered_edits()
+    test_duplicate_index_resyncs_with_library()
@@ -0,0 +1,68 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.embeddings.embedders import HashingEmbedder, create_embedder
+from promptlib.embeddings.engine import EmbeddingEngine
+from promptlib.vector_index.faiss_index import VectorIndex
+from promptlib.core.exceptions import ValidationError
+import numpy as np
+import shutil
+import json
+import os
+
+def test_hashing_embedder():
+    embedder = HashingEmbedder(dimension=64)
+    vectors = embedder.encode(["Summarize this article", "summarise the articles", "Bake a chocolate cake", ""])
+    assert vectors.shape == (4, 64) and vectors.dtype == np.float32
+
+    # Deterministic, unit length, and lexically close texts score higher
+    assert np.array_equal(vectors, HashingEmbedder(dimension=64).encode(["Summarize this article", "summarise the articles",
+                                                                         "Bake a chocolate cake", ""]))
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0) and not vectors[3].any()
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+    assert create_embedder("hashing", dimension=32).name != embedder.name
+    try:
+        create_embedder("nope")
+        assert False, "Unknown backends should be rejected"
+    except ValidationError:
+        pass
+    print("Hashing embedder test passed!")
+
+def test_semantic_search_with_hashing_backend():
+    db_file = "test_embedders.db"
+    cache_dir = "test_embedders_cache"
+    idx_file = "test_embedders.index"
+    for f in [db_file, idx_file, idx_file + ".ids", idx_file + ".meta"]:
+        if os.path.exists(f): os.remove(f)
+    if os.path.exists(cache_dir): shutil.rmtree(cache_dir)
+
+    engine = EmbeddingEngine(cache_dir=cache_dir, backend="hashing", dimension=128)
+    assert engine.backend == "hashing" and engine.get_dimension() == 128 and engine.model is None
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    svc = PromptService(repo, RenderingService(), embedding_engine=engine,
+                        vector_index=VectorIndex(engine.get_dimension(), idx_file, backend=engine.backend))
+    summary = svc.create_prompt("Summary", "Summarize the article in three bullet points")
+    svc.create_prompt("Cake", "Write a recipe for a chocolate cake")
+    assert svc.search_prompts("summarise articles", semantic=True, k=1)[0].id == summary.id
+
+    # The index records which backend and dimension it was built with
+    svc.reindex()
+    with open(idx_file + ".meta") as f:
+        meta = json.load(f)
+    assert meta["backend"] == "hashing" and meta["dimension"] == 128 and meta["model"] == engine.model_name
+
+    # An index of another dimension is not loaded
+    assert VectorIndex(128, idx_file).index.ntotal == 2
+    assert VectorIndex(64, idx_file).index.ntotal == 0
+
+    engine.cache.close()
+    repo.engine.dispose()
+    for f in [db_file, idx_file, idx_file + ".ids", idx_file + ".meta"]:
+        os.remove(f)
+    shutil.rmtree(cache_dir)
+    print("Hashing backend semantic search test passed!")
+
+if __name__ == "__main__":
+    test_hashing_embedder()
+    test_semantic_search_with_hashing_backend()
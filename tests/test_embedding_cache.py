@@ -0,0 +1,62 @@
+from promptlib.embeddings.cache import EmbeddingCache
+import numpy as np
+import shutil
+import os
+
+def test_embedding_cache():
+    cache_dir = "test_embedding_cache"
+    if os.path.exists(cache_dir): shutil.rmtree(cache_dir)
+    path = os.path.join(cache_dir, "embeddings.sqlite3")
+
+    cache = EmbeddingCache(path, memory_items=2)
+    cache.set("model-a", "hello", np.array([1.0, 2.0]))
+    cache.set_many("model-a", {"world": [3.0, 4.0], "again": [5.0, 6.0]})
+
+    # Keys include the model, so another model never sees these vectors
+    assert cache.get("model-b", "hello") is None
+    assert cache.get("model-a", "hello").tolist() == [1.0, 2.0] # from disk, "hello" fell out of the memory tier
+    found = cache.get_many("model-a", ["again", "missing", "again"])
+    assert found[0].tolist() == [5.0, 6.0] and found[1] is None and found[2] is found[0]
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 2 and stats["misses"] == 2
+    assert stats["entries"] == 3 and stats["bytes"] == 3 * 8
+
+    # Overwriting a key does not double count its bytes, and the store survives a reopen
+    cache.set("model-a", "hello", [7.0, 8.0])
+    assert cache.stats()["bytes"] == 3 * 8
+    cache.close()
+    cache = EmbeddingCache(path, max_bytes=4 * 8)
+    assert cache.get("model-a", "hello").tolist() == [7.0, 8.0]
+    assert cache.stats()["bytes"] == 3 * 8
+
+    # Going over the byte budget evicts the least recently read vectors
+    cache.set_many("model-a", {"x": [0.0, 0.0], "y": [1.0, 1.0]})
+    stats = cache.stats()
+    assert stats["bytes"] <= int(4 * 8 * 0.9) and stats["evictions"] == 2
+    assert cache.get("model-a", "world") is None and cache.get("model-a", "again") is None
+    assert cache.get("model-a", "hello") is not None and cache.get("model-a", "y") is not None
+
+    # Reads never write; their access times go out with the next store
+    cache._memory.clear()
+    changes = cache._conn.total_changes
+    assert cache.get_many("model-a", ["hello", "y", "missing"])[2] is None
+    assert cache._conn.total_changes == changes
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+    # Processes sharing the file enforce the budget on its combined size
+    first = EmbeddingCache(path, max_bytes=4 * 8)
+    second = EmbeddingCache(path, max_bytes=4 * 8)
+    first.set_many("model-a", {"a": [1.0, 1.0], "b": [2.0, 2.0], "c": [3.0, 3.0]})
+    second.set_many("model-a", {"d": [4.0, 4.0], "e": [5.0, 5.0]})
+    assert second.stats()["bytes"] <= int(4 * 8 * 0.9) and second.evictions == 2
+    assert first.get("model-a", "e") is not None
+    first.close()
+    second.close()
+    shutil.rmtree(cache_dir)
+    print("Embedding cache test passed!")
+
+if __name__ == "__main__":
+    test_embedding_cache()
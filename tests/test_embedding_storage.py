@@ -0,0 +1,73 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.storage.json_backend import JSONRepository
+from promptlib.storage.embeddings import DEFAULT_MODEL
+from promptlib.models.prompt import Prompt
+from sqlalchemy import text
+import numpy as np
+import json
+import shutil
+import os
+
+def test_packed_embeddings():
+    db_file = "test_embeddings.db"
+    json_dir = "test_embeddings_json"
+    if os.path.exists(db_file): os.remove(db_file)
+    if os.path.exists(json_dir): shutil.rmtree(json_dir)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    a = Prompt(name="a", content="alpha", content_hash="ha")
+    b = Prompt(name="b", content="beta", content_hash="hb")
+    repo.save(a)
+    repo.save(b)
+
+    repo.update_embeddings({a.id: [0.5, 1.5, 2.5]}, "m", {a.id: "ha"})
+    repo.update_embeddings({b.id: np.array([1.0, 2.0])}, "m", dtype="float16")
+    stored = repo.get_embeddings([a.id, b.id], "m")
+    vector, content_hash = stored[a.id]
+    assert vector.dtype == np.float32 and not vector.flags.writeable # a view over the BLOB
+    assert vector.tolist() == [0.5, 1.5, 2.5] and content_hash == "ha"
+    assert stored[b.id][0].dtype == np.float16 and stored[b.id][1] is None
+    assert repo.get_embeddings([a.id], "other") == {}
+
+    # Prompt rows no longer carry vectors, and deleting a prompt drops its embeddings
+    assert repo.get_by_id(a.id).embedding_vector is None
+    repo.delete(b.id)
+    assert repo.get_embeddings([b.id], "m") == {}
+
+    # Databases from older versions move inline JSON vectors into the new table on open
+    with repo.engine.begin() as conn:
+        conn.execute(text("DROP TABLE prompt_embeddings"))
+        conn.execute(text("UPDATE prompts SET embedding_vector_json = :v WHERE id = :id"), {"v": json.dumps([3.0, 4.0]), "id": str(a.id)})
+    repo.engine.dispose()
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    assert repo.get_embeddings([a.id], DEFAULT_MODEL)[a.id][0].tolist() == [3.0, 4.0]
+    with repo.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM prompts WHERE embedding_vector_json IS NOT NULL")).scalar() == 0
+
+    # File backends keep vectors in sidecars and pick up inline vectors from old files
+    files = JSONRepository(json_dir)
+    c = Prompt(name="c", content="gamma")
+    files.save(c)
+    files.update_embeddings({c.id: [1.0, 0.0]}, "m", {c.id: "hc"})
+    assert "embedding_vector\": [" not in open(files._get_path(c.id)).read()
+    assert files.get_embeddings([c.id], "m")[c.id][0].tolist() == [1.0, 0.0]
+
+    legacy = Prompt(name="legacy", content="delta", content_hash="hd", embedding_vector=[7.0, 8.0])
+    with open(files._get_path(legacy.id), "w") as f:
+        f.write(legacy.model_dump_json())
+    vector, content_hash = files.get_embeddings([legacy.id], DEFAULT_MODEL)[legacy.id]
+    assert vector.tolist() == [7.0, 8.0] and content_hash == "hd"
+    files.update_usage(legacy.id)
+    assert "embedding_vector\": [" not in open(files._get_path(legacy.id)).read()
+    assert files.get_embeddings([legacy.id], DEFAULT_MODEL)[legacy.id][0].tolist() == [7.0, 8.0]
+
+    files.delete(c.id)
+    assert files.get_embeddings([c.id], "m") == {}
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    shutil.rmtree(json_dir)
+    print("Packed embedding storage test passed!")
+
+if __name__ == "__main__":
+    test_packed_embeddings()
@@ -0,0 +1,55 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.models.prompt import Prompt
+from sqlalchemy import text
+import os
+
+def _integrity_check(repo):
+    # Raises if the index disagrees with the prompts table
+    with repo.engine.begin() as conn:
+        conn.execute(text("INSERT INTO prompt_fts (prompt_fts, rank) VALUES ('integrity-check', 1)"))
+
+def test_fts_triggers_and_migration():
+    db_file = "test_fts_sync.db"
+    if os.path.exists(db_file): os.remove(db_file)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    p = Prompt(name="alpha", description="first", content="The quick brown fox")
+    repo.save(p)
+    assert [r.id for r in repo.search("quick")] == [p.id]
+
+    # Content edits replace the indexed terms; usage-only updates leave them alone
+    p.content = "A lazy dog"
+    repo.save(p)
+    repo.update_usage(p.id)
+    assert repo.search_scored("quick") == []
+    assert repo.search_scored("lazy")[0][0].id == p.id
+    _integrity_check(repo)
+
+    repo.delete(p.id)
+    assert repo.search_scored("lazy") == []
+    _integrity_check(repo)
+
+    # A database with the old standalone index is migrated and backfilled on open
+    repo.save(Prompt(name="beta", content="Legacy prompt about rockets"))
+    with repo.engine.begin() as conn:
+        for name in ["prompts_fts_ai", "prompts_fts_ad", "prompts_fts_au"]:
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        conn.execute(text("DROP TABLE prompt_fts"))
+        conn.execute(text("CREATE VIRTUAL TABLE prompt_fts USING fts5(prompt_id UNINDEXED, name, description, content)"))
+    repo.engine.dispose()
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    assert repo.search_scored("rockets")[0][0].name == "beta"
+    _integrity_check(repo)
+
+    repo.vacuum()
+    repo.optimize_search_index()
+    assert repo.search_scored("rockets")[0][0].name == "beta"
+    _integrity_check(repo)
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    print("FTS sync test passed!")
+
+if __name__ == "__main__":
+    test_fts_triggers_and_migration()
@@ -0,0 +1,56 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.vector_index.faiss_index import VectorIndex
+from promptlib.models.prompt import Prompt
+import os
+
+class KeywordEmbedding:
+    """Tiny deterministic stand-in for EmbeddingEngine."""
+    vocabulary = ["sql", "database", "art", "painting"]
+
+    def generate(self, text):
+        text = text.lower()
+        return [float(text.count(w)) for w in self.vocabulary]
+
+    def get_dimension(self):
+        return len(self.vocabulary)
+
+def test_hybrid_search():
+    db_file = "test_hybrid_search.db"
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+
+    # Top-k is applied in SQL and ranked by bm25, name matches first
+    repo.save(Prompt(name="Python Expert", content="Python tips and Python tricks.", usage_count=1))
+    repo.save(Prompt(name="Generic Helper", content="Sometimes mentions python.", usage_count=50))
+    repo.save(Prompt(name="Go Master", content="Go only.", usage_count=100))
+    results = repo.search_scored("python", limit=1)
+    assert len(results) == 1
+    assert results[0][0].name == "Python Expert"
+    assert results[0][1] > 0
+
+    # Queries that are not valid FTS5 syntax still work
+    assert repo.search_scored("python's") is not None
+
+    engine = KeywordEmbedding()
+    svc = PromptService(repo, RenderingService(), embedding_engine=engine, vector_index=VectorIndex(engine.get_dimension()))
+    svc.create_prompt("SQL Expert", "You write SQL for every database.")
+    svc.create_prompt("Art Critic", "You review art and painting.")
+
+    # Semantic-only hit ("databases" is not an FTS token match)
+    hits = svc.search_prompts_scored("databases sql", semantic=True, k=1)
+    assert hits[0][0].name == "SQL Expert"
+
+    # Prompts found by both rankings are fused ahead of single-source hits
+    hits = svc.search_prompts_scored("painting", semantic=True, k=3)
+    assert hits[0][0].name == "Art Critic"
+    assert hits[0][1] > hits[-1][1]
+
+    os.remove(db_file)
+    print("Hybrid search test passed!")
+
+if __name__ == "__main__":
+    test_hybrid_search()
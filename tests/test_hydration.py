@@ -0,0 +1,46 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.models.prompt import Prompt
+from promptlib.models.variable import VariableDefinition
+from datetime import datetime
+from sqlalchemy import text
+import os
+
+def test_sqlite_hydration_round_trip():
+    db_file = "test_hydration.db"
+    if os.path.exists(db_file): os.remove(db_file)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    p = Prompt(
+        name="full",
+        description="Ünïcode \"quoted\" description",
+        content="Hi {{name}}",
+        variables=["name"],
+        variable_definitions=[VariableDefinition(name="name", default_value=3, required=False)],
+        tags=["a", "b"],
+        category="c",
+        last_used=datetime(2024, 1, 2, 3, 4, 5, 678901),
+        metadata={"nested": {"k": [1, 2]}},
+        checksum="abc",
+        content_hash="abc"
+    )
+    repo.save(p)
+    assert repo.get_by_id(p.id) == p
+    assert repo.get_by_name("full") == p
+    assert repo.list_all() == [p]
+    assert next(repo.iter_prompts()) == p
+
+    # Rows written by older versions may hold JSON null in list/dict columns
+    bare = Prompt(name="bare", content="x")
+    repo.save(bare)
+    with repo.engine.begin() as conn:
+        conn.execute(text("UPDATE prompts SET tags = 'null', metadata_json = NULL, variables = 'null' WHERE name = 'bare'"))
+    loaded = repo.get_by_id(bare.id)
+    assert loaded.tags == [] and loaded.metadata == {} and loaded.variables == []
+    assert next(repo.iter_summaries(tags=None, order_by="name")).name == "bare"
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    print("SQLite hydration test passed!")
+
+if __name__ == "__main__":
+    test_sqlite_hydration_round_trip()
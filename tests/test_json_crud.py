@@ -21,6 +21,11 @@ def test_json_crud():
     assert p3 is not None
     assert p3.id == p.id
 
+    # Name hits outrank body occurrences
+    repo.save(Prompt(name="Notes", content="json json json"))
+    hits = repo.search_scored("json", limit=1)
+    assert [h[0].id for h in hits] == [p.id] and hits[0][1] == 6.0
+
     repo.delete(p.id)
     assert repo.get_by_id(p.id) is None
 
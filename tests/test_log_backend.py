@@ -0,0 +1,123 @@
+from promptlib.storage.log_backend import LogRepository
+from promptlib.models.prompt import Prompt
+from promptlib.models.version import PromptVersion
+from promptlib.models.agent import Agent
+from promptlib.core.exceptions import StorageError
+import shutil
+import os
+
+def test_log_backend():
+    storage_dir = "test_log_store"
+    if os.path.exists(storage_dir): shutil.rmtree(storage_dir)
+
+    repo = LogRepository(storage_dir, compact_interval=0)
+    a = Prompt(name="alpha", content="Write a haiku", category="poetry", tags=["short"])
+    b = Prompt(name="beta", content="Summarize the alpha report", tags=["short", "report"])
+    repo.save_bulk([a, b], [PromptVersion(prompt_id=a.id, version="1.0.0", content=a.content, checksum="c")])
+    agent = Agent(name="Runner", role="executor")
+    repo.save_agent(agent)
+    repo.update_embeddings({a.id: [1.0, 2.0]}, "m", {a.id: "ha"})
+
+    assert repo.get_by_id(a.id) == a
+    assert repo.get_by_name("beta").id == b.id
+    assert [p.id for p in repo.list_all(category="poetry")] == [a.id]
+    assert {p.id for p in repo.search("alpha")} == {a.id, b.id}
+    assert [v.version for v in repo.get_versions(a.id)] == ["1.0.0"]
+    assert repo.get_agent(agent.id).name == "Runner"
+    assert repo.get_embeddings([a.id], "m")[a.id][0].tolist() == [1.0, 2.0]
+
+    # Overwrites and deletes only append; the old records become dead bytes
+    for _ in range(20):
+        repo.update_usage(a.id)
+    repo.delete(b.id)
+    assert repo.get_by_name("beta") is None and repo.get_by_id(a.id).usage_count == 20
+    assert repo.dead_ratio() > 0.5
+
+    # Compaction keeps exactly the live records, whose bytes the dead count left out
+    size = os.path.getsize(repo.log_path)
+    live = size - repo._dead
+    assert repo.compact() > 0 and os.path.getsize(repo.log_path) == live
+    assert repo.dead_ratio() == 0.0
+    assert repo.get_by_id(a.id).usage_count == 20
+    assert repo.get_embeddings([a.id], "m")[a.id][1] == "ha"
+    c = Prompt(name="gamma", content="After compaction")
+    repo.save(c)
+    repo.close()
+
+    # Reopening loads the snapshot and replays what was appended after it
+    repo = LogRepository(storage_dir, compact_interval=0)
+    repo.write_snapshot()
+    d = Prompt(name="delta", content="Only in the log tail")
+    repo.save(d)
+    with open(repo.log_path, "ab") as f:
+        f.write(b'{"op": "put", "kind": "prompt", "key": "torn"}\t{"na') # Crash mid-write
+    repo._release_dir_lock() # A crashed process no longer holds the directory
+    repo = LogRepository(storage_dir, compact_interval=0)
+    assert sorted(s.name for s in repo.iter_summaries()) == ["alpha", "delta", "gamma"]
+    assert repo.get_by_name("delta").content == "Only in the log tail"
+    assert open(repo.log_path, "rb").read().endswith(b"}\n")
+
+    # Without a usable snapshot the whole log is scanned
+    repo.close()
+    os.remove(repo.snapshot_path)
+    repo = LogRepository(storage_dir, compact_interval=0)
+    assert repo.get_stats()["total_prompts"] == 3
+    assert repo.get_by_id(a.id).usage_count == 20
+
+    repo.close()
+    shutil.rmtree(storage_dir)
+    print("Log backend test passed!")
+
+def test_log_backend_single_owner():
+    storage_dir = "test_log_owner"
+    if os.path.exists(storage_dir): shutil.rmtree(storage_dir)
+
+    repo = LogRepository(storage_dir, compact_interval=0)
+    try:
+        LogRepository(storage_dir, compact_interval=0)
+        assert False, "A second repository must not share the log"
+    except StorageError:
+        pass
+    repo.save(Prompt(name="alpha", content="Still readable"))
+    assert repo.get_by_name("alpha").content == "Still readable"
+
+    # The directory can be reopened once the owner closes it
+    repo.close()
+    repo = LogRepository(storage_dir, compact_interval=0)
+    assert repo.get_by_name("alpha") is not None
+    repo.close()
+    shutil.rmtree(storage_dir)
+    print("Log backend single owner test passed!")
+
+def test_log_backend_skips_corrupt_record():
+    storage_dir = "test_log_corrupt"
+    if os.path.exists(storage_dir): shutil.rmtree(storage_dir)
+
+    repo = LogRepository(storage_dir, compact_interval=0)
+    for name in ["alpha", "beta", "gamma"]:
+        repo.save(Prompt(name=name, content=f"About {name}"))
+    repo.close()
+
+    # Damage beta's record in place; the records around it are intact
+    with open(repo.log_path, "rb") as f:
+        data = f.read()
+    start = data.index(b'"name":"beta"')
+    with open(repo.log_path, "wb") as f:
+        f.write(data[:start] + b"#" * 13 + data[start + 13:])
+    os.remove(repo.snapshot_path)
+
+    repo = LogRepository(storage_dir, compact_interval=0)
+    assert sorted(s.name for s in repo.iter_summaries()) == ["alpha", "gamma"]
+    assert os.path.getsize(repo.log_path) == len(data) and repo.dead_ratio() > 0
+    repo.compact()
+    repo.close()
+    repo = LogRepository(storage_dir, compact_interval=0)
+    assert repo.get_by_name("gamma").content == "About gamma" and repo.dead_ratio() == 0.0
+    repo.close()
+    shutil.rmtree(storage_dir)
+    print("Log backend corrupt record test passed!")
+
+if __name__ == "__main__":
+    test_log_backend()
+    test_log_backend_single_owner()
+    test_log_backend_skips_corrupt_record()
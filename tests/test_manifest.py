@@ -0,0 +1,75 @@
+from promptlib.storage.json_backend import JSONRepository
+from promptlib.storage.yaml_backend import YAMLRepository
+from promptlib.models.prompt import Prompt
+import yaml
+import json
+import shutil
+import time
+import os
+
+def _check_backend(repo_cls, storage_dir):
+    if os.path.exists(storage_dir): shutil.rmtree(storage_dir)
+
+    repo = repo_cls(storage_dir)
+    a = Prompt(name="alpha", content="Write a haiku", category="poetry", tags=["short"])
+    b = Prompt(name="beta", content="Summarize the alpha report", category="work", tags=["short", "report"])
+    repo.save(a)
+    repo.save(b)
+
+    assert repo.get_by_name("alpha").id == a.id
+    assert repo.get_by_name("missing") is None
+    assert [p.id for p in repo.list_all(category="work")] == [b.id]
+    assert repo.get_tag_counts() == {"short": 2, "report": 1}
+    assert {p.id for p in repo.search("alpha")} == {a.id, b.id}
+
+    # Renames and deletes through the repository keep the name index current
+    a.name = "gamma"
+    repo.save(a)
+    assert repo.get_by_name("alpha") is None and repo.get_by_name("gamma").id == a.id
+    repo.delete(b.id)
+    assert repo.get_by_name("beta") is None
+    assert repo.get_stats()["total_prompts"] == 1
+
+    # The manifest is persisted, and a fresh repository picks up files changed behind its back
+    repo.manifest.flush()
+    assert os.path.exists(os.path.join(storage_dir, "manifest.json"))
+    c = Prompt(name="delta", content="Outside edit", tags=["external"])
+    data = c.model_dump(mode='json')
+    with open(repo._get_path(c.id), 'w') as f:
+        if repo_cls is YAMLRepository:
+            yaml.dump(data, f)
+        else:
+            json.dump(data, f)
+    reopened = repo_cls(storage_dir)
+    assert reopened.get_by_name("delta").id == c.id
+    assert [s.name for s in reopened.iter_summaries(order_by="name")] == ["delta", "gamma"]
+    os.remove(reopened._get_path(a.id))
+    assert reopened.get_by_name("gamma") is None
+
+    # Lookups do not rescan a directory whose mtime is unchanged
+    old = time.time_ns() - 10 * 10**9
+    os.utime(reopened.manifest.prompts_dir, ns=(old, old))
+    assert reopened.get_by_name("delta").id == c.id
+    scans = []
+    scandir = os.scandir
+    os.scandir = lambda path: scans.append(path) or scandir(path)
+    try:
+        c.name = "epsilon"
+        reopened.save(c)
+        assert reopened.get_by_name("epsilon").id == c.id and reopened.get_by_name("delta") is None
+        assert [s.name for s in reopened.iter_summaries()] == ["epsilon"]
+        assert scans == []
+        os.remove(reopened._get_path(c.id))
+        assert reopened.get_by_name("epsilon") is None and len(scans) == 1
+    finally:
+        os.scandir = scandir
+
+    shutil.rmtree(storage_dir)
+
+def test_file_manifest():
+    _check_backend(JSONRepository, "test_manifest_json")
+    _check_backend(YAMLRepository, "test_manifest_yaml")
+    print("File manifest test passed!")
+
+if __name__ == "__main__":
+    test_file_manifest()
@@ -0,0 +1,62 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.storage.json_backend import JSONRepository
+from promptlib.storage.yaml_backend import YAMLRepository
+from promptlib.storage.log_backend import LogRepository
+from promptlib.models.prompt import Prompt, PromptSummary
+from promptlib.core.exceptions import PromptNotFoundError
+import shutil
+import os
+
+def _check_paging(repo):
+    for i in range(7):
+        repo.save(Prompt(name=f"p{i}", content="x" * 1000, usage_count=i % 3, tags=["even"] if i % 2 == 0 else []))
+
+    # Walking pages with after_id visits every prompt once, in order
+    seen, after = [], None
+    while True:
+        page = list(repo.iter_summaries(order_by="-usage_count", after_id=after, limit=3))
+        if not page:
+            break
+        seen.extend(page)
+        after = page[-1].id
+    assert len({s.id for s in seen}) == 7
+    assert [s.usage_count for s in seen] == sorted([i % 3 for i in range(7)], reverse=True)
+    assert all(isinstance(s, PromptSummary) for s in seen)
+
+    assert [s.name for s in repo.iter_summaries(limit=2, offset=1)] == ["p1", "p2"]
+    p0 = next(repo.iter_summaries(limit=1))
+    assert [s.name for s in repo.iter_summaries(tags=["even"], after_id=p0.id)] == ["p2", "p4", "p6"]
+    prompts = list(repo.iter_prompts(tags=["even"], limit=2))
+    assert [p.name for p in prompts] == ["p0", "p2"]
+    assert prompts[0].content == "x" * 1000
+
+    # The cursor survives its prompt being edited out of the filter
+    prompts[1].tags = []
+    repo.save(prompts[1])
+    assert [s.name for s in repo.iter_summaries(tags=["even"], after_id=prompts[1].id)] == ["p4", "p6"]
+
+    try:
+        list(repo.iter_summaries(after_id=Prompt(name="missing", content="x").id))
+        assert False, "unknown after_id should raise"
+    except PromptNotFoundError:
+        pass
+
+def test_keyset_pagination():
+    db_file = "test_paging.db"
+    dirs = ["test_paging_json", "test_paging_yaml", "test_paging_log"]
+    if os.path.exists(db_file): os.remove(db_file)
+    for d in dirs:
+        if os.path.exists(d): shutil.rmtree(d)
+
+    _check_paging(SQLiteRepository(f"sqlite:///{db_file}"))
+    _check_paging(JSONRepository(dirs[0]))
+    _check_paging(YAMLRepository(dirs[1]))
+    _check_paging(LogRepository(dirs[2], compact_interval=0))
+
+    os.remove(db_file)
+    for d in dirs:
+        shutil.rmtree(d)
+    print("Keyset pagination test passed!")
+
+if __name__ == "__main__":
+    test_keyset_pagination()
@@ -0,0 +1,51 @@
+from promptlib.storage.json_backend import JSONRepository
+from promptlib.storage.yaml_backend import YAMLRepository
+from promptlib.storage import yaml_backend
+from promptlib.storage.loader import FileLoader
+from promptlib.models.prompt import Prompt
+from promptlib.models.version import PromptVersion
+import shutil
+import os
+
+def test_file_loader_keeps_order():
+    loader = FileLoader(workers=4)
+    assert loader.map(lambda x: x * 2, range(100)) == [x * 2 for x in range(100)]
+    loader.close()
+    try:
+        FileLoader(mode="fork")
+        assert False, "Should have rejected the mode"
+    except ValueError:
+        pass
+    print("File loader ordering test passed!")
+
+def _check_backend(repo_cls, storage_dir, **options):
+    if os.path.exists(storage_dir): shutil.rmtree(storage_dir)
+    sequential = repo_cls(storage_dir, load_workers=1)
+    prompts = [Prompt(name=f"p{i}", content=f"Body {i}", category="even" if i % 2 == 0 else "odd", tags=[f"t{i % 3}"]) for i in range(40)]
+    for p in prompts:
+        sequential.save(p)
+    for v in range(3):
+        sequential.save_version(PromptVersion(prompt_id=prompts[0].id, version=f"1.0.{v}", content="c", checksum="c"))
+    sequential.manifest.flush() # Both repositories then list in the same order
+    if repo_cls is YAMLRepository:
+        yaml_backend._parse_cache.clear() # Make the parallel reads parse
+
+    parallel = repo_cls(storage_dir, load_workers=4, **options)
+    expected = sequential.list_all(category="even", tags=["t1"])
+    assert expected and parallel.list_all(category="even", tags=["t1"]) == expected
+    assert sorted(p.name for p in parallel.list_all()) == sorted(p.name for p in prompts)
+    assert {p.id for p in parallel.search("body 1")} == {p.id for p in prompts if p.content.startswith("Body 1")}
+    assert sorted(v.version for v in parallel.get_versions(prompts[0].id)) == ["1.0.0", "1.0.1", "1.0.2"]
+    assert set(parallel.get_by_ids([prompts[3].id, prompts[5].id])) == {prompts[3].id, prompts[5].id}
+    parallel.loader.close()
+    shutil.rmtree(storage_dir)
+
+def test_parallel_directory_loading():
+    _check_backend(JSONRepository, "test_parallel_json")
+    _check_backend(YAMLRepository, "test_parallel_yaml")
+    _check_backend(YAMLRepository, "test_parallel_yaml_proc", load_mode="process")
+    print("Parallel directory loading test passed!")
+
+if __name__ == "__main__":
+    test_file_loader_keeps_order()
+    test_parallel_directory_loading()
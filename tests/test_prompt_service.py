@@ -34,6 +34,12 @@ def test_prompt_service():
     assert p.content == "Hello {{name}}"
     assert p.version == "1.0.2" # Rollback is a new version
 
+    # Keyword search returns the top k, best match first
+    for i in range(4):
+        svc.create_prompt(f"Note {i}", "greeting " * (i + 1))
+    results = svc.search_prompts("greeting", k=2)
+    assert len(results) == 2
+
     os.remove(db_file)
     print("Prompt service test passed!")
 
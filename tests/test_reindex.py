@@ -0,0 +1,91 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.vector_index.faiss_index import VectorIndex
+from promptlib.models.prompt import Prompt
+from unittest.mock import MagicMock
+import hashlib
+import os
+
+def _engine(model_name="model-a"):
+    engine = MagicMock()
+    engine.model_name = model_name
+    engine.generate.side_effect = lambda text: [float(len(text)), 0.0]
+    engine.generate_batch.side_effect = lambda texts: [[float(len(t)), 0.0] for t in texts]
+    return engine
+
+def test_incremental_reindex():
+    db_file = "test_reindex.db"
+    idx_file = "test_reindex.index"
+    for f in [db_file, idx_file, idx_file + ".ids", idx_file + ".meta"]:
+        if os.path.exists(f): os.remove(f)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    prompts = [Prompt(name=f"p{i}", content=f"Prompt body {i}", checksum=hashlib.sha256(f"Prompt body {i}".encode()).hexdigest())
+               for i in range(10)]
+    for p in prompts:
+        repo.save(p)
+
+    # An interrupted run keeps its checkpointed batches
+    engine = _engine()
+    calls = {"n": 0}
+    def flaky(texts):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("interrupted")
+        return [[float(len(t)), 0.0] for t in texts]
+    engine.generate_batch.side_effect = flaky
+    svc = PromptService(repo, RenderingService(), embedding_engine=engine, vector_index=VectorIndex(2, idx_file))
+    try:
+        svc.reindex(batch_size=3, checkpoint_every=1)
+        assert False, "Should have been interrupted"
+    except RuntimeError:
+        pass
+
+    # Resuming only embeds what is left; stored vectors are reused
+    engine = _engine()
+    svc = PromptService(repo, RenderingService(), embedding_engine=engine, vector_index=VectorIndex(2, idx_file))
+    stats = svc.reindex(batch_size=3)
+    assert stats["kept"] == 6
+    assert stats["reused"] == 0
+    assert stats["embedded"] == 4
+    assert svc.vector_index.index.ntotal == 10
+    stored = repo.get_embeddings([prompts[9].id], "model-a")
+    assert stored[prompts[9].id][0].tolist() == [float(len(prompts[9].content)), 0.0]
+
+    # Nothing to do when nothing changed, and no prompt is opened to find that out
+    opened = []
+    get_by_ids, list_all = repo.get_by_ids, repo.list_all
+    repo.get_by_ids = lambda ids: opened.extend(ids) or get_by_ids(ids)
+    repo.list_all = lambda *args, **kwargs: opened.append("list_all") or list_all(*args, **kwargs)
+    stats = svc.reindex()
+    assert stats["embedded"] == 0 and stats["removed"] == 0 and stats["kept"] == 10
+    assert opened == []
+    repo.get_by_ids, repo.list_all = get_by_ids, list_all
+
+    # Edits and deletes are picked up
+    svc.update_prompt(prompts[0].id, content="Completely new body")
+    repo.delete(prompts[1].id)
+    stats = svc.reindex()
+    assert stats["removed"] == 2
+    assert stats["reused"] == 1
+    assert svc.vector_index.index.ntotal == 9
+
+    # A model swap re-embeds everything
+    svc.embedding_engine = _engine("model-b")
+    stats = svc.reindex()
+    assert stats["embedded"] == 9
+    assert svc.vector_index.model == "model-b"
+
+    # Prompts saved without a checksum are hashed from their content
+    legacy = Prompt(name="legacy", content="No checksum stored")
+    repo.save(legacy)
+    assert svc.reindex()["embedded"] == 1
+    assert svc.vector_index.hashes[str(legacy.id)] == hashlib.sha256(legacy.content.encode()).hexdigest()
+
+    for f in [db_file, idx_file, idx_file + ".ids", idx_file + ".meta"]:
+        if os.path.exists(f): os.remove(f)
+    print("Incremental reindex test passed!")
+
+if __name__ == "__main__":
+    test_incremental_reindex()
@@ -0,0 +1,58 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.storage.snapshot import SnapshotRepository, build_snapshot
+from promptlib.models.prompt import Prompt
+from promptlib.core.exceptions import StorageError
+from uuid import uuid4
+import numpy as np
+import os
+
+def test_snapshot_round_trip():
+    db_file = "test_snapshot.db"
+    snap_file = "test_snapshot.snap"
+    for f in [db_file, snap_file]:
+        if os.path.exists(f): os.remove(f)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    prompts = [Prompt(name=f"p{i:02d}", content=f"Body {i}", category="even" if i % 2 == 0 else "odd", tags=[f"t{i % 3}"],
+                      metadata={"i": i}) for i in range(25)]
+    prompts.append(Prompt(name="Ünïcode", content="Héllo"))
+    for p in prompts:
+        repo.save(p)
+    repo.update_embeddings({p.id: [float(i), 1.0] for i, p in enumerate(prompts[:10])}, "m", {prompts[0].id: "h0"})
+
+    stats = build_snapshot(repo, snap_file, model="m")
+    assert stats["prompts"] == 26 and stats["embeddings"] == 10 and stats["dim"] == 2
+
+    snap = SnapshotRepository(snap_file)
+    for p in prompts:
+        assert snap.get_by_id(p.id) == p
+        assert snap.get_by_name(p.name).id == p.id
+    assert snap.get_by_id(uuid4()) is None and snap.get_by_name("nope") is None
+    assert [s.name for s in snap.iter_summaries(category="odd", tags=["t0"])] == [p.name for p in repo.iter_summaries(category="odd", tags=["t0"])]
+    assert snap.get_tag_counts() == repo.get_tag_counts()
+    assert {p.id for p in snap.search("héllo")} == {prompts[-1].id}
+
+    # Embeddings are views into the mapped matrix
+    vector, content_hash = snap.get_embeddings([prompts[0].id], "m")[prompts[0].id]
+    assert vector.tolist() == [0.0, 1.0] and content_hash == "h0" and not vector.flags.writeable
+    assert prompts[12].id not in snap.get_embeddings([prompts[12].id], "m")
+    assert snap.get_embeddings([prompts[0].id], "other") == {}
+    assert np.shares_memory(snap.embedding_matrix(), snap.embedding_matrix())
+
+    # Read-only, but rendering's usage updates are tolerated
+    snap.update_usage(prompts[0].id)
+    try:
+        snap.save(prompts[0])
+        assert False, "Snapshots should be read-only"
+    except StorageError:
+        pass
+
+    del vector
+    snap.close()
+    repo.engine.dispose()
+    for f in [db_file, snap_file]:
+        os.remove(f)
+    print("Snapshot round trip test passed!")
+
+if __name__ == "__main__":
+    test_snapshot_round_trip()
@@ -0,0 +1,34 @@
+from promptlib.config.settings import Settings
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.models.prompt import Prompt
+from sqlalchemy import text
+import os
+
+def test_sqlite_throughput_profile():
+    db_file = "test_profile.db"
+    for f in [db_file, db_file + "-wal", db_file + "-shm"]:
+        if os.path.exists(f): os.remove(f)
+
+    cfg = Settings(sqlite_profile="throughput", sqlite_busy_timeout=1234)
+    repo = SQLiteRepository(f"sqlite:///{db_file}", pragmas=cfg.sqlite_pragmas(), pool_size=cfg.sqlite_pool_size)
+
+    with repo.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1 # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2 # MEMORY
+
+    p = Prompt(name="wal_prompt", content="Hello WAL")
+    repo.save(p)
+    assert repo.get_by_id(p.id).name == "wal_prompt"
+    assert repo.search("WAL")[0].id == p.id
+
+    assert Settings(sqlite_profile="default").sqlite_pragmas() == {}
+
+    repo.engine.dispose()
+    for f in [db_file, db_file + "-wal", db_file + "-shm"]:
+        if os.path.exists(f): os.remove(f)
+    print("SQLite profile test passed!")
+
+if __name__ == "__main__":
+    test_sqlite_throughput_profile()
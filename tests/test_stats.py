@@ -0,0 +1,51 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.storage.json_backend import JSONRepository
+from promptlib.storage.yaml_backend import YAMLRepository
+from promptlib.models.prompt import Prompt
+from datetime import datetime, timedelta
+import shutil
+import os
+
+def _check_stats(repo):
+    now = datetime.now()
+    for i in range(10):
+        repo.save(Prompt(
+            name=f"p{i}",
+            content="x",
+            category="code" if i < 6 else None,
+            tags=["a", "b"] if i % 2 == 0 else ["a"],
+            usage_count=i * 10,
+            last_used=now - timedelta(minutes=i) if i < 3 else None
+        ))
+
+    stats = repo.get_stats(recent=2)
+    assert stats["total_prompts"] == 10
+    assert stats["total_usage"] == 450
+    assert stats["categories"] == {"code": 6, "Uncategorized": 4}
+    assert stats["tags"] == {"a": 10, "b": 5}
+    assert stats["usage_percentiles"] == {"p50": 40, "p90": 80, "p99": 90}
+    assert [r["name"] for r in stats["recently_used"]] == ["p0", "p1"]
+
+def test_repository_stats():
+    db_file = "test_stats.db"
+    json_dir = "test_stats_json"
+    yaml_dir = "test_stats_yaml"
+    if os.path.exists(db_file): os.remove(db_file)
+    for d in [json_dir, yaml_dir]:
+        if os.path.exists(d): shutil.rmtree(d)
+
+    _check_stats(SQLiteRepository(f"sqlite:///{db_file}"))
+    _check_stats(JSONRepository(json_dir))
+    _check_stats(YAMLRepository(yaml_dir))
+
+    empty = SQLiteRepository("sqlite://").get_stats()
+    assert empty["total_prompts"] == 0
+    assert empty["usage_percentiles"]["p50"] == 0
+
+    os.remove(db_file)
+    for d in [json_dir, yaml_dir]:
+        shutil.rmtree(d)
+    print("Repository stats test passed!")
+
+if __name__ == "__main__":
+    test_repository_stats()
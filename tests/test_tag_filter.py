@@ -0,0 +1,59 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.storage.json_backend import JSONRepository
+from promptlib.storage.yaml_backend import YAMLRepository
+from promptlib.models.prompt import Prompt
+from sqlalchemy import text
+import shutil
+import os
+
+def _check_tags(repo):
+    a = Prompt(name="a", content="x", category="code", tags=["py", "review"])
+    b = Prompt(name="b", content="x", tags=["py"])
+    c = Prompt(name="c", content="x", tags=["sql", "review"])
+    for p in [a, b, c]:
+        repo.save(p)
+
+    names = lambda prompts: sorted(p.name for p in prompts)
+    assert names(repo.list_all(tags=["py", "review"])) == ["a"]
+    assert names(repo.list_all(tags=["py", "review"], tag_mode="any")) == ["a", "b", "c"]
+    assert names(repo.list_all(category="code", tags=["review"])) == ["a"]
+    assert repo.get_tag_counts() == {"py": 2, "review": 2, "sql": 1}
+    assert repo.get_tag_counts(tags=["review"]) == {"py": 1, "review": 2, "sql": 1}
+
+    b.tags = ["sql"]
+    repo.save(b)
+    repo.delete(c.id)
+    assert names(repo.list_all(tags=["sql"])) == ["b"]
+    assert repo.get_tag_counts() == {"py": 1, "review": 1, "sql": 1}
+
+def test_tag_filtering():
+    db_file = "test_tags.db"
+    json_dir = "test_tags_json"
+    yaml_dir = "test_tags_yaml"
+    if os.path.exists(db_file): os.remove(db_file)
+    for d in [json_dir, yaml_dir]:
+        if os.path.exists(d): shutil.rmtree(d)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    _check_tags(repo)
+    _check_tags(JSONRepository(json_dir))
+    _check_tags(YAMLRepository(yaml_dir))
+
+    # Databases from before prompt_tags existed are backfilled on open
+    with repo.engine.begin() as conn:
+        for name in ["prompts_tags_ai", "prompts_tags_ad", "prompts_tags_au"]:
+            conn.execute(text(f"DROP TRIGGER {name}"))
+        conn.execute(text("DELETE FROM prompt_tags"))
+    repo.engine.dispose()
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    assert repo.get_tag_counts() == {"py": 1, "review": 1, "sql": 1}
+    assert [p.name for p in repo.list_all(tags=["review"])] == ["a"]
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    for d in [json_dir, yaml_dir]:
+        shutil.rmtree(d)
+    print("Tag filtering test passed!")
+
+if __name__ == "__main__":
+    test_tag_filtering()
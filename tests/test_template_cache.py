@@ -0,0 +1,31 @@
+from promptlib.services.rendering import RenderingService
+
+def test_template_cache():
+    service = RenderingService(cache_size=2)
+    template = "Hello {{name}}!"
+
+    # First render compiles, validation and further renders hit the cache
+    final_vars = service.validate_variables(template, {"name": "Alice"}, cache_key="abc")
+    assert service.render(template, final_vars, cache_key="abc") == "Hello Alice!"
+    assert service.render(template, {"name": "Bob"}, cache_key="abc") == "Hello Bob!"
+
+    info = service.cache_info()
+    assert info["misses"] == 1
+    assert info["hits"] == 2
+    assert info["size"] == 1
+
+    # A key whose stored checksum went stale still renders the current text
+    assert service.render("Bye {{name}}!", {"name": "Bob"}, cache_key="abc") == "Bye Bob!"
+    assert service.render(template, {"name": "Bob"}, cache_key="abc") == "Hello Bob!"
+
+    # Evicts the least recently used entry once full
+    service.render("A {{x}}", {"x": 1})
+    service.render("B {{x}}", {"x": 2})
+    info = service.cache_info()
+    assert info["size"] == 2
+    assert info["evictions"] == 1
+
+    print("Template cache test passed!")
+
+if __name__ == "__main__":
+    test_template_cache()
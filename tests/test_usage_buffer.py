@@ -0,0 +1,88 @@
+from promptlib.storage.sqlite import SQLiteRepository
+from promptlib.services.rendering import RenderingService
+from promptlib.services.prompt_service import PromptService
+from promptlib.services.usage_buffer import UsageBuffer
+from promptlib.models.prompt import Prompt
+import atexit
+import glob
+import os
+
+def test_usage_buffer():
+    db_file = "test_usage_buffer.db"
+    journal = "test_usage.journal"
+    for f in [db_file] + glob.glob(journal + "*"):
+        if os.path.exists(f): os.remove(f)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    buffer = UsageBuffer(repo, flush_interval=0, flush_threshold=5)
+    svc = PromptService(repo, RenderingService(), usage_buffer=buffer)
+
+    p = svc.create_prompt("Buffered", "Hi {{name}}")
+    for _ in range(3):
+        svc.render_prompt(p.id, {"name": "Bob"})
+
+    # Nothing written until a flush
+    assert buffer.pending(p.id) == 3
+    assert repo.get_by_id(p.id).usage_count == 0
+
+    # Hitting the threshold flushes in one batch
+    svc.render_prompt(p.id, {"name": "Bob"})
+    svc.render_prompt(p.id, {"name": "Bob"})
+    assert buffer.pending() == 0
+    stored = repo.get_by_id(p.id)
+    assert stored.usage_count == 5
+    assert stored.last_used is not None
+
+    svc.render_prompt(p.id, {"name": "Bob"})
+    buffer.close()
+    assert repo.get_by_id(p.id).usage_count == 6
+
+    # Journal mode: pending counts survive a crash and are replayed on start-up
+    crashed = UsageBuffer(repo, flush_interval=0, flush_threshold=100, mode="journal", journal_path=journal)
+    crashed.record(p.id)
+    crashed.record(p.id, 2)
+    atexit.unregister(crashed.close)
+    crashed._journal.close()
+    os.close(crashed._journal_lock) # A dead process no longer holds its journal
+
+    recovered = UsageBuffer(repo, flush_interval=0, mode="journal", journal_path=journal)
+    assert repo.get_by_id(p.id).usage_count == 9
+    recovered.close()
+
+    assert not glob.glob(journal + "*")
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    print("Usage buffer test passed!")
+
+def test_concurrent_journals():
+    db_file = "test_usage_concurrent.db"
+    journal = "test_usage_concurrent.journal"
+    for f in [db_file] + glob.glob(journal + "*"):
+        if os.path.exists(f): os.remove(f)
+
+    repo = SQLiteRepository(f"sqlite:///{db_file}")
+    p = Prompt(name="Shared", content="Hi")
+    repo.save(p)
+
+    # Two live buffers on one journal path each own a file; starting the
+    # second must not replay the first's pending records
+    first = UsageBuffer(repo, flush_interval=0, flush_threshold=100, mode="journal", journal_path=journal)
+    first.record(p.id, 2)
+    second = UsageBuffer(repo, flush_interval=0, flush_threshold=100, mode="journal", journal_path=journal)
+    assert repo.get_by_id(p.id).usage_count == 0
+    second.record(p.id)
+    first.flush()
+    second.record(p.id)
+    first.close()
+    second.close()
+    assert repo.get_by_id(p.id).usage_count == 4
+    assert not glob.glob(journal + "*")
+
+    repo.engine.dispose()
+    os.remove(db_file)
+    print("Concurrent usage journals test passed!")
+
+if __name__ == "__main__":
+    test_usage_buffer()
+    test_concurrent_journals()
@@ -0,0 +1,47 @@
+from promptlib.storage import yaml_backend
+from promptlib.storage.yaml_backend import YAMLRepository, parse_cache_info
+from promptlib.models.prompt import Prompt
+import yaml
+import shutil
+import os
+
+def test_yaml_parse_cache():
+    storage_dir = "test_yaml_cache"
+    if os.path.exists(storage_dir): shutil.rmtree(storage_dir)
+
+    if yaml.__with_libyaml__:
+        assert yaml_backend.SafeLoader is yaml.CSafeLoader
+
+    repo = YAMLRepository(storage_dir)
+    p = Prompt(name="cached", content="Hello", metadata={"nested": {"k": [1]}})
+    repo.save(p)
+
+    # Files written by this process are served from the cache without a parse
+    misses = parse_cache_info()["misses"]
+    assert repo.get_by_id(p.id) == p
+    assert repo.get_by_name("cached") == p
+    assert parse_cache_info()["misses"] == misses
+
+    # Another repository over the same directory shares the cache
+    assert YAMLRepository(storage_dir).get_by_id(p.id) == p
+    assert parse_cache_info()["misses"] == misses
+
+    # Callers get their own copy
+    loaded = repo.get_by_id(p.id)
+    loaded.metadata["nested"]["k"].append(2)
+    assert repo.get_by_id(p.id).metadata == {"nested": {"k": [1]}}
+
+    # An edit from outside (e.g. a git pull) changes the file's size or mtime and is re-read
+    path = repo._get_path(p.id)
+    with open(path, "r") as f:
+        edited = f.read().replace("content: Hello", "content: Hello from git")
+    with open(path, "w") as f:
+        f.write(edited)
+    assert repo.get_by_id(p.id).content == "Hello from git"
+    assert parse_cache_info()["misses"] == misses + 1
+
+    shutil.rmtree(storage_dir)
+    print("YAML parse cache test passed!")
+
+if __name__ == "__main__":
+    test_yaml_parse_cache()